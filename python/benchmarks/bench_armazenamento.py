@@ -0,0 +1,142 @@
+"""
+Benchmark do armazenamento das leituras: layout em texto (até a v4) x
+layout codificado (v5: ids de máquina/ordem e instante inteiro).
+
+Para N leituras sintéticas, mede em cada layout:
+- bytes por leitura (tamanho do arquivo após VACUUM, tabela + índices);
+- taxa de inserção em lotes de TAMANHO_LOTE com um commit por lote, como o
+  DatabaseManager faz (sem as tabelas de resumo, que não mudaram);
+- tempo para carregar tudo em um DataFrame tipado (carregar_dados).
+
+O layout em texto é montado aqui com o DDL e os índices da v1; o codificado
+usa o DDL e a conversão do db_manager.
+
+Uso:
+    python benchmarks/bench_armazenamento.py --linhas 100000 1000000
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import analise_dados as ad  # noqa: E402
+import db_manager as dbm  # noqa: E402
+
+SQL_TEXTO = '''
+    CREATE TABLE leituras (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        codMaquina TEXT NOT NULL,
+        ordemProducao TEXT NOT NULL,
+        dataHora TEXT NOT NULL,
+        distancia REAL NOT NULL,
+        folhas INTEGER NOT NULL
+    )
+'''
+INDICES_TEXTO = dbm.MIGRACOES[0]
+TIPOS_TEXTO = {'id': 'int64', 'distancia': 'float64', 'folhas': 'int32'}
+
+
+def gerar_leituras(linhas):
+    inicio = datetime(2025, 9, 10)
+    return [((f"maq{i % 8:03d}", f"OP{i // 20000:05d}",
+              (inicio + timedelta(seconds=i // 8)).strftime('%Y-%m-%d %H:%M:%S'), float(i % 250), i // 320))
+            for i in range(linhas)]
+
+
+def gravar_em_lotes(conexao, sql, lotes):
+    inicio = time.perf_counter()
+    for lote in lotes:
+        conexao.executemany(sql, lote())
+        conexao.commit()
+    return time.perf_counter() - inicio
+
+
+def bytes_por_leitura(caminho, conexao, linhas):
+    conexao.execute('VACUUM')
+    return os.path.getsize(caminho) / linhas
+
+
+def layout_texto(caminho, leituras, tamanho_lote):
+    conexao = sqlite3.connect(caminho)
+    conexao.execute(SQL_TEXTO)
+    for comando in INDICES_TEXTO:
+        conexao.execute(comando)
+    sql = 'INSERT INTO leituras (codMaquina, ordemProducao, dataHora, distancia, folhas) VALUES (?, ?, ?, ?, ?)'
+    lotes = [lambda i=i: leituras[i:i + tamanho_lote] for i in range(0, len(leituras), tamanho_lote)]
+    tempo = gravar_em_lotes(conexao, sql, lotes)
+    tamanho = bytes_por_leitura(caminho, conexao, len(leituras))
+
+    # Carga como era até a v4: texto -> categóricas e pd.to_datetime(ISO8601)
+    inicio = time.perf_counter()
+    blocos = []
+    cursor = conexao.execute('SELECT * FROM leituras')
+    while linhas := cursor.fetchmany(50000):
+        bloco = pd.DataFrame.from_records(linhas, columns=ad.COLUNAS_LEITURAS).astype(TIPOS_TEXTO)
+        for coluna in ad.COLUNAS_CATEGORICAS:
+            bloco[coluna] = bloco[coluna].astype('category')
+        bloco['dataHora'] = pd.to_datetime(bloco['dataHora'], format='ISO8601', errors='coerce')
+        blocos.append(bloco.dropna(subset=['dataHora']))
+    df = ad._concatenar_blocos(blocos)
+    carga = time.perf_counter() - inicio
+    conexao.close()
+    return tempo, tamanho, carga, df
+
+
+def layout_codificado(caminho, leituras, tamanho_lote):
+    with dbm.DatabaseManager(caminho) as db:
+        # Só a tabela de leituras: os resumos são iguais nos dois layouts
+        for comando in ('DROP TABLE resumo_ordem', 'DROP TABLE resumo_dia', 'DROP TABLE leituras_compactadas'):
+            db.cursor.execute(comando)
+        db.conexao.commit()
+
+        def codificar(i):
+            # Mesma conversão do flush (ids em cache e instante inteiro)
+            return db._DatabaseManager__codificar_lote(leituras[i:i + tamanho_lote])[0]
+
+        lotes = [lambda i=i: codificar(i) for i in range(0, len(leituras), tamanho_lote)]
+        tempo = gravar_em_lotes(db.conexao, dbm.SQL_INSERIR_LEITURA, lotes)
+        tamanho = bytes_por_leitura(caminho, db.conexao, len(leituras))
+
+        inicio = time.perf_counter()
+        df = ad.carregar_dados(db)
+        carga = time.perf_counter() - inicio
+    return tempo, tamanho, carga, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--tamanho-lote', type=int, default=dbm.TAMANHO_LOTE)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"{'linhas':>9}  {'layout':<12}{'bytes/leitura':>14}{'inserções/s':>13}{'carga (s)':>11}")
+    for linhas in args.linhas:
+        leituras = gerar_leituras(linhas)
+        resultados = {}
+        with tempfile.TemporaryDirectory() as pasta:
+            sys.stdout = open(os.devnull, 'w')  # silencia os prints por lote do DatabaseManager
+            try:
+                resultados['texto'] = layout_texto(os.path.join(pasta, 'texto.db'), leituras, args.tamanho_lote)
+                resultados['codificado'] = layout_codificado(os.path.join(pasta, 'codificado.db'), leituras,
+                                                             args.tamanho_lote)
+            finally:
+                sys.stdout.close()
+                sys.stdout = sys.__stdout__
+
+        for layout, (tempo, tamanho, carga, _) in resultados.items():
+            print(f"{linhas:>9}  {layout:<12}{tamanho:>14.1f}{linhas / tempo:>13,.0f}{carga:>11.3f}")
+        identicos = resultados['texto'][3].equals(resultados['codificado'][3])
+        print(f"{'':>11}DataFrames idênticos: {'sim' if identicos else 'NÃO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark da exportação de leituras: carga em memória x streaming do cursor.
+
+Cria um banco temporário com N leituras sintéticas e compara a exportação
+anterior (carregar_dados + to_csv/to_json) com exportar_leituras_streaming em
+CSV, NDJSON e NDJSON+gzip. Mede o tempo e as linhas/s em uma execução e,
+em outra (o tracemalloc deixa o código mais lento), o pico de memória
+alocada pelo Python.
+
+Uso:
+    python benchmarks/bench_exportacao.py --linhas 100000 500000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import analise_dados as ad  # noqa: E402
+from db_manager import DatabaseManager  # noqa: E402
+
+
+def popular(db, linhas):
+    inicio = datetime(2025, 9, 10)
+    lote = []
+    for i in range(linhas):
+        dataHora = (inicio + timedelta(seconds=i)).strftime('%Y-%m-%d %H:%M:%S')
+        lote.append((f"maq{i % 4:03d}", f"OP{i // 10000:05d}", dataHora, float(i % 250), i // 40))
+        if len(lote) == 50000:
+            db.inserir_leituras(lote)
+            lote = []
+    db.inserir_leituras(lote)
+    db.flush()
+
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    tempo = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tempo, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[100000, 500000])
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"{'linhas':>9}  {'exportação':<28}{'tempo (s)':>10}{'linhas/s':>12}{'pico (MB)':>11}{'arquivo (MB)':>14}")
+    for linhas in args.linhas:
+        with tempfile.TemporaryDirectory() as pasta:
+            ad.PASTA_SAIDA = pasta
+            db = DatabaseManager(os.path.join(pasta, 'bench.db'), otimizado=True)
+            popular(db, linhas)
+
+            def em_memoria():
+                df = ad.carregar_dados(db)
+                ad.exportar_para_csv(df, 'memoria.csv')
+                ad.exportar_para_json(df, 'memoria.json')
+
+            casos = [
+                ('memória (CSV + JSON)', em_memoria, ['memoria.csv', 'memoria.json']),
+                ('streaming CSV', lambda: ad.exportar_leituras_streaming(db, 'leituras.csv'), ['leituras.csv']),
+                ('streaming NDJSON', lambda: ad.exportar_leituras_streaming(db, 'leituras.ndjson', 'ndjson'),
+                 ['leituras.ndjson']),
+                ('streaming NDJSON gzip',
+                 lambda: ad.exportar_leituras_streaming(db, 'leituras.ndjson', 'ndjson', comprimir=True),
+                 ['leituras.ndjson.gz']),
+            ]
+            for nome, funcao, arquivos in casos:
+                tempo, pico = medir(funcao)
+                tamanho = sum(os.path.getsize(os.path.join(pasta, a)) for a in arquivos)
+                print(f"{linhas:>9}  {nome:<28}{tempo:>10.2f}{linhas / tempo:>12,.0f}"
+                      f"{pico / 2 ** 20:>11.1f}{tamanho / 2 ** 20:>14.1f}")
+            db.fechar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark das consultas da tabela `leituras` antes e depois dos índices.
+
+Gera um banco sintético com N leituras e mede as consultas em três etapas,
+para separar o efeito dos índices do efeito do formato compacto:
+- antes: consultas originais, sem índices e com datetime(dataHora) no filtro
+  de período;
+- índices (v1): o mesmo esquema em texto, com os índices da migração v1 e o
+  filtro de período sargável (dataHora BETWEEN ? AND ?);
+- formato v5: as consultas do DatabaseManager depois das demais migrações
+  (ids inteiros de máquina/ordem e instante em segundos).
+
+Uso:
+    python benchmarks/bench_indices.py --linhas 1000000 10000000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from db_manager import MIGRACOES, DatabaseManager  # noqa: E402
+
+NUM_MAQUINAS = 20
+LEITURAS_POR_ORDEM = 20000
+INICIO = datetime(2025, 1, 1)
+REPETICOES = 5
+
+
+def gerar_leituras(n):
+    for i in range(n):
+        maquina = i % NUM_MAQUINAS
+        yield (
+            f"maq{maquina:03d}",
+            f"OP{i // LEITURAS_POR_ORDEM:05d}",
+            (INICIO + timedelta(seconds=i // NUM_MAQUINAS)).strftime("%Y-%m-%d %H:%M:%S"),
+            float(i % 300),
+            i // 1000,
+        )
+
+
+def popular_banco(caminho, n):
+    conexao = sqlite3.connect(caminho)
+    conexao.execute('''
+        CREATE TABLE leituras (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            codMaquina TEXT NOT NULL,
+            ordemProducao TEXT NOT NULL,
+            dataHora TEXT NOT NULL,
+            distancia REAL NOT NULL,
+            folhas INTEGER NOT NULL
+        )
+    ''')
+    conexao.executemany(
+        'INSERT INTO leituras (codMaquina, ordemProducao, dataHora, distancia, folhas) VALUES (?, ?, ?, ?, ?)',
+        gerar_leituras(n)
+    )
+    conexao.commit()
+    conexao.close()
+
+
+def cronometrar(funcao):
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1000
+
+
+def executar(n):
+    meio = INICIO + timedelta(seconds=n // NUM_MAQUINAS // 2)
+    janela = (meio.strftime("%Y-%m-%d %H:%M:%S"), (meio + timedelta(minutes=10)).strftime("%Y-%m-%d %H:%M:%S"))
+    ordem = f"OP{(n // LEITURAS_POR_ORDEM) // 2:05d}"
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'bench.db')
+        inicio = time.perf_counter()
+        popular_banco(caminho, n)
+        print(f"\n{n:,} leituras geradas em {time.perf_counter() - inicio:.1f}s")
+
+        # Antes: consultas originais, sem índices secundários
+        conexao = sqlite3.connect(caminho)
+        antes = {
+            'buscar_por_maquina': cronometrar(lambda: conexao.execute(
+                'SELECT * FROM leituras WHERE codMaquina = ?', ('maq007',)).fetchall()),
+            'buscar_por_ordem': cronometrar(lambda: conexao.execute(
+                'SELECT * FROM leituras WHERE ordemProducao = ?', (ordem,)).fetchall()),
+            'buscar_por_data_range': cronometrar(lambda: conexao.execute(
+                'SELECT * FROM leituras WHERE datetime(dataHora) BETWEEN datetime(?) AND datetime(?)',
+                janela).fetchall()),
+        }
+        conexao.close()
+
+        # Criação dos índices: só o passo v1 da migração, aplicado aqui para
+        # ser medido sem as versões seguintes (resumos e cópia para o formato v5)
+        conexao = sqlite3.connect(caminho)
+        inicio = time.perf_counter()
+        for comando in MIGRACOES[0]:
+            conexao.execute(comando)
+        conexao.execute('PRAGMA user_version = 1')
+        conexao.commit()
+        print(f"Migração v1 (criação dos índices): {time.perf_counter() - inicio:.1f}s")
+        indices = {
+            'buscar_por_maquina': cronometrar(lambda: conexao.execute(
+                'SELECT * FROM leituras WHERE codMaquina = ?', ('maq007',)).fetchall()),
+            'buscar_por_ordem': cronometrar(lambda: conexao.execute(
+                'SELECT * FROM leituras WHERE ordemProducao = ?', (ordem,)).fetchall()),
+            'buscar_por_data_range': cronometrar(lambda: conexao.execute(
+                'SELECT * FROM leituras WHERE dataHora BETWEEN ? AND ?', janela).fetchall()),
+        }
+        conexao.close()
+
+        # Depois: DatabaseManager aplica as demais migrações e usa a consulta sargável
+        inicio = time.perf_counter()
+        db = DatabaseManager(caminho)
+        print(f"Migrações v2 em diante (resumos e formato v5): {time.perf_counter() - inicio:.1f}s")
+        depois = {
+            'buscar_por_maquina': cronometrar(lambda: db.buscar_por_maquina('maq007')),
+            'buscar_por_ordem': cronometrar(lambda: db.buscar_por_ordem(ordem)),
+            'buscar_por_data_range': cronometrar(lambda: db.buscar_por_data_range(*janela)),
+        }
+        db.fechar()
+
+    print(f"{'consulta':<24}{'antes (ms)':>12}{'índices (ms)':>14}{'v5 (ms)':>10}"
+          f"{'ganho índices':>15}{'ganho v5':>10}{'total':>8}")
+    for consulta in antes:
+        print(f"{consulta:<24}{antes[consulta]:>12.1f}{indices[consulta]:>14.1f}{depois[consulta]:>10.1f}"
+              f"{antes[consulta] / indices[consulta]:>14.1f}x{indices[consulta] / depois[consulta]:>9.1f}x"
+              f"{antes[consulta] / depois[consulta]:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+    for n in args.linhas:
+        executar(n)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark do tempo de inicialização dos pontos de entrada em Python.
+
+Cada caso roda em um interpretador novo (`python -X importtime -c ...`, a
+partir de src/), como acontece ao abrir o menu, ao chamar o otimizador em lote
+ou ao iniciar um job da fila (processo "spawn"). Para cada caso, mede:
+- o tempo de parede do processo (mediana de N execuções, após um aquecimento);
+- o tempo acumulado das importações informado pelo -X importtime e as
+  importações de primeiro nível mais pesadas (sem as da inicialização do
+  próprio interpretador, como site);
+- quais dependências pesadas (pandas, plotly, dash, pulp, pyarrow) foram
+  carregadas, e se alguma que o caso não deveria carregar apareceu (o pandas
+  carrega o pyarrow sozinho quando ele está instalado).
+
+As metas valem para o tempo de parede: o menu do main.py (CLI) e a API do
+otimizador (executar_otimizacao_producao) têm meta; o dashboard completo é
+medido só como referência.
+
+Uso:
+    python benchmarks/bench_inicializacao.py --execucoes 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PASTA_SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+PESADOS = ('pandas', 'plotly', 'dash', 'dash_bootstrap_components', 'pulp', 'pyarrow')
+
+# (caso, código, meta de parede em segundos ou None, dependências que não podem ser carregadas)
+CASOS = [
+    ('interpretador', 'pass', None, ()),
+    ('CLI: menu (main)', 'import main', 0.10, PESADOS),
+    ('CLI: relatório em texto', 'import main, analise_dados', 0.50, ('plotly', 'dash', 'pulp')),
+    ('API do otimizador', 'from ml_model import executar_otimizacao_producao', 0.50,
+     ('plotly', 'dash', 'dash_bootstrap_components', 'pulp')),
+    ('dashboard (criar_app)', 'import ml_model; ml_model.criar_app()', None, ()),
+]
+
+
+def executar(codigo):
+    """Roda `codigo` num interpretador novo; devolve (parede, stderr do importtime, módulos pesados)."""
+    verificacao = f"import sys, json; print(json.dumps([m for m in {PESADOS!r} if m in sys.modules]))"
+    inicio = time.perf_counter()
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"{codigo}\n{verificacao}"],
+                              cwd=PASTA_SRC, capture_output=True, text=True, check=True)
+    parede = time.perf_counter() - inicio
+    carregados = json.loads(processo.stdout.strip().splitlines()[-1])
+    return parede, processo.stderr, carregados
+
+
+def importacoes_primeiro_nivel(saida_importtime, ignorar=()):
+    """(módulo, acumulado em segundos) das importações de primeiro nível, exceto as de `ignorar`."""
+    modulos = []
+    for linha in saida_importtime.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        _, acumulado, nome = linha[len('import time:'):].split('|')
+        if not nome[1:].startswith(' ') and nome.strip() not in ignorar:    # sem recuo: primeiro nível
+            modulos.append((nome.strip(), int(acumulado) / 1e6))
+    return modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--execucoes', type=int, default=5, help="execuções por caso (mediana)")
+    args = parser.parse_args()
+
+    print(f"{'caso':<26}{'parede (s)':>11}{'imports (s)':>12}{'meta (s)':>10}  {'situação':<9}carregados")
+    # Importações que o interpretador faz sozinho ficam fora das colunas de importação
+    interpretador = {nome for nome, _ in importacoes_primeiro_nivel(executar('pass')[1])}
+    acima = 0
+    for caso, codigo, meta, proibidos in CASOS:
+        executar(codigo)    # aquecimento: cache de disco e bytecode
+        paredes, imports = [], []
+        for _ in range(args.execucoes):
+            parede, saida, carregados = executar(codigo)
+            paredes.append(parede)
+            imports.append(sum(tempo for _, tempo in importacoes_primeiro_nivel(saida, interpretador)))
+        parede, tempo_imports = statistics.median(paredes), statistics.median(imports)
+
+        indevidos = [m for m in carregados if m in proibidos]
+        if meta is None:
+            situacao = '-'
+        elif parede <= meta and not indevidos:
+            situacao = 'ok'
+        else:
+            situacao = 'ACIMA' if parede > meta else 'INDEVIDO'
+            acima += 1
+        print(f"{caso:<26}{parede:>11.3f}{tempo_imports:>12.3f}{meta if meta else '-':>10}  {situacao:<9}"
+              f"{', '.join(carregados) or '-'}")
+
+        mais_pesados = sorted(importacoes_primeiro_nivel(saida, interpretador), key=lambda m: m[1], reverse=True)[:3]
+        if mais_pesados:
+            print(f"{'':<4}mais pesados: " + ', '.join(f"{nome} {tempo:.3f}s" for nome, tempo in mais_pesados))
+
+    if acima:
+        print(f"\n{acima} caso(s) fora da meta.")
+    return 1 if acima else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Benchmark do custo da instrumentação (metricas.py) e do log por leitura.
+
+Mede:
+- o custo por chamada de Contador.incrementar, Histograma.observar e
+  Medidor.definir;
+- a vazão de processar_linha (interpretação, detecção de folhas e gravação
+  em lote num banco em memória) com o log no nível padrão (INFO: a linha por
+  leitura não é formatada) e em DEBUG (uma linha formatada e emitida por
+  leitura, como era o logging.info de antes), com o handler escrevendo em
+  /dev/null para não medir o terminal.
+
+Uso:
+    python benchmarks/bench_metricas.py --linhas 200000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import metricas  # noqa: E402
+import monitorar_sensor as ms  # noqa: E402
+from db_manager import DatabaseManager  # noqa: E402
+
+
+def custo_por_chamada(instrucao, repeticoes):
+    return min(timeit.repeat(instrucao, number=repeticoes, repeat=5)) / repeticoes
+
+
+def gerar_linhas(quantidade):
+    inicio = datetime(2025, 9, 10)
+    # Sobe e desce como a mesa de enfesto: uma folha a cada 40 leituras
+    return [f"{(inicio + timedelta(seconds=i // 4)).strftime('%Y-%m-%d %H:%M:%S')},{320.0 if i % 40 < 20 else 5.0}"
+            for i in range(quantidade)]
+
+
+def vazao_processar_linha(linhas, nivel):
+    logging.getLogger().setLevel(nivel)
+    sys.stdout = open(os.devnull, 'w')  # silencia os prints do DatabaseManager
+    try:
+        with DatabaseManager(':memory:') as db:
+            estado = ms.novo_estado()
+            inicio = time.perf_counter()
+            for linha in linhas:
+                ms.processar_linha(linha, estado, db)
+            db.flush()
+            tempo = time.perf_counter() - inicio
+    finally:
+        sys.stdout.close()
+        sys.stdout = sys.__stdout__
+    return len(linhas) / tempo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=200000)
+    parser.add_argument('--repeticoes', type=int, default=200000, help="chamadas por medição de custo")
+    args = parser.parse_args()
+
+    registro = metricas.RegistroMetricas()
+    contador = registro.contador('bench_total', "contador de teste")
+    histograma = registro.histograma('bench_segundos', "histograma de teste")
+    medidor = registro.medidor('bench_fila', "medidor de teste")
+    print(f"{'operação':<28}{'ns/chamada':>12}")
+    for nome, funcao in (('Contador.incrementar', lambda: contador.incrementar(10)),
+                         ('Histograma.observar', lambda: histograma.observar(0.003)),
+                         ('Medidor.definir', lambda: medidor.definir(42))):
+        print(f"{nome:<28}{custo_por_chamada(funcao, args.repeticoes) * 1e9:>12.0f}")
+
+    # Handler único em /dev/null: mede formatação e emissão, não o terminal
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    nulo = logging.StreamHandler(open(os.devnull, 'w'))
+    nulo.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+    raiz.addHandler(nulo)
+
+    linhas = gerar_linhas(args.linhas)
+    print(f"\n{'processar_linha':<28}{'linhas/s':>12}")
+    for rotulo, nivel in (('log em INFO (padrão)', logging.INFO), ('log por leitura (DEBUG)', logging.DEBUG)):
+        print(f"{rotulo:<28}{vazao_processar_linha(linhas, nivel):>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark da construção e da resolução do modelo de PPCP (ml_model).
+
+Gera cenários sintéticos com horizonte e número de recursos crescentes e
+mede, separadamente, o tempo de montar o modelo (construir_modelo) e o tempo
+do CBC, junto com o tamanho do modelo.
+
+Uso:
+    python benchmarks/bench_modelo_otimizacao.py --semanas 4 13 26 52 --recursos 6 24 48
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+from pulp import PULP_CBC_CMD, LpStatus
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import ml_model  # noqa: E402
+
+TECIDOS = ['Tecido Plano', 'Malharia']
+
+
+def gerar_cenario(num_semanas, num_recursos):
+    """Cenário viável: metade dos recursos de cada setor por tecido, mais alguns mistos."""
+    def recursos(prefixo, cp_min):
+        capacidade = {}
+        for i in range(num_recursos):
+            tipos = [TECIDOS[i % 2]] if i % 5 else TECIDOS
+            capacidade[f"{prefixo} {i:03d}"] = {
+                'tipo_tecido': tipos, 'cp_min': cp_min, 'cp_max': int(cp_min * 1.2),
+                'fator_custo_normal': 100, 'fator_custo_extra': 200,
+            }
+        return capacidade
+
+    corte = recursos('Corte', 5000)
+    costura = recursos('Oficina', 3000)
+    semanas = list(range(1, num_semanas + 1))
+    entrega = {t: [1 / num_semanas] * num_semanas for t in TECIDOS}
+    # ~70% da capacidade normal de costura ao longo do horizonte
+    demanda = {t: int(0.7 * 3000 * num_recursos / 2 * num_semanas) for t in TECIDOS}
+    return demanda, corte, costura, semanas, entrega
+
+
+def executar(num_semanas, num_recursos, limite_tempo):
+    demanda, corte, costura, semanas, entrega = gerar_cenario(num_semanas, num_recursos)
+
+    inicio = time.perf_counter()
+    model, corte_vars, costura_vars = ml_model.construir_modelo(demanda, corte, costura, semanas, entrega)
+    t_construcao = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    model.solve(PULP_CBC_CMD(msg=False, timeLimit=limite_tempo))
+    t_solucao = time.perf_counter() - inicio
+
+    return {
+        'semanas': num_semanas,
+        'recursos': num_recursos,
+        'variaveis': len(model.variables()),
+        'restricoes': len(model.constraints),
+        'construcao_s': t_construcao,
+        'solucao_s': t_solucao,
+        'status': LpStatus[model.status],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--semanas', type=int, nargs='+', default=[4, 13, 26, 52])
+    parser.add_argument('--recursos', type=int, nargs='+', default=[6, 24, 48])
+    parser.add_argument('--limite-tempo', type=float, default=120, help="limite do CBC por cenário (s)")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"{'semanas':>8}{'recursos':>9}{'variáveis':>11}{'restrições':>12}{'construção (s)':>16}{'solução (s)':>13}  status")
+    for num_recursos in args.recursos:
+        for num_semanas in args.semanas:
+            r = executar(num_semanas, num_recursos, args.limite_tempo)
+            print(f"{r['semanas']:>8}{r['recursos']:>9}{r['variaveis']:>11}{r['restricoes']:>12}"
+                  f"{r['construcao_s']:>16.3f}{r['solucao_s']:>13.3f}  {r['status']}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark do monitor de produção ao vivo.
+
+Alimenta um MonitorProducao com históricos cada vez mais longos (várias
+máquinas, 10 leituras/s) e mede o custo de registrar uma leitura, o custo de
+uma atualização da página (instantaneo + serie_minutos) e a memória retida.
+Os dois últimos devem ficar constantes com o histórico: dependem só do
+número de máquinas.
+
+Uso:
+    python benchmarks/bench_monitor.py --maquinas 8 --horas 1 4 12
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from monitor_producao import MonitorProducao  # noqa: E402
+
+LEITURAS_POR_SEGUNDO = 10
+INICIO = 1_760_000_000
+
+
+def alimentar(monitor, maquinas, horas):
+    for passo in range(int(horas * 3600 * LEITURAS_POR_SEGUNDO)):
+        agora = INICIO + passo / LEITURAS_POR_SEGUNDO
+        for maquina in range(maquinas):
+            monitor.registrar(f"maq{maquina:03d}", f"OP{maquina:05d}", float(passo % 350), passo // 40, agora=agora)
+    return INICIO + horas * 3600
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--maquinas', type=int, default=8)
+    parser.add_argument('--horas', type=float, nargs='+', default=[1, 4, 12])
+    args = parser.parse_args()
+
+    print(f"{'horas':>6}{'leituras':>12}{'registrar (µs)':>16}{'atualização (ms)':>18}{'memória (KB)':>14}")
+    for horas in args.horas:
+        monitor = MonitorProducao()
+        inicio = time.perf_counter()
+        agora = alimentar(monitor, args.maquinas, horas)
+        leituras = int(horas * 3600 * LEITURAS_POR_SEGUNDO) * args.maquinas
+        registrar = (time.perf_counter() - inicio) / leituras * 1e6
+
+        inicio = time.perf_counter()
+        for _ in range(100):
+            monitor.instantaneo(agora)
+            monitor.serie_minutos(agora)
+        atualizacao = (time.perf_counter() - inicio) / 100 * 1e3
+
+        tracemalloc.start()
+        monitor = MonitorProducao()
+        alimentar(monitor, args.maquinas, min(horas, 2))   # o buffer enche em 1 h
+        memoria = tracemalloc.get_traced_memory()[0] / 1024
+        tracemalloc.stop()
+        print(f"{horas:>6g}{leituras:>12,}{registrar:>16.2f}{atualizacao:>18.3f}{memoria:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
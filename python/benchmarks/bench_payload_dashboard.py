@@ -0,0 +1,89 @@
+"""
+Benchmark do payload e do tempo de renderização dos resultados no dashboard.
+
+Para um plano grande (padrão: 52 semanas, 50 recursos por setor), compara o
+envio anterior (tabela inteira em to_dict('records') e gráfico sobre o plano
+detalhado) com o atual (uma página da tabela, servida pelo backend, e gráfico
+sobre a série agregada). Mede o JSON que iria ao navegador e o tempo para
+montá-lo no servidor.
+
+Uso:
+    python benchmarks/bench_payload_dashboard.py --semanas 52 --recursos 50
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import plotly.express as px
+import plotly.io as pio
+from plotly.utils import PlotlyJSONEncoder
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+import ml_model  # noqa: E402
+from bench_modelo_otimizacao import gerar_cenario  # noqa: E402
+from resultado_plano import ResultadoPlano  # noqa: E402
+
+
+def figura(df):
+    fig = px.bar(df, x="Semana", y="Quantidade (Peças)", color="Recurso", facet_row="Setor",
+                 title="Plano de Produção Otimizado por Semana e Recurso",
+                 category_orders={"Setor": ["Corte", "Costura"]})
+    fig.update_layout(height=600)
+    return fig
+
+
+def medir(montar, repeticoes):
+    """Tempo médio (s) para montar e serializar; tamanho (bytes) do JSON."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        figura_json, tabela_json = montar()
+    return (time.perf_counter() - inicio) / repeticoes, len(figura_json.encode()), len(tabela_json.encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--semanas', type=int, default=52)
+    parser.add_argument('--recursos', type=int, default=50)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    demanda, corte, costura, semanas, entrega = gerar_cenario(args.semanas, args.recursos)
+    status, _, df_resultados, _ = ml_model.otimizar_producao(demanda, corte, costura, ml_model.MODO_RELAXADO,
+                                                              semanas=semanas, entrega_tecidos_perc=entrega)
+    if status != 'Optimal':
+        sys.exit(f"Cenário sem solução ótima: {status}")
+    resultado = ResultadoPlano(df_resultados, corte, costura)
+
+    def anterior():
+        return (pio.to_json(figura(resultado.detalhe)),
+                json.dumps(resultado.registros(), cls=PlotlyJSONEncoder))
+
+    def atual():
+        registros, _ = resultado.pagina(0, ml_model.TAMANHO_PAGINA)
+        return (pio.to_json(figura(resultado.serie_grafico)),
+                json.dumps(registros, cls=PlotlyJSONEncoder))
+
+    print(f"{args.semanas} semanas | {args.recursos} recursos por setor | {len(resultado.detalhe)} linhas no plano "
+          f"| {len(resultado.tabela)} linhas na tabela | {len(resultado.serie_grafico)} pontos no gráfico")
+    print(f"{'envio':<10}{'gráfico (KB)':>14}{'tabela (KB)':>13}{'total (KB)':>12}{'montagem (ms)':>15}")
+    for nome, montar in (('anterior', anterior), ('atual', atual)):
+        tempo, bytes_figura, bytes_tabela = medir(montar, args.repeticoes)
+        print(f"{nome:<10}{bytes_figura / 1024:>14.1f}{bytes_tabela / 1024:>13.1f}"
+              f"{(bytes_figura + bytes_tabela) / 1024:>12.1f}{tempo * 1000:>15.1f}")
+
+    # Custo de uma troca de página/ordenação/filtro no backend
+    inicio = time.perf_counter()
+    for pagina in range(20):
+        resultado.pagina(pagina, ml_model.TAMANHO_PAGINA, [{'column_id': 'Quantidade (Peças)', 'direction': 'desc'}],
+                         '{Setor} contains "Costura" && {Semana} >= 10')
+    print(f"\nPágina ordenada e filtrada no backend: {(time.perf_counter() - inicio) / 20 * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
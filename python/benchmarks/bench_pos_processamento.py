@@ -0,0 +1,98 @@
+"""
+Benchmark do pós-processamento do plano (extração da solução e fatores de custo).
+
+Compara, sobre o mesmo modelo resolvido, a forma anterior (var.value() por
+variável e df.apply linha a linha com consulta aos dicionários de capacidade)
+com a extração colunar e o join contra a tabela de custos (resultado_plano), e
+confere que as duas tabelas finais são iguais.
+
+Uso:
+    python benchmarks/bench_pos_processamento.py --semanas 52 --recursos 50
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+from pulp import PULP_CBC_CMD
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+import ml_model  # noqa: E402
+from bench_modelo_otimizacao import gerar_cenario  # noqa: E402
+from resultado_plano import ResultadoPlano  # noqa: E402
+
+
+def extrair_por_variavel(model, corte_vars, costura_vars):
+    resultados = []
+    for (s, maq, tecido, turno), var in corte_vars.items():
+        if var.value() > 0:
+            resultados.append(['Corte', s, maq, tecido, turno, var.value()])
+    for (s, of, tecido, turno), var in costura_vars.items():
+        if var.value() > 0:
+            resultados.append(['Costura', s, of, tecido, turno, var.value()])
+    df = pd.DataFrame(resultados, columns=['Setor', 'Semana', 'Recurso', 'Tecido', 'Turno', 'Quantidade (Peças)'])
+    return model.objective.value(), df
+
+
+def tabela_por_linha(df_resultados, corte, costura):
+    def get_cost_factor(row):
+        recurso_data = (corte if row['Setor'] == 'Corte' else costura).get(row['Recurso'])
+        return recurso_data['fator_custo_normal'] if row['Turno'] == 'normal' else recurso_data['fator_custo_extra']
+
+    df_resultados['fator_custo'] = df_resultados.apply(get_cost_factor, axis=1)
+    df_resultados['custo_pontos'] = df_resultados['Quantidade (Peças)'] * df_resultados['fator_custo']
+    agg_df = df_resultados.groupby(['Setor', 'Semana', 'Recurso', 'Tecido']).agg(
+        quantidade_total=('Quantidade (Peças)', 'sum'),
+        custo_total_pontos=('custo_pontos', 'sum')
+    ).reset_index()
+    agg_df['Fator Hora Médio (%)'] = (agg_df['custo_total_pontos'] / agg_df['quantidade_total']).round(2)
+    agg_df = agg_df.rename(columns={'quantidade_total': 'Quantidade (Peças)'})
+    return agg_df[['Setor', 'Semana', 'Recurso', 'Tecido', 'Quantidade (Peças)', 'Fator Hora Médio (%)']]
+
+
+def cronometrar(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return (time.perf_counter() - inicio) / repeticoes, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--semanas', type=int, default=52)
+    parser.add_argument('--recursos', type=int, default=50)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    demanda, corte, costura, semanas, entrega = gerar_cenario(args.semanas, args.recursos)
+    model, corte_vars, costura_vars = ml_model.construir_modelo(demanda, corte, costura, semanas, entrega)
+    model.solve(PULP_CBC_CMD(msg=False))
+
+    t_extracao_antiga, (_, df_antigo) = cronometrar(lambda: extrair_por_variavel(model, corte_vars, costura_vars),
+                                                    args.repeticoes)
+    t_extracao_nova, (_, _, df_novo) = cronometrar(
+        lambda: ml_model.extrair_resultados(model, corte_vars, costura_vars), args.repeticoes)
+    t_custo_antigo, tabela_antiga = cronometrar(lambda: tabela_por_linha(df_antigo.copy(), corte, costura),
+                                                args.repeticoes)
+    t_custo_novo, resultado = cronometrar(lambda: ResultadoPlano(df_novo, corte, costura), args.repeticoes)
+
+    pd.testing.assert_frame_equal(df_antigo, df_novo, check_dtype=False)
+    pd.testing.assert_frame_equal(tabela_antiga.reset_index(drop=True), resultado.tabela.reset_index(drop=True),
+                                  check_dtype=False)
+
+    print(f"{args.semanas} semanas | {args.recursos} recursos por setor | "
+          f"{len(corte_vars) + len(costura_vars)} variáveis | {len(df_novo)} linhas no plano")
+    print(f"{'etapa':<22}{'anterior (ms)':>15}{'colunar (ms)':>14}{'ganho':>8}")
+    for etapa, antigo, novo in (('extração da solução', t_extracao_antiga, t_extracao_nova),
+                                ('fatores de custo', t_custo_antigo, t_custo_novo)):
+        print(f"{etapa:<22}{antigo * 1000:>15.1f}{novo * 1000:>14.1f}{antigo / novo:>7.1f}x")
+    print("Planos e tabelas idênticos.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark da recontagem de folhas: laço escalar (detectar_folha) contra a
+versão vetorizada (recontagem_folhas.contar_folhas), inteira e em blocos.
+
+A série sintética imita o enfesto: subidas acima do limite superior, descidas
+abaixo do inferior e ruído entre os dois. Os três resultados são comparados
+amostra a amostra.
+
+Uso:
+    python benchmarks/bench_recontagem.py --amostras 10000000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import monitorar_sensor as ms  # noqa: E402
+import recontagem_folhas as rf  # noqa: E402
+
+
+def gerar_distancias(n, semente=42):
+    rng = np.random.default_rng(semente)
+    # Ciclos de 20 a 60 amostras: metade no alto (~350 cm), metade no baixo (~5 cm)
+    fase = np.cumsum(rng.integers(20, 60, size=n // 20 + 1))
+    alto = (np.searchsorted(fase, np.arange(n), side='right') % 2) == 0
+    distancias = np.where(alto, 350.0, 5.0) + rng.normal(0, 3, size=n)
+    # Ruído de leitura entre os limites
+    ruido = rng.random(n) < 0.05
+    distancias[ruido] = rng.uniform(20, 280, size=ruido.sum())
+    return distancias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--amostras', type=int, default=10_000_000)
+    parser.add_argument('--bloco', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    # detectar_folha registra cada folha; o log não entra na medição
+    logging.getLogger().setLevel(logging.WARNING)
+
+    distancias = gerar_distancias(args.amostras)
+    print(f"{args.amostras:,} amostras geradas")
+
+    inicio = time.perf_counter()
+    estado = ms.novo_estado()
+    valores = distancias.tolist()
+    escalar = np.fromiter((ms.detectar_folha(d, estado) for d in valores), dtype=np.int64, count=len(valores))
+    t_escalar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    vetorizado = rf.contar_folhas(distancias)
+    t_vetorizado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    blocos = (distancias[i:i + args.bloco] for i in range(0, len(distancias), args.bloco))
+    em_blocos = np.concatenate(list(rf.contar_folhas_em_blocos(blocos)))
+    t_blocos = time.perf_counter() - inicio
+
+    identicos = np.array_equal(escalar, vetorizado) and np.array_equal(escalar, em_blocos)
+    print(f"Folhas contadas: {escalar[-1]:,} | resultados idênticos: {identicos}")
+    print(f"{'método':<22}{'tempo (s)':>12}{'amostras/s':>16}{'ganho':>10}")
+    for nome, t in [('escalar', t_escalar), ('vetorizado', t_vetorizado), ('vetorizado em blocos', t_blocos)]:
+        print(f"{nome:<22}{t:>12.3f}{args.amostras / t:>16,.0f}{t_escalar / t:>9.1f}x")
+    return 0 if identicos else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Suíte de benchmarks reprodutível dos caminhos quentes do projeto.
+
+Gera um histórico sintético de leituras (gerador_leituras.py) e mede, com os
+mesmos parâmetros e semente:
+- gravação: inserir_leitura uma a uma (lote padrão e commit por leitura) e
+  inserir_leituras em lote (que monta o banco usado no resto da suíte);
+- consultas: cada buscar_* do DatabaseManager;
+- análise: carregar_dados (completo e filtrado) e cada relatório do
+  analise_dados, lendo do banco (resumos) e do DataFrame (pandas);
+- exportação: CSV/NDJSON em streaming e exportar_para_csv/json do DataFrame;
+- otimização: executar_otimizacao_producao com o cenário padrão escalado para
+  horizontes de N semanas.
+
+Cada medição é a mediana de `--repeticoes` execuções. Os resultados vão para
+um JSON (commit, data, máquina, parâmetros e uma entrada por benchmark), e
+`--comparar` mostra a razão contra um JSON anterior, para acompanhar
+regressões entre commits.
+
+Uso:
+    python benchmarks/bench_suite.py --maquinas 4 --ordens 3 --dias 2 --amostras-por-segundo 1
+    python benchmarks/bench_suite.py --comparar benchmarks/resultados/suite-abc1234.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import analise_dados as ad  # noqa: E402
+import ml_model  # noqa: E402
+from db_manager import DatabaseManager  # noqa: E402
+
+import gerador_leituras as gerador  # noqa: E402
+
+PASTA_RESULTADOS = os.path.join(os.path.dirname(__file__), 'resultados')
+SEMANAS = [4, 13, 26, 52]
+FATOR_DEMANDA = 0.8     # fração da demanda padrão (por 4 semanas) usada nos horizontes escalados
+LEITURAS_COMMIT_UNITARIO = 2000
+
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+
+class Suite:
+    def __init__(self, repeticoes):
+        self.repeticoes = repeticoes
+        self.resultados = []
+
+    def medir(self, grupo, nome, funcao, linhas=None, repeticoes=None, preparar=None):
+        """Mediana de `repeticoes` chamadas de `funcao` (com `preparar` antes de cada uma, fora do tempo)."""
+        tempos = []
+        for _ in range(repeticoes or self.repeticoes):
+            if preparar:
+                preparar()
+            inicio = time.perf_counter()
+            retorno = funcao()
+            tempos.append(time.perf_counter() - inicio)
+        if callable(linhas):
+            linhas = linhas(retorno)
+        self.registrar(grupo, nome, tempos, linhas)
+        return retorno
+
+    def registrar(self, grupo, nome, tempos, linhas=None):
+        tempo = statistics.median(tempos)
+        self.resultados.append({'grupo': grupo, 'nome': nome, 'segundos': tempo, 'minimo_s': min(tempos),
+                                'repeticoes': len(tempos), 'linhas': linhas,
+                                'linhas_por_s': linhas / tempo if linhas and tempo > 0 else None})
+
+    def imprimir(self):
+        print(f"{'grupo':<12}{'benchmark':<44}{'tempo (s)':>11}{'linhas/s':>14}")
+        for r in self.resultados:
+            taxa = f"{r['linhas_por_s']:>14,.0f}" if r['linhas_por_s'] else f"{'-':>14}"
+            print(f"{r['grupo']:<12}{r['nome']:<44}{r['segundos']:>11.4f}{taxa}")
+
+
+def bench_gravacao(suite, pasta, blocos, total):
+    leituras = [leitura for bloco in blocos for leitura in bloco]
+    unitarias = leituras[:LEITURAS_COMMIT_UNITARIO]
+
+    def remover(caminho):
+        for sufixo in ('', '-wal', '-shm'):
+            if os.path.exists(caminho + sufixo):
+                os.remove(caminho + sufixo)
+
+    def inserir_uma_a_uma(caminho, leituras, **db_kwargs):
+        # Banco novo a cada execução; o tempo é só o das inserções (sem abrir/migrar o banco)
+        remover(caminho)
+        with DatabaseManager(caminho, otimizado=True, **db_kwargs) as db:
+            inicio = time.perf_counter()
+            for leitura in leituras:
+                db.inserir_leitura(*leitura)
+            db.flush()
+            return time.perf_counter() - inicio
+
+    for nome, leituras_teste, db_kwargs in (('inserir_leitura (lote padrão)', leituras, {}),
+                                            ('inserir_leitura (commit por leitura)', unitarias, {'tamanho_lote': 1})):
+        tempos = [inserir_uma_a_uma(os.path.join(pasta, 'unitaria.db'), leituras_teste, **db_kwargs)
+                  for _ in range(suite.repeticoes)]
+        suite.registrar('gravacao', nome, tempos, len(leituras_teste))
+
+    caminho = os.path.join(pasta, 'suite.db')
+    suite.medir('gravacao', 'inserir_leituras (em lote)',
+                lambda: gerador.gravar_banco(caminho, blocos, otimizado=True), linhas=total,
+                preparar=lambda: remover(caminho))
+    return caminho
+
+
+def bench_consultas(suite, db):
+    maquina, ordem = 'maq001', 'OP00101'
+    inicio = gerador.INICIO.strftime('%Y-%m-%d %H:%M:%S')
+    fim = (gerador.INICIO + timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+    consultas = [
+        ('buscar_leituras', db.buscar_leituras),
+        ('buscar_por_maquina', lambda: db.buscar_por_maquina(maquina)),
+        ('buscar_por_ordem', lambda: db.buscar_por_ordem(ordem)),
+        ('buscar_por_data_range (1 h)', lambda: db.buscar_por_data_range(inicio, fim)),
+        ('buscar_por_data_range (1 h, máquina)', lambda: db.buscar_por_data_range(inicio, fim, codMaquina=maquina)),
+    ]
+    for nome, funcao in consultas:
+        suite.medir('consultas', nome, funcao, linhas=len)
+
+
+def bench_analise(suite, db):
+    df = suite.medir('analise', 'carregar_dados', lambda: ad.carregar_dados(db), linhas=len)
+    suite.medir('analise', 'carregar_dados (máquina)', lambda: ad.carregar_dados(db, codMaquina='maq001'), linhas=len)
+    for relatorio in (ad.folhas_por_ordem, ad.produtividade_por_maquina, ad.folhas_por_dia):
+        suite.medir('analise', f"{relatorio.__name__} (banco)", lambda: relatorio(db))
+        suite.medir('analise', f"{relatorio.__name__} (DataFrame)", lambda: relatorio(df.copy()), linhas=len(df))
+    return df
+
+
+def bench_exportacao(suite, db, df, pasta):
+    ad.PASTA_SAIDA = pasta
+    for formato in ('csv', 'ndjson'):
+        suite.medir('exportacao', f"exportar_leituras_streaming ({formato})",
+                    lambda: ad.exportar_leituras_streaming(db, f"leituras.{formato}", formato=formato),
+                    linhas=lambda retorno: retorno[0])
+    suite.medir('exportacao', 'exportar_para_csv (DataFrame)', lambda: ad.exportar_para_csv(df, 'df.csv'),
+                linhas=len(df))
+    suite.medir('exportacao', 'exportar_para_json (DataFrame)', lambda: ad.exportar_para_json(df, 'df.json'),
+                linhas=len(df))
+
+
+def cenario_escalado(num_semanas):
+    """Cenário padrão do ml_model com a demanda e a entrega de tecidos espalhadas por `num_semanas`."""
+    demanda = {tecido: int(total * FATOR_DEMANDA * num_semanas / 4) for tecido, total in ml_model.DEMANDA_VENDAS.items()}
+    entrega = {tecido: [1 / num_semanas] * num_semanas for tecido in demanda}
+    return demanda, list(range(1, num_semanas + 1)), entrega
+
+
+def bench_otimizacao(suite, semanas):
+    for num_semanas in semanas:
+        demanda, lista_semanas, entrega = cenario_escalado(num_semanas)
+        status, _, _ = suite.medir(
+            'otimizacao', f"executar_otimizacao_producao ({num_semanas} semanas)",
+            lambda: ml_model.executar_otimizacao_producao(demanda, ml_model.CAPACIDADE_CORTE,
+                                                          ml_model.CAPACIDADE_COSTURA, semanas=lista_semanas,
+                                                          entrega_tecidos_perc=entrega))
+        suite.resultados[-1]['status'] = status
+
+
+def comparar(resultados, caminho_anterior):
+    with open(caminho_anterior, encoding='utf-8') as arquivo:
+        anterior = json.load(arquivo)
+    if anterior['parametros'] != resultados['parametros']:
+        print("\nAviso: parâmetros diferentes dos do arquivo anterior; a comparação é só indicativa.")
+    tempos_anteriores = {(r['grupo'], r['nome']): r['segundos'] for r in anterior['resultados']}
+    print(f"\nComparação com {anterior['commit']} ({anterior['data']}): razão atual / anterior")
+    for r in resultados['resultados']:
+        tempo_anterior = tempos_anteriores.get((r['grupo'], r['nome']))
+        if tempo_anterior:
+            razao = r['segundos'] / tempo_anterior
+            marca = '  <- mais lento' if razao > 1.2 else ''
+            print(f"{r['grupo']:<12}{r['nome']:<44}{razao:>8.2f}x{marca}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--maquinas', type=int, default=gerador.MAQUINAS)
+    parser.add_argument('--ordens', type=int, default=gerador.ORDENS_POR_MAQUINA, help="ordens por máquina")
+    parser.add_argument('--dias', type=int, default=gerador.DIAS)
+    parser.add_argument('--horas-por-dia', type=float, default=gerador.HORAS_POR_DIA)
+    parser.add_argument('--amostras-por-segundo', type=float, default=gerador.AMOSTRAS_POR_SEGUNDO)
+    parser.add_argument('--segundos-por-folha', type=float, default=gerador.SEGUNDOS_POR_FOLHA)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--semanas', type=int, nargs='+', default=SEMANAS, help="horizontes do otimizador")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--saida', default=None, help="JSON de resultados (padrão: benchmarks/resultados/suite-<commit>.json)")
+    parser.add_argument('--comparar', default=None, metavar='JSON', help="resultado anterior para comparar")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    parametros = {chave: getattr(args, chave) for chave in ('maquinas', 'ordens', 'dias', 'horas_por_dia',
+                                                              'amostras_por_segundo', 'segundos_por_folha',
+                                                              'semente', 'semanas', 'repeticoes')}
+    blocos = list(gerador.gerar_leituras(args.maquinas, args.ordens, args.dias, args.horas_por_dia,
+                                         args.amostras_por_segundo, args.segundos_por_folha, semente=args.semente))
+    total = sum(len(bloco) for bloco in blocos)
+    print(f"{total:,} leituras sintéticas ({args.maquinas} máquinas x {args.ordens} ordens x {args.dias} dia(s))\n")
+
+    suite = Suite(args.repeticoes)
+    with tempfile.TemporaryDirectory() as pasta:
+        sys.stdout = open(os.devnull, 'w')  # silencia os prints do DatabaseManager
+        try:
+            caminho = bench_gravacao(suite, pasta, blocos, total)
+            with DatabaseManager(caminho, otimizado=True) as db:
+                bench_consultas(suite, db)
+                df = bench_analise(suite, db)
+                bench_exportacao(suite, db, df, pasta)
+            bench_otimizacao(suite, args.semanas)
+        finally:
+            sys.stdout.close()
+            sys.stdout = sys.__stdout__
+    suite.imprimir()
+
+    resultados = {
+        'commit': commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'parametros': parametros,
+        'leituras': total,
+        'resultados': suite.resultados,
+    }
+    caminho_saida = args.saida or os.path.join(PASTA_RESULTADOS, f"suite-{resultados['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(caminho_saida)), exist_ok=True)
+    with open(caminho_saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {caminho_saida}")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == '__main__':
+    main()
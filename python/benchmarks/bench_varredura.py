@@ -0,0 +1,57 @@
+"""
+Benchmark de escalabilidade da varredura de cenários (varredura_cenarios).
+
+Resolve a mesma grade de cenários sintéticos com 1, 2, 4... processos e mede
+o tempo total e o ganho em relação à execução serial.
+
+Uso:
+    python benchmarks/bench_varredura.py --cenarios 100 --semanas 13 --recursos 24
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_modelo_otimizacao import gerar_cenario  # noqa: E402
+from varredura_cenarios import varrer_cenarios  # noqa: E402
+
+
+def gerar_cenarios(quantidade):
+    """Fatores de demanda entre 0.80 e 1.19 e de capacidade em 1.0/1.1."""
+    return [{'fator_demanda': 0.8 + (i % 40) / 100, 'fator_capacidade': 1.0 + (i // 40 % 2) / 10}
+            for i in range(quantidade)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cenarios', type=int, default=100)
+    parser.add_argument('--semanas', type=int, default=13)
+    parser.add_argument('--recursos', type=int, default=24)
+    parser.add_argument('--processos', type=int, nargs='+', default=None)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    nucleos = os.cpu_count() or 1
+    processos = args.processos or sorted({2 ** i for i in range(nucleos.bit_length()) if 2 ** i <= nucleos} | {nucleos})
+    demanda, corte, costura, semanas, entrega = gerar_cenario(args.semanas, args.recursos)
+    cenarios = gerar_cenarios(args.cenarios)
+
+    print(f"{args.cenarios} cenários | {args.semanas} semanas | {args.recursos} recursos por setor | {nucleos} núcleos")
+    print(f"{'processos':>10}{'tempo (s)':>11}{'cenários/s':>12}{'ganho':>8}{'eficiência':>12}  ótimos")
+    base = None
+    for num_processos in processos:
+        inicio = time.perf_counter()
+        df = varrer_cenarios(cenarios, demanda, corte, costura, semanas, entrega, num_processos=num_processos)
+        tempo = time.perf_counter() - inicio
+        base = base or tempo
+        otimos = (df.groupby('cenario')['status'].first() == 'Optimal').sum()
+        print(f"{num_processos:>10}{tempo:>11.2f}{args.cenarios / tempo:>12.1f}{base / tempo:>7.2f}x"
+              f"{base / tempo / num_processos:>11.0%}  {otimos}/{args.cenarios}")
+
+
+if __name__ == '__main__':
+    main()
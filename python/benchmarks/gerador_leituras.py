@@ -0,0 +1,134 @@
+"""
+Gerador de históricos sintéticos de `leituras` para os benchmarks.
+
+Simula mesas de enfesto: em cada ciclo o carro sai da cabeceira (distância
+baixa), percorre a mesa até a outra ponta (acima de LIMITE_SUPERIOR), para e
+volta (abaixo de LIMITE_INFERIOR), com pausas nas pontas e ruído no sensor.
+Cada ciclo é uma folha, contada com a mesma histerese de detectar_folha
+(recontagem_folhas.contar_folhas), e a contagem recomeça a cada ordem.
+
+Parâmetros: máquinas, ordens por máquina, dias, horas de trabalho por dia,
+amostras por segundo e segundos por folha. O resultado é determinístico para
+a mesma `semente`. As leituras saem em blocos (listas de tuplas no formato de
+DatabaseManager.inserir_leituras), por máquina e dia, sem montar o histórico
+inteiro na memória.
+
+Uso (grava um banco para testes manuais):
+    python benchmarks/gerador_leituras.py --maquinas 4 --ordens 3 --dias 2 --amostras-por-segundo 2 --db /tmp/enfesto.db
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from db_manager import DatabaseManager  # noqa: E402
+from monitorar_sensor import LIMITE_SUPERIOR, LIMITE_INFERIOR, novo_estado  # noqa: E402
+from recontagem_folhas import contar_folhas  # noqa: E402
+
+INICIO = datetime(2025, 9, 1, 7, 0, 0)     # primeiro dia, início do turno
+MAQUINAS = 4
+ORDENS_POR_MAQUINA = 3
+DIAS = 1
+HORAS_POR_DIA = 8
+AMOSTRAS_POR_SEGUNDO = 1.0
+SEGUNDOS_POR_FOLHA = 90
+RUIDO_CM = 3.0
+
+# Perfil de um ciclo (fração do período): pausa na cabeceira, ida, pausa na ponta, volta
+PAUSA = 0.1
+DISTANCIA_CABECEIRA = LIMITE_INFERIOR / 2
+DISTANCIA_PONTA = LIMITE_SUPERIOR * 1.1
+
+
+def distancias_ciclo(segundos, segundos_por_folha=SEGUNDOS_POR_FOLHA, ruido=RUIDO_CM, gerador=None):
+    """Distâncias (cm) nos instantes `segundos` para o vai e vem do carro, com ruído gaussiano."""
+    gerador = gerador or np.random.default_rng()
+    fase = (segundos % segundos_por_folha) / segundos_por_folha
+    ida = np.clip((fase - PAUSA) / (0.5 - PAUSA), 0, 1)
+    volta = np.clip((fase - 0.5 - PAUSA) / (0.5 - PAUSA), 0, 1)
+    distancias = DISTANCIA_CABECEIRA + (DISTANCIA_PONTA - DISTANCIA_CABECEIRA) * (ida - volta)
+    distancias += gerador.normal(0, ruido, len(segundos))
+    return np.round(np.clip(distancias, 2.0, 400.0), 1)
+
+
+def gerar_leituras(maquinas=MAQUINAS, ordens_por_maquina=ORDENS_POR_MAQUINA, dias=DIAS, horas_por_dia=HORAS_POR_DIA,
+                   amostras_por_segundo=AMOSTRAS_POR_SEGUNDO, segundos_por_folha=SEGUNDOS_POR_FOLHA,
+                   ruido=RUIDO_CM, inicio=INICIO, semente=42):
+    """
+    Gera blocos de leituras (codMaquina, ordemProducao, dataHora, distancia,
+    folhas), um por máquina e dia. As ordens de cada máquina dividem o
+    período inteiro em partes iguais e podem atravessar dias.
+    """
+    gerador = np.random.default_rng(semente)
+    por_dia = int(horas_por_dia * 3600 * amostras_por_segundo)
+    por_ordem = max(dias * por_dia // ordens_por_maquina, 1)
+    segundos = np.arange(por_dia) / amostras_por_segundo
+
+    for maquina in range(maquinas):
+        codMaquina = f"maq{maquina + 1:03d}"
+        # Máquinas fora de fase, como mesas independentes
+        deslocamento = gerador.uniform(0, segundos_por_folha)
+        estados = {}
+        for dia in range(dias):
+            distancias = distancias_ciclo(segundos + deslocamento, segundos_por_folha, ruido, gerador)
+            indices = dia * por_dia + np.arange(por_dia)
+            ordens = np.minimum(indices // por_ordem, ordens_por_maquina - 1)
+            folhas = np.empty(por_dia, dtype=np.int64)
+            for ordem in np.unique(ordens):
+                trecho = ordens == ordem
+                folhas[trecho] = contar_folhas(distancias[trecho], estados.setdefault(ordem, novo_estado()))
+
+            inicio_dia = inicio + timedelta(days=dia)
+            datas = {}
+            bloco = []
+            for s, ordem, distancia, folha in zip(segundos.tolist(), ordens.tolist(), distancias.tolist(),
+                                                  folhas.tolist()):
+                segundo = int(s)
+                dataHora = datas.get(segundo)
+                if dataHora is None:
+                    dataHora = datas[segundo] = (inicio_dia + timedelta(seconds=segundo)).strftime('%Y-%m-%d %H:%M:%S')
+                bloco.append((codMaquina, f"OP{maquina + 1:03d}{ordem + 1:02d}", dataHora, distancia, folha))
+            yield bloco
+
+
+def total_leituras(maquinas=MAQUINAS, dias=DIAS, horas_por_dia=HORAS_POR_DIA, amostras_por_segundo=AMOSTRAS_POR_SEGUNDO):
+    return maquinas * dias * int(horas_por_dia * 3600 * amostras_por_segundo)
+
+
+def gravar_banco(caminho, blocos, **db_kwargs):
+    """Grava os blocos em um banco novo (ou existente) pelo DatabaseManager. Retorna o total de leituras."""
+    total = 0
+    with DatabaseManager(caminho, **db_kwargs) as db:
+        for bloco in blocos:
+            db.inserir_leituras(bloco)
+            total += len(bloco)
+        db.flush()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--maquinas', type=int, default=MAQUINAS)
+    parser.add_argument('--ordens', type=int, default=ORDENS_POR_MAQUINA, help="ordens por máquina")
+    parser.add_argument('--dias', type=int, default=DIAS)
+    parser.add_argument('--horas-por-dia', type=float, default=HORAS_POR_DIA)
+    parser.add_argument('--amostras-por-segundo', type=float, default=AMOSTRAS_POR_SEGUNDO)
+    parser.add_argument('--segundos-por-folha', type=float, default=SEGUNDOS_POR_FOLHA)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--db', required=True, help="banco SQLite de destino")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    blocos = gerar_leituras(args.maquinas, args.ordens, args.dias, args.horas_por_dia, args.amostras_por_segundo,
+                            args.segundos_por_folha, semente=args.semente)
+    total = gravar_banco(args.db, blocos, otimizado=True)
+    print(f"{total} leituras gravadas em {args.db}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,22 @@
 # === IMPORTS ===
 import os
+import csv
+import gzip
+import json
 import logging
+import sqlite3
+import time
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
-import plotly.express as px
-from db_manager import DatabaseManager
+from pandas.api.types import union_categoricals
+from db_manager import DatabaseManager, SQL_AGREGAR_RESUMO_DIA, SQL_AGREGAR_RESUMO_ORDEM, sql_agregado
+from metricas import cronometrado, histograma
 
 
 # === CONFIGURAÇÕES ===
-PASTA_SAIDA = 'output'
-os.makedirs(PASTA_SAIDA, exist_ok=True)
+PASTA_SAIDA = 'output'     # criada na primeira exportação (ver _caminho_saida)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,43 +25,175 @@ logging.basicConfig(
 
 
 # === CARREGAMENTO DE DADOS ===
-def carregar_dados(db: DatabaseManager) -> pd.DataFrame:
+COLUNAS_LEITURAS = ['id', 'codMaquina', 'ordemProducao', 'dataHora', 'distancia', 'folhas']
+COLUNAS_CATEGORICAS = ['codMaquina', 'ordemProducao']
+# Leituras codificadas (DatabaseManager.iterar_leituras(codificado=True)): tipos
+# fixos, convertidos de uma vez pelo NumPy, sem inferência coluna a coluna
+TIPO_CODIFICADO = np.dtype([('id', 'i8'), ('id_maquina', 'i8'), ('id_ordem', 'i8'), ('instante', 'i8'),
+                            ('distancia', 'f8'), ('folhas', 'i4')])
+
+
+def _categorica(ids: np.ndarray, codigos: dict) -> pd.Categorical:
+    # Tabela id -> posição do código (ordenado); ids sem código viram -1 (NaN)
+    ordenados = sorted(codigos, key=codigos.get)
+    posicoes = np.full(max(codigos, default=0) + 2, -1, dtype=np.int64)
+    posicoes[ordenados] = np.arange(len(ordenados))
+    ids = np.where((ids >= 0) & (ids < len(posicoes)), ids, -1)
+    categorica = pd.Categorical.from_codes(posicoes[ids], categories=[codigos[i] for i in ordenados])
+    return categorica.remove_unused_categories()
+
+
+def _tipar_bloco(linhas: list, codigos: dict) -> pd.DataFrame:
+    """
+    DataFrame tipado de um bloco de leituras codificadas: os ids viram
+    categóricas pelos `codigos` (DatabaseManager.codigos()) e o instante vira
+    datetime, sem interpretar texto linha a linha.
+    """
+    dados = np.array(linhas, dtype=TIPO_CODIFICADO)
+    return pd.DataFrame({
+        'id': dados['id'],
+        'codMaquina': _categorica(dados['id_maquina'], codigos['maquina']),
+        'ordemProducao': _categorica(dados['id_ordem'], codigos['ordem']),
+        'dataHora': pd.to_datetime(dados['instante'], unit='s'),
+        'distancia': dados['distancia'],
+        'folhas': dados['folhas'],
+    })
+
+
+def carregar_dados_em_blocos(db: DatabaseManager, codMaquina=None, ordemProducao=None,
+                             data_inicio=None, data_fim=None, tamanho_bloco=50000, id_apos=None):
+    """
+    Gera DataFrames tipados de até `tamanho_bloco` leituras cada. Os filtros
+    são aplicados no SQL, e a memória fica limitada a um bloco por vez.
+    """
+    codigos = db.codigos()
+    for linhas in db.iterar_leituras(codMaquina, ordemProducao, data_inicio, data_fim, tamanho_bloco,
+                                     id_apos=id_apos, codificado=True):
+        bloco = _tipar_bloco(linhas, codigos)
+        if bloco[COLUNAS_CATEGORICAS].isna().any(axis=None):
+            # Máquina/ordem cadastrada depois que os códigos foram lidos
+            codigos = db.codigos()
+            bloco = _tipar_bloco(linhas, codigos)
+        yield bloco
+
+
+def _concatenar_blocos(blocos: list) -> pd.DataFrame:
+    # Unifica as categorias antes de concatenar para não cair em dtype object
+    for coluna in COLUNAS_CATEGORICAS:
+        categorias = union_categoricals([bloco[coluna] for bloco in blocos]).categories
+        for bloco in blocos:
+            bloco[coluna] = bloco[coluna].cat.set_categories(categorias)
+    return pd.concat(blocos, ignore_index=True)
+
+
+def carregar_dados(db: DatabaseManager, codMaquina=None, ordemProducao=None,
+                   data_inicio=None, data_fim=None, tamanho_bloco=50000) -> pd.DataFrame:
+    """
+    Todas as leituras do filtro num único DataFrame. Os blocos são lidos um a
+    um, mas concatenados no final: o pico de memória cresce com o número de
+    leituras. Para históricos grandes, use carregar_dados_em_blocos (como a
+    exportação e o arquivo Parquet) ou passe o DatabaseManager aos relatórios,
+    que agregam no SQLite. Leituras já compactadas pela retenção não entram.
+    """
     try:
-        leituras = db.buscar_leituras()
-        df = pd.DataFrame(leituras, columns=[
-            'id', 'codMaquina', 'ordemProducao', 'dataHora', 'distancia', 'folhas'
-        ])
-        df['dataHora'] = pd.to_datetime(df['dataHora'], errors='coerce')
-        df = df.dropna(subset=['dataHora'])  # Remove inválidas
-        return df
+        blocos = list(carregar_dados_em_blocos(db, codMaquina, ordemProducao, data_inicio, data_fim, tamanho_bloco))
+        if not blocos:
+            return pd.DataFrame()
+        return _concatenar_blocos(blocos)
     except Exception as e:
         logging.error(f"Erro ao carregar dados: {e}")
         return pd.DataFrame()
 
 
-# === ANÁLISE ===
-def folhas_por_ordem(df: pd.DataFrame) -> pd.DataFrame:
-    resumo = df.groupby(['ordemProducao', 'codMaquina']).agg({
+# === AGREGAÇÃO NO BANCO (SQL) ===
+# Os relatórios leem as tabelas de resumo mantidas pelo DatabaseManager a cada
+# gravação: O(#ordens) linhas em vez de todas as leituras. Se elas não puderem
+# ser lidas, a mesma agregação é feita sobre as leituras brutas e compactadas
+# (FONTE_LEITURAS), com os mesmos totais. O caminho pandas é o dos DataFrames.
+SQL_RESUMO_POR_ORDEM = '''
+    SELECT ordemProducao, codMaquina, inicio, fim, folhas
+    FROM resumo_ordem
+    ORDER BY ordemProducao, codMaquina
+'''
+SQL_RESUMO_POR_ORDEM_LEITURAS = f'''
+    WITH resumo (ordemProducao, codMaquina, inicio, fim, folhas) AS ({sql_agregado(SQL_AGREGAR_RESUMO_ORDEM)})
+    SELECT ordemProducao, codMaquina, inicio, fim, folhas
+    FROM resumo
+    ORDER BY ordemProducao, codMaquina
+'''
+
+SQL_FOLHAS_POR_DIA = '''
+    SELECT data, codMaquina, ordemProducao, folhas
+    FROM resumo_dia
+    ORDER BY data, codMaquina, ordemProducao
+'''
+SQL_FOLHAS_POR_DIA_LEITURAS = f'''
+    WITH resumo (data, codMaquina, ordemProducao, leituras, folhas) AS ({sql_agregado(SQL_AGREGAR_RESUMO_DIA)})
+    SELECT data, codMaquina, ordemProducao, folhas
+    FROM resumo
+    ORDER BY data, codMaquina, ordemProducao
+'''
+
+
+def _agregar_no_banco(dados, sql: str, sql_leituras: str, colunas: list):
+    """
+    Executa a agregação no SQLite quando `dados` é um DatabaseManager: `sql`
+    lê as tabelas de resumo e, se elas estiverem indisponíveis, `sql_leituras`
+    agrega as leituras brutas e compactadas. Retorna (resultado, dados):
+    resultado é None quando `dados` é um DataFrame (caminho pandas).
+    """
+    if not isinstance(dados, DatabaseManager):
+        return None, dados
+    try:
+        return pd.DataFrame(dados.consultar(sql), columns=colunas), dados
+    except sqlite3.Error as e:
+        logging.warning(f"Tabelas de resumo indisponíveis, agregando as leituras: {e}")
+    try:
+        return pd.DataFrame(dados.consultar(sql_leituras), columns=colunas), dados
+    except sqlite3.Error as e:
+        logging.error(f"Erro ao agregar leituras: {e}")
+        return pd.DataFrame(columns=colunas), dados
+
+
+def _resumo_por_ordem(dados) -> pd.DataFrame:
+    colunas = ['ordemProducao', 'codMaquina', 'inicio', 'fim', 'folhas']
+    resumo, dados = _agregar_no_banco(dados, SQL_RESUMO_POR_ORDEM, SQL_RESUMO_POR_ORDEM_LEITURAS, colunas)
+    if resumo is not None:
+        resumo['inicio'] = pd.to_datetime(resumo['inicio'], format='ISO8601')
+        resumo['fim'] = pd.to_datetime(resumo['fim'], format='ISO8601')
+        return resumo
+
+    resumo = dados.groupby(['ordemProducao', 'codMaquina'], observed=True).agg({
         'dataHora': ['min', 'max'],
         'folhas': 'max'
     }).reset_index()
-    resumo.columns = ['ordemProducao', 'codMaquina', 'inicio', 'fim', 'total_folhas']
+    resumo.columns = colunas
+    return resumo
+
+
+# === ANÁLISE ===
+# Cada relatório aceita o DataFrame de leituras (agregação em pandas) ou o
+# próprio DatabaseManager (agregação no SQLite). A duração de cada chamada vai
+# para o histograma enfesto_relatorio_segundos (ver metricas.py).
+def _tempo_relatorio(relatorio):
+    return histograma('enfesto_relatorio_segundos', "Duração de cada relatório do analise_dados", relatorio=relatorio)
+
+
+@cronometrado(_tempo_relatorio('folhas_por_ordem'))
+def folhas_por_ordem(dados) -> pd.DataFrame:
+    resumo = _resumo_por_ordem(dados).rename(columns={'folhas': 'total_folhas'})
     return resumo.sort_values(by='inicio')
 
 
-def produtividade_por_maquina(df: pd.DataFrame) -> pd.DataFrame:
+@cronometrado(_tempo_relatorio('produtividade_por_maquina'))
+def produtividade_por_maquina(dados) -> pd.DataFrame:
     # Calcular produtividade por ordem + máquina
-    resumo = df.groupby(['ordemProducao', 'codMaquina']).agg({
-        'dataHora': ['min', 'max'],
-        'folhas': 'max'
-    }).reset_index()
-    
-    resumo.columns = ['ordemProducao', 'codMaquina', 'inicio', 'fim', 'folhas']
+    resumo = _resumo_por_ordem(dados)
     resumo['tempo_horas'] = (resumo['fim'] - resumo['inicio']).dt.total_seconds() / 3600
     resumo = resumo[resumo['tempo_horas'] > 0]
 
     # Agora agregamos POR MÁQUINA
-    agregada = resumo.groupby('codMaquina').agg({
+    agregada = resumo.groupby('codMaquina', observed=True).agg({
         'folhas': 'sum',
         'tempo_horas': 'sum'
     }).reset_index()
@@ -65,16 +203,27 @@ def produtividade_por_maquina(df: pd.DataFrame) -> pd.DataFrame:
     return agregada
 
 
+@cronometrado(_tempo_relatorio('folhas_por_dia'))
+def folhas_por_dia(dados) -> pd.DataFrame:
+    folhas_dia, df = _agregar_no_banco(dados, SQL_FOLHAS_POR_DIA, SQL_FOLHAS_POR_DIA_LEITURAS,
+                                     ['data', 'codMaquina', 'ordemProducao', 'folhas'])
+    if folhas_dia is not None:
+        folhas_dia['data'] = pd.to_datetime(folhas_dia['data']).dt.date
+        return folhas_dia
 
-def folhas_por_dia(df: pd.DataFrame) -> pd.DataFrame:
     df['data'] = df['dataHora'].dt.date
-    folhas_dia = df.groupby(['data', 'codMaquina', 'ordemProducao'])['folhas'].max().reset_index()
+    folhas_dia = df.groupby(['data', 'codMaquina', 'ordemProducao'], observed=True)['folhas'].max().reset_index()
     return folhas_dia.sort_values(by=['data', 'codMaquina', 'ordemProducao'])
 
 
 # === EXPORTAÇÃO ===
+def _caminho_saida(nome_arquivo: str) -> str:
+    os.makedirs(PASTA_SAIDA, exist_ok=True)
+    return os.path.join(PASTA_SAIDA, nome_arquivo)
+
+
 def exportar_para_csv(df: pd.DataFrame, nome_arquivo: str):
-    caminho = os.path.join(PASTA_SAIDA, nome_arquivo)
+    caminho = _caminho_saida(nome_arquivo)
     try:
         df.to_csv(caminho, index=False, sep=';', encoding='utf-8')
         logging.info(f"CSV exportado com sucesso: {caminho}")
@@ -83,7 +232,7 @@ def exportar_para_csv(df: pd.DataFrame, nome_arquivo: str):
 
 
 def exportar_para_json(df: pd.DataFrame, nome_arquivo: str):
-    caminho = os.path.join(PASTA_SAIDA, nome_arquivo)
+    caminho = _caminho_saida(nome_arquivo)
     try:
         df.to_json(caminho, orient='records', indent=4, date_format='iso')
         logging.info(f"JSON exportado com sucesso: {caminho}")
@@ -91,9 +240,55 @@ def exportar_para_json(df: pd.DataFrame, nome_arquivo: str):
         logging.error(f"Erro ao exportar JSON: {e}")
 
 
+FORMATOS_STREAMING = ('csv', 'ndjson')
+
+
+def exportar_leituras_streaming(db: DatabaseManager, nome_arquivo: str, formato='csv', comprimir=False,
+                                codMaquina=None, ordemProducao=None, data_inicio=None, data_fim=None,
+                                tamanho_bloco=50000):
+    """
+    Exporta as leituras direto do cursor do banco para CSV (`;`) ou JSON por
+    linha (NDJSON), bloco a bloco: a memória usada não depende do total de
+    linhas. Com `comprimir`, grava em gzip (extensão .gz acrescentada).
+    Retorna (linhas exportadas, linhas por segundo).
+    """
+    if formato not in FORMATOS_STREAMING:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    caminho = _caminho_saida(nome_arquivo + ('.gz' if comprimir else ''))
+    abrir = gzip.open if comprimir else open
+
+    codificar = json.JSONEncoder(ensure_ascii=False).encode
+    inicio = time.perf_counter()
+    total = 0
+    try:
+        with abrir(caminho, 'wt', encoding='utf-8', newline='') as arquivo:
+            if formato == 'csv':
+                escritor = csv.writer(arquivo, delimiter=';', lineterminator='\n')
+                escritor.writerow(COLUNAS_LEITURAS)
+            for linhas in db.iterar_leituras(codMaquina, ordemProducao, data_inicio, data_fim, tamanho_bloco):
+                if formato == 'csv':
+                    escritor.writerows(linhas)
+                else:
+                    arquivo.writelines(
+                        codificar(dict(zip(COLUNAS_LEITURAS, linha))) + '\n' for linha in linhas
+                    )
+                total += len(linhas)
+    except (OSError, sqlite3.Error) as e:
+        logging.error(f"Erro ao exportar {formato.upper()}: {e}")
+        return total, 0.0
+
+    tempo = time.perf_counter() - inicio
+    taxa = total / tempo if tempo > 0 else 0.0
+    logging.info(f"{formato.upper()} exportado com sucesso: {caminho} ({total} linhas, {taxa:,.0f} linhas/s)")
+    return total, taxa
+
+
 # === VISUALIZAÇÃO (PLOTLY) ===
+# plotly.express é importado só pelos gráficos: os relatórios em texto e as
+# exportações não pagam a importação.
 def plot_folhas_por_ordem_plotly(df: pd.DataFrame):
-    df['op_maquina'] = df['ordemProducao'] + " (" + df['codMaquina'] + ")"
+    import plotly.express as px
+    df['op_maquina'] = df['ordemProducao'].astype(str) + " (" + df['codMaquina'].astype(str) + ")"
 
     fig = px.bar(
         df,
@@ -109,6 +304,7 @@ def plot_folhas_por_ordem_plotly(df: pd.DataFrame):
 
 
 def plot_produtividade_maquina_plotly(df: pd.DataFrame):
+    import plotly.express as px
     fig = px.bar(
         df,
         x='codMaquina',
@@ -123,7 +319,8 @@ def plot_produtividade_maquina_plotly(df: pd.DataFrame):
 
 
 def plot_folhas_por_dia_plotly(df: pd.DataFrame):
-    df_grouped = df.groupby(['data', 'codMaquina'])['folhas'].sum().reset_index()
+    import plotly.express as px
+    df_grouped = df.groupby(['data', 'codMaquina'], observed=True)['folhas'].sum().reset_index()
     fig = px.line(
         df_grouped,
         x='data',
@@ -0,0 +1,136 @@
+"""
+Arquivo colunar (Parquet) das leituras, particionado por data e máquina.
+
+As leituras são gravadas em Parquet comprimido no layout
+`data=AAAA-MM-DD/codMaquina=<maq>/lote-<id>-<n>.parquet`. Cada exportação só
+acrescenta as leituras com id maior que o último exportado (guardado em
+`_estado.json` na raiz do arquivo), sem reescrever as partições existentes.
+A leitura usa o particionamento para abrir apenas as datas/máquinas pedidas.
+
+A tabela `leituras` é tratada como só-inserção: leituras alteradas ou
+removidas depois de exportadas não são refletidas no arquivo.
+
+Requer pyarrow (dependência opcional).
+"""
+
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+from db_manager import DatabaseManager
+from analise_dados import PASTA_SAIDA, COLUNAS_LEITURAS, COLUNAS_CATEGORICAS, carregar_dados_em_blocos
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = ds = pq = None
+
+PASTA_ARQUIVO = os.path.join(PASTA_SAIDA, 'arquivo_leituras')
+ARQUIVO_ESTADO = '_estado.json'     # prefixo "_": ignorado pelo pyarrow.dataset
+COMPRESSAO = 'zstd'
+TAMANHO_BLOCO = 200000
+COLUNAS_PARTICAO = ['data', 'codMaquina']
+
+
+def _exigir_pyarrow():
+    if pa is None:
+        raise ImportError("O arquivo Parquet requer o pacote pyarrow (pip install pyarrow).")
+
+
+def _particionamento():
+    # Tipos fixos: sem isso o pyarrow tentaria inferir números a partir dos nomes das pastas
+    return ds.partitioning(pa.schema([('data', pa.string()), ('codMaquina', pa.string())]), flavor='hive')
+
+
+def ler_estado(pasta=PASTA_ARQUIVO):
+    try:
+        with open(os.path.join(pasta, ARQUIVO_ESTADO), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return {'ultimo_id': 0, 'leituras': 0}
+
+
+def _gravar_estado(pasta, estado):
+    caminho = os.path.join(pasta, ARQUIVO_ESTADO)
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as arquivo:
+        json.dump(estado, arquivo, indent=4)
+    os.replace(caminho + '.tmp', caminho)
+
+
+def exportar_incremental(db: DatabaseManager, pasta=PASTA_ARQUIVO, compressao=COMPRESSAO,
+                         tamanho_bloco=TAMANHO_BLOCO) -> int:
+    """
+    Acrescenta ao arquivo as leituras novas desde a última exportação e
+    retorna quantas foram gravadas. O estado só avança depois que o bloco foi
+    gravado, então uma exportação interrompida é retomada do último bloco completo.
+    """
+    _exigir_pyarrow()
+    os.makedirs(pasta, exist_ok=True)
+    estado = ler_estado(pasta)
+    inicio = time.perf_counter()
+    gravadas = 0
+
+    for bloco in carregar_dados_em_blocos(db, tamanho_bloco=tamanho_bloco, id_apos=estado['ultimo_id']):
+        primeiro_id, ultimo_id = int(bloco['id'].iloc[0]), int(bloco['id'].iloc[-1])
+        bloco['data'] = bloco['dataHora'].dt.strftime('%Y-%m-%d')
+        bloco['codMaquina'] = bloco['codMaquina'].astype(str)
+        pq.write_to_dataset(
+            pa.Table.from_pandas(bloco, preserve_index=False),
+            root_path=pasta,
+            partition_cols=COLUNAS_PARTICAO,
+            # Nome único por bloco: novas exportações acrescentam arquivos sem sobrescrever
+            basename_template=f"lote-{primeiro_id:012d}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+            compression=compressao,
+        )
+        gravadas += len(bloco)
+        estado = {'ultimo_id': ultimo_id, 'leituras': estado['leituras'] + len(bloco)}
+        _gravar_estado(pasta, estado)
+
+    tempo = time.perf_counter() - inicio
+    logging.info(f"Arquivo Parquet: {gravadas} leitura(s) nova(s) em {tempo:.2f}s "
+                 f"(último id exportado: {estado['ultimo_id']}).")
+    return gravadas
+
+
+def carregar_arquivo(pasta=PASTA_ARQUIVO, codMaquina=None, data_inicio=None, data_fim=None,
+                     colunas=None) -> pd.DataFrame:
+    """
+    Lê do arquivo só as partições necessárias. `codMaquina` aceita um código
+    ou uma lista; `data_inicio`/`data_fim` são datas (inclusive) e `colunas`
+    restringe as colunas lidas. Retorna o mesmo formato de carregar_dados.
+    """
+    _exigir_pyarrow()
+    if not os.path.isdir(pasta):
+        return pd.DataFrame()
+
+    filtro = None
+
+    def combinar(expressao):
+        return expressao if filtro is None else filtro & expressao
+
+    if codMaquina is not None:
+        maquinas = [codMaquina] if isinstance(codMaquina, str) else list(codMaquina)
+        filtro = combinar(ds.field('codMaquina').isin(maquinas))
+    if data_inicio is not None:
+        filtro = combinar(ds.field('data') >= str(pd.Timestamp(data_inicio).date()))
+    if data_fim is not None:
+        filtro = combinar(ds.field('data') <= str(pd.Timestamp(data_fim).date()))
+
+    dataset = ds.dataset(pasta, format='parquet', partitioning=_particionamento())
+    tabela = dataset.to_table(columns=colunas, filter=filtro)
+    df = tabela.to_pandas().drop(columns=['data'], errors='ignore')
+    # As colunas de partição voltam no fim; restaura a ordem da tabela leituras
+    df = df[[c for c in COLUNAS_LEITURAS if c in df.columns]]
+
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype('category')
+    if 'id' in df.columns:
+        df = df.sort_values('id', ignore_index=True)
+    return df
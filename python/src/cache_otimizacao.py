@@ -0,0 +1,135 @@
+"""
+Cache de resultados do otimizador de produção.
+
+Cenários idênticos (mesma demanda e mesmas tabelas de capacidade) produzem o
+mesmo plano, então o resultado é guardado sob um hash canônico das entradas:
+primeiro num LRU em memória e depois em disco, para sobreviver a reinícios do
+dashboard.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+TAMANHO_CACHE = 128             # resultados mantidos em memória
+TAMANHO_CACHE_DISCO = 1024      # arquivos mantidos em disco (0 desativa o disco)
+PASTA_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'otimizacao')
+# Versão do modelo e do formato do resultado, incluída em toda chave. Incremente
+# ao mudar a construção do modelo (ml_model.construir_modelo), a extração dos
+# resultados ou a tupla devolvida: planos gravados com outra versão deixam de
+# ser encontrados, inclusive os do disco.
+VERSAO_MODELO = 2
+
+
+def _canonico(valor):
+    """Normaliza as entradas para que cenários equivalentes gerem o mesmo JSON."""
+    if isinstance(valor, dict):
+        return {str(k): _canonico(v) for k, v in sorted(valor.items(), key=lambda item: str(item[0]))}
+    if isinstance(valor, (list, tuple)):
+        return [_canonico(v) for v in valor]
+    if isinstance(valor, bool) or valor is None or isinstance(valor, str):
+        return valor
+    if isinstance(valor, (int, float)):
+        # 5000 e 5000.0 (editado na DataTable) representam a mesma capacidade
+        return float(valor)
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return str(valor)
+
+
+def chave_cenario(*entradas):
+    """Hash SHA-256 da forma canônica das entradas do modelo (e de VERSAO_MODELO)."""
+    texto = json.dumps(_canonico([VERSAO_MODELO, *entradas]), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+class CacheOtimizacao:
+    def __init__(self, tamanho_max=TAMANHO_CACHE, pasta=PASTA_CACHE, tamanho_max_disco=TAMANHO_CACHE_DISCO):
+        self.tamanho_max = tamanho_max
+        self.pasta = pasta if tamanho_max_disco else None
+        self.tamanho_max_disco = tamanho_max_disco
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+
+    def _arquivo(self, chave):
+        return os.path.join(self.pasta, f"{chave}.pkl")
+
+    def obter(self, chave):
+        """Resultado guardado para a chave, ou None."""
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                self.acertos_memoria += 1
+                return self._memoria[chave]
+
+        if self.pasta:
+            try:
+                with open(self._arquivo(chave), 'rb') as arquivo:
+                    resultado = pickle.load(arquivo)
+                with self._lock:
+                    self.acertos_disco += 1
+                self._guardar_memoria(chave, resultado)
+                return resultado
+            except FileNotFoundError:
+                pass
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                logging.warning(f"Entrada de cache inválida ({chave[:12]}): {e}")
+
+        with self._lock:
+            self.falhas += 1
+        return None
+
+    def _guardar_memoria(self, chave, resultado):
+        with self._lock:
+            self._memoria[chave] = resultado
+            self._memoria.move_to_end(chave)
+            while len(self._memoria) > self.tamanho_max:
+                self._memoria.popitem(last=False)
+
+    def guardar(self, chave, resultado):
+        self._guardar_memoria(chave, resultado)
+        if not self.pasta:
+            return
+        try:
+            os.makedirs(self.pasta, exist_ok=True)
+            temporario = self._arquivo(chave) + '.tmp'
+            with open(temporario, 'wb') as arquivo:
+                pickle.dump(resultado, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporario, self._arquivo(chave))
+            self._podar_disco()
+        except OSError as e:
+            logging.warning(f"Não foi possível gravar o cache em disco: {e}")
+
+    def _podar_disco(self):
+        arquivos = [os.path.join(self.pasta, nome) for nome in os.listdir(self.pasta) if nome.endswith('.pkl')]
+        excesso = len(arquivos) - self.tamanho_max_disco
+        if excesso > 0:
+            for caminho in sorted(arquivos, key=os.path.getmtime)[:excesso]:
+                os.remove(caminho)
+
+    def limpar(self):
+        with self._lock:
+            self._memoria.clear()
+        if self.pasta and os.path.isdir(self.pasta):
+            for nome in os.listdir(self.pasta):
+                if nome.endswith('.pkl'):
+                    os.remove(os.path.join(self.pasta, nome))
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.acertos_memoria + self.acertos_disco + self.falhas
+            return {
+                'acertos_memoria': self.acertos_memoria,
+                'acertos_disco': self.acertos_disco,
+                'falhas': self.falhas,
+                'taxa_acerto': (self.acertos_memoria + self.acertos_disco) / consultas if consultas else 0.0,
+                'itens_memoria': len(self._memoria),
+            }
@@ -0,0 +1,250 @@
+"""
+Coletor assíncrono de várias mesas de enfesto.
+
+Lê simultaneamente várias portas seriais/RFC2217 (uma por máquina, definidas em
+um arquivo JSON), mantém um estado de detecção de folhas por máquina e envia
+todas as leituras para uma única tarefa de gravação em lote no SQLite.
+
+Exemplo de configuração (ver python/config/coletor.json):
+
+    {
+        "db_path": "../database/enfesto.db",
+        "maquinas": [
+            {"codMaquina": "maq001", "ordemProducao": "OP00123", "porta": "rfc2217://localhost:4000"},
+            {"codMaquina": "maq002", "ordemProducao": "OP00221", "porta": "rfc2217://localhost:4001"}
+        ]
+    }
+
+Para testes sem ESP32, use portas "loop://" e escreva as linhas na própria porta.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import serial
+
+import metricas
+from db_manager import DatabaseManager, TAMANHO_LOTE, INTERVALO_FLUSH
+from monitorar_sensor import (novo_estado, interpretar_linha, detectar_folha,
+                              LeitorLinhas, EstatisticasLeitura)
+from monitor_producao import MonitorProducao, iniciar_monitor
+
+CONFIG_PADRAO = '../config/coletor.json'
+BAUDRATE = 115200
+TIMEOUT_LEITURA = 1         # segundos de espera do read() sem dados
+ESPERA_RECONEXAO = 5        # segundos entre tentativas de reabrir a porta
+TAMANHO_FILA = 10000        # leituras pendentes antes de frear os leitores
+
+
+def carregar_config(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def abrir_porta_serial(maquina):
+    return serial.serial_for_url(
+        maquina['porta'],
+        baudrate=maquina.get('baudrate', BAUDRATE),
+        timeout=maquina.get('timeout', TIMEOUT_LEITURA)
+    )
+
+
+class ColetorEnfesto:
+    def __init__(self, maquinas, db_path='../database/enfesto.db', tamanho_lote=TAMANHO_LOTE,
+                 intervalo_flush=INTERVALO_FLUSH, abrir_porta=abrir_porta_serial, db_kwargs=None, monitor=None):
+        self.maquinas = maquinas
+        self.db_path = db_path
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_flush = intervalo_flush
+        self.abrir_porta = abrir_porta
+        self.db_kwargs = {'otimizado': True, **(db_kwargs or {})}
+
+        # Estado de detecção de folhas independente por máquina
+        self.estados = {m['codMaquina']: novo_estado() for m in maquinas}
+        self.portas = {}
+        self.estatisticas = {m['codMaquina']: EstatisticasLeitura(m['codMaquina']) for m in maquinas}
+        self.fila = None
+        self._encerrando = False
+        self.monitor = monitor      # MonitorProducao opcional, alimentado a cada leitura
+        metricas.medidor('enfesto_fila_leituras', "Leituras na fila entre os leitores e o gravador",
+                         funcao=lambda: self.fila.qsize() if self.fila is not None else 0)
+
+        # read() é bloqueante: uma thread por máquina. O SQLite fica numa
+        # única thread, dona da conexão de escrita.
+        self._executor_serial = ThreadPoolExecutor(max_workers=max(len(maquinas), 1),
+                                                   thread_name_prefix='serial')
+        self._executor_db = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db')
+
+    async def _em_thread(self, executor, funcao, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, funcao, *args)
+
+    # --- Leitura ---
+    async def _ler_maquina(self, maquina):
+        codMaquina = maquina['codMaquina']
+        ordemProducao = maquina['ordemProducao']
+        estado = self.estados[codMaquina]
+
+        while True:
+            try:
+                porta = await self._em_thread(self._executor_serial, self.abrir_porta, maquina)
+            except (serial.SerialException, OSError) as e:
+                logging.warning(f" [{codMaquina}] Falha ao abrir {maquina['porta']}: {e}")
+                await asyncio.sleep(ESPERA_RECONEXAO)
+                continue
+
+            self.portas[codMaquina] = porta
+            leitor = LeitorLinhas(porta, self.estatisticas[codMaquina])
+            logging.info(f" [{codMaquina}] Conectado a {maquina['porta']}")
+            try:
+                while True:
+                    for linha in await self._em_thread(self._executor_serial, leitor.ler_linhas):
+                        try:
+                            leitura = interpretar_linha(linha)
+                        except ValueError as e:
+                            leitor.estatisticas.malformadas += 1
+                            logging.warning(f" [{codMaquina}] Erro ao processar linha '{linha}': {e}")
+                            continue
+                        if leitura is None:
+                            continue
+
+                        dataHora, distancia = leitura
+                        folhas = detectar_folha(distancia, estado)
+                        if self.monitor is not None:
+                            self.monitor.registrar(codMaquina, ordemProducao, distancia, folhas)
+                        # Fila cheia: o leitor espera o gravador (backpressure)
+                        await self.fila.put((codMaquina, ordemProducao, dataHora, distancia, folhas))
+                    leitor.estatisticas.talvez_registrar()
+            except (serial.SerialException, OSError) as e:
+                logging.warning(f" [{codMaquina}] Conexão perdida: {e}")
+                await asyncio.sleep(ESPERA_RECONEXAO)
+            finally:
+                # No encerramento, executar() fecha a porta depois que o read() terminar
+                if not self._encerrando:
+                    self.portas.pop(codMaquina, None)
+                    porta.close()
+
+    # --- Gravação ---
+    async def _proximo_lote(self):
+        """Aguarda a próxima leitura e junta o que já estiver na fila, até tamanho_lote."""
+        lote = [await self.fila.get()]
+        while len(lote) < self.tamanho_lote:
+            try:
+                lote.append(self.fila.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return lote
+
+    async def _gravar(self, db):
+        while True:
+            try:
+                lote = await asyncio.wait_for(self._proximo_lote(), timeout=self.intervalo_flush)
+            except asyncio.TimeoutError:
+                # Sem leituras novas: garante que o buffer não fique parado
+                await self._em_thread(self._executor_db, db.flush)
+                continue
+            await self._em_thread(self._executor_db, db.inserir_leituras, lote)
+
+    async def _drenar_fila(self, db):
+        pendentes = []
+        while not self.fila.empty():
+            pendentes.append(self.fila.get_nowait())
+        if pendentes:
+            await self._em_thread(self._executor_db, db.inserir_leituras, pendentes)
+
+    # --- Execução ---
+    async def executar(self, duracao=None):
+        """Coleta até ser cancelado (ou por `duracao` segundos) e grava tudo antes de sair."""
+        self.fila = asyncio.Queue(maxsize=TAMANHO_FILA)
+        db = await self._em_thread(
+            self._executor_db,
+            lambda: DatabaseManager(self.db_path, tamanho_lote=self.tamanho_lote,
+                                    intervalo_flush=self.intervalo_flush, **self.db_kwargs)
+        )
+        tarefas = [asyncio.create_task(self._ler_maquina(m)) for m in self.maquinas]
+        tarefas.append(asyncio.create_task(self._gravar(db)))
+        try:
+            # asyncio.wait não cancela as tarefas no tempo limite: o cancelamento
+            # fica para o bloco abaixo, depois de interromper as leituras
+            concluidas, _ = await asyncio.wait(tarefas, timeout=duracao, return_when=asyncio.FIRST_EXCEPTION)
+            for tarefa in concluidas:
+                tarefa.result()     # propaga o erro de um leitor ou do gravador
+        finally:
+            # Interrompe os read() bloqueados nas threads seriais, espera essas
+            # threads terminarem e só então fecha as portas
+            self._encerrando = True
+            self._interromper_leituras()
+            for tarefa in tarefas:
+                tarefa.cancel()
+            await asyncio.gather(*tarefas, return_exceptions=True)
+            self._executor_serial.shutdown(wait=True)
+            self._fechar_portas()
+            await self._drenar_fila(db)
+            await self._em_thread(self._executor_db, db.fechar)
+            self._executor_db.shutdown(wait=True)
+
+    def _interromper_leituras(self):
+        # cancel_read() faz o read() em andamento retornar; sem ele, só fechar a porta o interrompe
+        for codMaquina, porta in list(self.portas.items()):
+            try:
+                if hasattr(porta, 'cancel_read'):
+                    porta.cancel_read()
+                else:
+                    porta.close()
+            except (serial.SerialException, OSError) as e:
+                logging.warning(f" [{codMaquina}] Erro ao interromper a leitura: {e}")
+
+    def _fechar_portas(self):
+        for codMaquina in list(self.portas):
+            try:
+                self.portas.pop(codMaquina).close()
+            except (serial.SerialException, OSError) as e:
+                logging.warning(f" [{codMaquina}] Erro ao fechar a porta: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coletor assíncrono de várias máquinas de enfesto.")
+    parser.add_argument('--config', default=CONFIG_PADRAO, help="arquivo JSON com banco e máquinas")
+    parser.add_argument('--monitor', type=int, metavar='PORTA', default=None,
+                        help="serve o monitor de produção ao vivo nesta porta")
+    parser.add_argument('--metricas', type=int, metavar='PORTA', default=None,
+                        help="serve as métricas (formato Prometheus) em /metrics nesta porta")
+    parser.add_argument('--log-metricas', type=float, metavar='SEGUNDOS', default=None,
+                        help="escreve uma linha com as métricas no log a cada SEGUNDOS")
+    args = parser.parse_args()
+
+    config = carregar_config(args.config)
+    monitor = None
+    porta_monitor = args.monitor or config.get('monitor_porta')
+    if porta_monitor:
+        monitor = MonitorProducao()
+        iniciar_monitor(monitor, porta_monitor)
+        logging.info(f" Monitor ao vivo em http://127.0.0.1:{porta_monitor}")
+
+    porta_metricas = args.metricas or config.get('metricas_porta')
+    if porta_metricas:
+        metricas.iniciar_servidor_metricas(porta_metricas)
+        logging.info(f" Métricas em http://127.0.0.1:{porta_metricas}/metrics")
+    intervalo_metricas = args.log_metricas or config.get('log_metricas')
+    if intervalo_metricas:
+        metricas.registrar_periodicamente(intervalo_metricas)
+
+    coletor = ColetorEnfesto(
+        config['maquinas'],
+        db_path=config.get('db_path', '../database/enfesto.db'),
+        tamanho_lote=config.get('tamanho_lote', TAMANHO_LOTE),
+        intervalo_flush=config.get('intervalo_flush', INTERVALO_FLUSH),
+        monitor=monitor
+    )
+
+    logging.info(f" Iniciando coleta de {len(config['maquinas'])} máquina(s)...")
+    try:
+        asyncio.run(coletor.executar())
+    except KeyboardInterrupt:
+        logging.info("\n Coleta encerrada pelo usuário.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,330 @@
+import logging
+import queue
 import sqlite3
-from datetime import datetime
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+
+import metricas
+
+# Configurações do buffer de escrita
+TAMANHO_LOTE = 500          # leituras acumuladas antes de gravar
+INTERVALO_FLUSH = 1.0       # segundos máximos que uma leitura fica no buffer
+
+# Métricas da gravação (ver metricas.py): atualizadas uma vez por lote
+LEITURAS_INSERIDAS = metricas.contador('enfesto_leituras_inseridas_total', "Leituras gravadas no banco")
+LOTES_GRAVADOS = metricas.contador('enfesto_lotes_gravados_total', "Lotes de leituras gravados (flush)")
+LEITURAS_REJEITADAS = metricas.contador('enfesto_leituras_rejeitadas_total',
+                                       "Leituras recusadas pelo banco e descartadas de um lote")
+TEMPO_COMMIT = metricas.histograma('enfesto_commit_lote_segundos', "Gravação de um lote de leituras até o commit")
+
+# Modo otimizado: WAL permite que leitores e o escritor trabalhem em paralelo
+PRAGMAS_OTIMIZADOS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',     # seguro em WAL; fsync apenas nos checkpoints
+    'cache_size': -64000,        # valores negativos = KiB (~64 MB)
+    'mmap_size': 268435456,      # 256 MB
+    'busy_timeout': 5000,        # ms aguardando o lock antes de "database is locked"
+}
+PRAGMAS_LEITURA = ('cache_size', 'mmap_size', 'busy_timeout')
+NUM_LEITORES = 2
+
+TAMANHO_BLOCO_LEITURA = 50000   # linhas por fetchmany nas leituras em streaming
+
+# Tabelas de resumo (rollups) mantidas a cada gravação, para que os relatórios
+# leiam O(#ordens) linhas em vez de todas as leituras.
+SQL_CRIAR_RESUMO_ORDEM = '''
+    CREATE TABLE IF NOT EXISTS resumo_ordem (
+        ordemProducao TEXT NOT NULL,
+        codMaquina TEXT NOT NULL,
+        inicio TEXT NOT NULL,
+        fim TEXT NOT NULL,
+        folhas INTEGER NOT NULL,
+        PRIMARY KEY (ordemProducao, codMaquina)
+    )
+'''
+SQL_CRIAR_RESUMO_DIA = '''
+    CREATE TABLE IF NOT EXISTS resumo_dia (
+        data TEXT NOT NULL,
+        codMaquina TEXT NOT NULL,
+        ordemProducao TEXT NOT NULL,
+        leituras INTEGER NOT NULL,
+        folhas INTEGER NOT NULL,
+        PRIMARY KEY (data, codMaquina, ordemProducao)
+    )
+'''
+
+# Leituras em formato compacto (v5): máquina e ordem são ids inteiros de
+# Maquinas/OrdensProducao e a data/hora é `instante`, em segundos desde
+# 1970-01-01 contados sobre o horário gravado (sem conversão de fuso).
+EPOCA = datetime(1970, 1, 1)
+UM_SEGUNDO = timedelta(seconds=1)
+OPCOES_TABELA_LEITURAS = ' STRICT' if sqlite3.sqlite_version_info >= (3, 37, 0) else ''
+
+SQL_CRIAR_MAQUINAS = '''
+    CREATE TABLE IF NOT EXISTS Maquinas (
+        id_maquina INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome_maquina TEXT NOT NULL UNIQUE,
+        modelo TEXT,
+        data_instalacao DATE
+    )
+'''
+SQL_CRIAR_ORDENS = '''
+    CREATE TABLE IF NOT EXISTS OrdensProducao (
+        id_ordem INTEGER PRIMARY KEY AUTOINCREMENT,
+        codigo_op TEXT NOT NULL UNIQUE,
+        data_inicio DATETIME,
+        status TEXT NOT NULL CHECK(status IN ('Pendente', 'Em Andamento', 'Finalizada', 'Cancelada'))
+    )
+'''
+SQL_CRIAR_LEITURAS_V5 = f'''
+    CREATE TABLE leituras_v5 (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_maquina INTEGER NOT NULL REFERENCES Maquinas (id_maquina),
+        id_ordem INTEGER NOT NULL REFERENCES OrdensProducao (id_ordem),
+        instante INTEGER NOT NULL,
+        distancia REAL NOT NULL,
+        folhas INTEGER NOT NULL
+    ){OPCOES_TABELA_LEITURAS}
+'''
+# Leituras recebidas com dataHora inválida: guardadas no formato original,
+# fora de `leituras` e dos resumos.
+SQL_CRIAR_LEITURAS_INVALIDAS = '''
+    CREATE TABLE IF NOT EXISTS leituras_invalidas (
+        id INTEGER PRIMARY KEY,
+        codMaquina TEXT NOT NULL,
+        ordemProducao TEXT NOT NULL,
+        dataHora TEXT NOT NULL,
+        distancia REAL NOT NULL,
+        folhas INTEGER NOT NULL
+    )
+'''
+
+# Código <-> id das máquinas e ordens (ver DatabaseManager.id_codigo)
+SQL_CODIGOS = {
+    'maquina': {
+        'buscar': 'SELECT id_maquina FROM Maquinas WHERE nome_maquina = ?',
+        'cadastrar': 'INSERT OR IGNORE INTO Maquinas (nome_maquina) VALUES (?)',
+        'listar': 'SELECT id_maquina, nome_maquina FROM Maquinas',
+    },
+    'ordem': {
+        'buscar': 'SELECT id_ordem FROM OrdensProducao WHERE codigo_op = ?',
+        'cadastrar': "INSERT OR IGNORE INTO OrdensProducao (codigo_op, status) VALUES (?, 'Em Andamento')",
+        'listar': 'SELECT id_ordem, codigo_op FROM OrdensProducao',
+    },
+}
+
+# Leituras com os códigos e a dataHora em texto, no formato de antes da v5.
+# O LEFT JOIN mantém `leituras` como tabela externa (ordem de id e índices).
+SQL_LEITURAS = '''
+    SELECT l.id, m.nome_maquina AS codMaquina, o.codigo_op AS ordemProducao,
+           datetime(l.instante, 'unixepoch') AS dataHora, l.distancia, l.folhas
+    FROM leituras l
+    LEFT JOIN Maquinas m ON m.id_maquina = l.id_maquina
+    LEFT JOIN OrdensProducao o ON o.id_ordem = l.id_ordem
+'''
+SQL_LEITURAS_CODIFICADAS = 'SELECT l.id, l.id_maquina, l.id_ordem, l.instante, l.distancia, l.folhas FROM leituras l'
+
+
+def instante_leitura(dataHora):
+    """
+    (instante, dataHora normalizada 'AAAA-MM-DD HH:MM:SS') de uma data/hora em
+    texto ou datetime, ou None se ela for inválida.
+    """
+    try:
+        momento = dataHora if isinstance(dataHora, datetime) else datetime.fromisoformat(str(dataHora))
+    except ValueError:
+        return None
+    if isinstance(dataHora, str) and len(dataHora) == 19 and dataHora[10] == ' ':
+        return (momento - EPOCA) // UM_SEGUNDO, dataHora   # já no formato gravado pelos coletores
+    if momento.tzinfo is not None:
+        momento = momento.astimezone(timezone.utc).replace(tzinfo=None)
+    momento = momento.replace(microsecond=0)
+    return (momento - EPOCA) // UM_SEGUNDO, str(momento)
+
+
+# Agregações de referência, calculadas a partir das leituras. {fonte} traz
+# uma linha por leitura bruta e uma por trecho já compactado (ver
+# leituras_compactadas), com inicio/fim/quantidade de leituras/folhas.
+FONTE_LEITURAS_V0 = '''
+    SELECT ordemProducao, codMaquina, dataHora AS inicio, dataHora AS fim, 1 AS leituras, folhas FROM leituras
+'''
+FONTE_LEITURAS_BRUTAS = '''
+    SELECT o.codigo_op AS ordemProducao, m.nome_maquina AS codMaquina, datetime(l.instante, 'unixepoch') AS inicio,
+           datetime(l.instante, 'unixepoch') AS fim, 1 AS leituras, l.folhas
+    FROM leituras l
+    JOIN Maquinas m ON m.id_maquina = l.id_maquina
+    JOIN OrdensProducao o ON o.id_ordem = l.id_ordem
+'''
+FONTE_LEITURAS = FONTE_LEITURAS_BRUTAS + '''
+    UNION ALL
+    SELECT ordemProducao, codMaquina, inicio, fim, leituras, folhas FROM leituras_compactadas
+'''
+SQL_AGREGAR_RESUMO_ORDEM = '''
+    SELECT ordemProducao, codMaquina, MIN(inicio), MAX(fim), MAX(folhas)
+    FROM ({fonte})
+    WHERE julianday(inicio) IS NOT NULL {filtro}
+    GROUP BY ordemProducao, codMaquina
+'''
+SQL_AGREGAR_RESUMO_DIA = '''
+    SELECT date(inicio), codMaquina, ordemProducao, SUM(leituras), MAX(folhas)
+    FROM ({fonte})
+    WHERE julianday(inicio) IS NOT NULL {filtro}
+    GROUP BY date(inicio), codMaquina, ordemProducao
+'''
+FILTRO_GRUPO_ORDEM = 'AND ordemProducao = ? AND codMaquina = ?'
+FILTRO_GRUPO_DIA = "AND ordemProducao = ? AND codMaquina = ? AND inicio >= ? AND inicio < date(?, '+1 day')"
+
+
+def sql_agregado(sql, filtro='', fonte=FONTE_LEITURAS):
+    return sql.format(fonte=fonte, filtro=filtro)
+
+
+# Trechos de leituras antigas compactadas (ver retencao.py): cada linha
+# substitui `leituras` leituras brutas consecutivas de uma máquina/ordem.
+SQL_CRIAR_LEITURAS_COMPACTADAS = '''
+    CREATE TABLE IF NOT EXISTS leituras_compactadas (
+        id INTEGER PRIMARY KEY,
+        codMaquina TEXT NOT NULL,
+        ordemProducao TEXT NOT NULL,
+        inicio TEXT NOT NULL,
+        fim TEXT NOT NULL,
+        leituras INTEGER NOT NULL,
+        distancia_min REAL NOT NULL,
+        distancia_max REAL NOT NULL,
+        folhas INTEGER NOT NULL
+    )
+'''
+SQL_INSERIR_COMPACTADA = '''
+    INSERT INTO leituras_compactadas
+        (codMaquina, ordemProducao, inicio, fim, leituras, distancia_min, distancia_max, folhas)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+# Leituras brutas elegíveis para compactação: até um id e uma data de corte.
+FILTRO_COMPACTAVEIS = " WHERE id <= ? AND instante <= CAST(strftime('%s', ?) AS INTEGER)"
+
+SQL_ACUMULAR_RESUMO_ORDEM = '''
+    INSERT INTO resumo_ordem (ordemProducao, codMaquina, inicio, fim, folhas)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (ordemProducao, codMaquina) DO UPDATE SET
+        inicio = MIN(inicio, excluded.inicio),
+        fim = MAX(fim, excluded.fim),
+        folhas = MAX(folhas, excluded.folhas)
+'''
+SQL_ACUMULAR_RESUMO_DIA = '''
+    INSERT INTO resumo_dia (data, codMaquina, ordemProducao, leituras, folhas)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (data, codMaquina, ordemProducao) DO UPDATE SET
+        leituras = leituras + excluded.leituras,
+        folhas = MAX(folhas, excluded.folhas)
+'''
+
+RESUMOS = {
+    'resumo_ordem': SQL_AGREGAR_RESUMO_ORDEM,
+    'resumo_dia': SQL_AGREGAR_RESUMO_DIA,
+}
+
+# Migrações de esquema, aplicadas em ordem e registradas em PRAGMA user_version.
+# Cada item é a lista de comandos que leva o banco da versão i para i + 1.
+MIGRACOES = [
+    # v1: índices compostos para buscas por máquina/ordem e por período
+    [
+        'CREATE INDEX IF NOT EXISTS idx_leituras_maquina_data ON leituras (codMaquina, dataHora)',
+        'CREATE INDEX IF NOT EXISTS idx_leituras_ordem_data ON leituras (ordemProducao, dataHora)',
+        'CREATE INDEX IF NOT EXISTS idx_leituras_data ON leituras (dataHora)',
+    ],
+    # v2: tabelas de resumo, preenchidas com o histórico existente
+    [
+        SQL_CRIAR_RESUMO_ORDEM,
+        SQL_CRIAR_RESUMO_DIA,
+        'INSERT INTO resumo_ordem ' + sql_agregado(SQL_AGREGAR_RESUMO_ORDEM, fonte=FONTE_LEITURAS_V0),
+        'INSERT INTO resumo_dia ' + sql_agregado(SQL_AGREGAR_RESUMO_DIA, fonte=FONTE_LEITURAS_V0),
+    ],
+    # v3: produção realizada por semana (corte/costura), usada no re-planejamento
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS producao_realizada (
+            semana INTEGER NOT NULL,
+            setor TEXT NOT NULL CHECK(setor IN ('Corte', 'Costura')),
+            recurso TEXT NOT NULL,
+            tecido TEXT NOT NULL,
+            turno TEXT NOT NULL CHECK(turno IN ('normal', 'extra')),
+            quantidade REAL NOT NULL,
+            PRIMARY KEY (semana, setor, recurso, tecido, turno)
+        )
+        ''',
+    ],
+    # v4: trechos compactados pela retenção de leituras antigas
+    [
+        SQL_CRIAR_LEITURAS_COMPACTADAS,
+        'CREATE INDEX IF NOT EXISTS idx_compactadas_maquina_inicio ON leituras_compactadas (codMaquina, inicio)',
+        'CREATE INDEX IF NOT EXISTS idx_compactadas_ordem_inicio ON leituras_compactadas (ordemProducao, inicio)',
+    ],
+    # v5: leituras em formato compacto, com ids de Maquinas/OrdensProducao e instante inteiro
+    [
+        SQL_CRIAR_MAQUINAS,
+        SQL_CRIAR_ORDENS,
+        SQL_CRIAR_LEITURAS_INVALIDAS,
+        'INSERT OR IGNORE INTO Maquinas (nome_maquina) SELECT DISTINCT codMaquina FROM leituras ORDER BY codMaquina',
+        '''INSERT OR IGNORE INTO OrdensProducao (codigo_op, status)
+           SELECT DISTINCT ordemProducao, 'Em Andamento' FROM leituras ORDER BY ordemProducao''',
+        SQL_CRIAR_LEITURAS_V5,
+        '''INSERT INTO leituras_v5 (id, id_maquina, id_ordem, instante, distancia, folhas)
+           SELECT l.id, m.id_maquina, o.id_ordem, CAST(strftime('%s', l.dataHora) AS INTEGER), l.distancia, l.folhas
+           FROM leituras l
+           JOIN Maquinas m ON m.nome_maquina = l.codMaquina
+           JOIN OrdensProducao o ON o.codigo_op = l.ordemProducao
+           WHERE julianday(l.dataHora) IS NOT NULL
+           ORDER BY l.id''',
+        'INSERT INTO leituras_invalidas SELECT * FROM leituras WHERE julianday(dataHora) IS NULL',
+        # Preserva o contador do AUTOINCREMENT: ids não são reaproveitados (ver arquivo_leituras)
+        "DELETE FROM sqlite_sequence WHERE name = 'leituras_v5'",
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'leituras_v5', seq FROM sqlite_sequence WHERE name = 'leituras'",
+        'DROP TABLE leituras',
+        'ALTER TABLE leituras_v5 RENAME TO leituras',
+        'CREATE INDEX IF NOT EXISTS idx_leituras_maquina_instante ON leituras (id_maquina, instante)',
+        'CREATE INDEX IF NOT EXISTS idx_leituras_ordem_instante ON leituras (id_ordem, instante)',
+        'CREATE INDEX IF NOT EXISTS idx_leituras_instante ON leituras (instante)',
+    ],
+]
+
+SQL_INSERIR_LEITURA = '''
+    INSERT INTO leituras (id_maquina, id_ordem, instante, distancia, folhas)
+    VALUES (?, ?, ?, ?, ?)
+'''
+SQL_INSERIR_LEITURA_INVALIDA = '''
+    INSERT INTO leituras_invalidas (codMaquina, ordemProducao, dataHora, distancia, folhas)
+    VALUES (?, ?, ?, ?, ?)
+'''
 
 class DatabaseManager:
-    def __init__(self, db_path='../database/enfesto.db'):
+    def __init__(self, db_path='../database/enfesto.db', tamanho_lote=TAMANHO_LOTE, intervalo_flush=INTERVALO_FLUSH,
+                 otimizado=False, pragmas=None, num_leitores=NUM_LEITORES):
         self.db_path = db_path
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_flush = intervalo_flush
+        self._buffer = []
+        self._inicio_buffer = None
+        self._nivel_transacao = 0
         self.conexao = sqlite3.connect(self.db_path)
         self.cursor = self.conexao.cursor()
+
+        # Pragmas do modo otimizado (WAL) e pool de conexões somente-leitura
+        self.pragmas = {}
+        if otimizado:
+            self.pragmas.update(PRAGMAS_OTIMIZADOS)
+        self.pragmas.update(pragmas or {})
+        self.__aplicar_pragmas(self.conexao, self.pragmas)
+
+        self.num_leitores = num_leitores if otimizado and db_path != ':memory:' else 0
+        self._pool = queue.LifoQueue()
+        self._leitores_criados = 0
+        self._ids_codigos = {tipo: {} for tipo in SQL_CODIGOS}   # cache código -> id
+
         self.__criar_tabela()
+        self.__migrar_schema()
         print(f"Banco conectado em: {self.db_path}")
 
     def __enter__(self):
@@ -15,6 +333,50 @@ class DatabaseManager:
     def __exit__(self, exc_type, exc_value, traceback):
         self.fechar()
 
+    @staticmethod
+    def __aplicar_pragmas(conexao, pragmas):
+        for nome, valor in pragmas.items():
+            if nome not in PRAGMAS_OTIMIZADOS:
+                raise ValueError(f"Pragma não suportado: {nome}")
+            conexao.execute(f"PRAGMA {nome} = {valor}")
+
+    def __abrir_leitor(self):
+        uri = Path(self.db_path).resolve().as_uri() + '?mode=ro'
+        conexao = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self.__aplicar_pragmas(conexao, {k: v for k, v in self.pragmas.items() if k in PRAGMAS_LEITURA})
+        conexao.execute('PRAGMA query_only = ON')
+        return conexao
+
+    @contextmanager
+    def conexao_leitura(self):
+        """
+        Empresta uma conexão somente-leitura do pool (modo otimizado), para que
+        consultas longas de análise não bloqueiem a gravação das leituras.
+        Sem pool, devolve a própria conexão de escrita.
+        """
+        if self.num_leitores == 0:
+            yield self.conexao
+            return
+
+        try:
+            conexao = self._pool.get_nowait()
+        except queue.Empty:
+            if self._leitores_criados < self.num_leitores:
+                self._leitores_criados += 1
+                conexao = self.__abrir_leitor()
+            else:
+                conexao = self._pool.get()
+        try:
+            yield conexao
+        finally:
+            self._pool.put(conexao)
+
+    def consultar(self, sql, parametros=()):
+        """Executa uma consulta de leitura (após gravar o buffer) e devolve todas as linhas."""
+        self.flush()
+        with self.conexao_leitura() as conexao:
+            return conexao.execute(sql, parametros).fetchall()
+
     def __criar_tabela(self):
         try:
             self.cursor.execute('''
@@ -32,74 +394,499 @@ class DatabaseManager:
         except sqlite3.Error as e:
             print(f"Erro ao criar tabela: {e}")
 
+    def __migrar_schema(self):
+        try:
+            versao = self.conexao.execute('PRAGMA user_version').fetchone()[0]
+            for nova_versao, comandos in enumerate(MIGRACOES[versao:], start=versao + 1):
+                for comando in comandos:
+                    self.cursor.execute(comando)
+                self.cursor.execute(f'PRAGMA user_version = {nova_versao}')
+                self.conexao.commit()
+                print(f"Esquema migrado para a versão {nova_versao}.")
+        except sqlite3.Error as e:
+            self.conexao.rollback()
+            print(f"Erro ao migrar esquema: {e}")
+
     def inserir_leitura(self, codMaquina, ordemProducao, dataHora, distancia, folhas):
+        """Enfileira uma leitura no buffer; a gravação ocorre em lote."""
+        self.inserir_leituras([(codMaquina, ordemProducao, dataHora, distancia, folhas)])
+
+    def inserir_leituras(self, leituras):
+        """
+        Enfileira várias leituras (tuplas codMaquina, ordemProducao, dataHora,
+        distancia, folhas). O buffer é gravado com executemany quando atinge
+        `tamanho_lote` linhas ou quando a leitura mais antiga passa de
+        `intervalo_flush` segundos.
+        """
+        if not self._buffer:
+            self._inicio_buffer = time.monotonic()
+        self._buffer.extend(leituras)
+
+        if len(self._buffer) >= self.tamanho_lote:
+            self.flush()
+        else:
+            self.flush_se_vencido()
+
+    def flush_se_vencido(self):
+        """
+        Grava o buffer se a leitura mais antiga já passou de `intervalo_flush`
+        segundos. Laços de leitura chamam a cada volta, para que uma linha
+        ociosa não deixe leituras paradas no buffer.
+        """
+        if self._buffer and time.monotonic() - self._inicio_buffer >= self.intervalo_flush:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        """
+        Grava imediatamente todas as leituras pendentes no buffer. Fora de
+        transacao(), um lote com leituras recusadas pelo banco (tipo errado,
+        NOT NULL) é regravado em partes e só as recusadas são descartadas; um
+        banco ocupado desfaz o lote e o devolve ao buffer. Dentro de
+        transacao(), o erro é propagado para que o bloco inteiro seja desfeito.
+        """
+        if not self._buffer:
+            return 0
+        lote, self._buffer = self._buffer, []
+        self._inicio_buffer = None
         try:
-            self.cursor.execute('''
-                INSERT INTO leituras (codMaquina, ordemProducao, dataHora, distancia, folhas)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (codMaquina, ordemProducao, dataHora, distancia, folhas))
-            self.conexao.commit()
-            print(f"Leitura inserida com sucesso: {codMaquina} | OP={ordemProducao} | {distancia}cm | folhas={folhas}")
+            inicio = time.perf_counter()
+            gravadas = self.__gravar_ou_separar(lote)
+            self._commit()
+            TEMPO_COMMIT.observar(time.perf_counter() - inicio)
+            LEITURAS_INSERIDAS.incrementar(gravadas)
+            LOTES_GRAVADOS.incrementar()
+            # Um lote a cada TAMANHO_LOTE leituras: só aparece com o log em DEBUG
+            logging.debug("Lote de %d leituras inserido com sucesso.", gravadas)
+            return gravadas
+        except sqlite3.Error as e:
+            if self._nivel_transacao > 0:
+                raise
+            self.__desfazer()
+            if isinstance(e, sqlite3.OperationalError):
+                # Banco ocupado/travado: o lote foi desfeito aqui e volta ao
+                # buffer para a próxima tentativa
+                self._buffer = lote + self._buffer
+                self._inicio_buffer = time.monotonic()
+                print(f"Erro ao inserir lote de leituras (será reenviado): {e}")
+            else:
+                print(f"Erro ao inserir lote de leituras: {e}")
+            return 0
+
+    def __gravar_lote(self, lote):
+        linhas, validas, invalidas = self.__codificar_lote(lote)
+        self.cursor.executemany(SQL_INSERIR_LEITURA, linhas)
+        if invalidas:
+            self.cursor.executemany(SQL_INSERIR_LEITURA_INVALIDA, invalidas)
+        self.__acumular_resumos(validas)
+
+    def __gravar_ou_separar(self, lote):
+        """Grava o lote; se o banco recusar alguma leitura, regrava-o em partes. Devolve quantas foram gravadas."""
+        try:
+            self.__gravar_lote(lote)
+            return len(lote)
+        except sqlite3.OperationalError:
+            raise
         except sqlite3.Error as e:
-            print(f"Erro ao inserir leitura: {e}")
+            if self._nivel_transacao > 0:
+                raise
+            self.__desfazer()
+            print(f"Lote de {len(lote)} leituras recusado ({e}); separando as leituras inválidas.")
+            # Uma única transação: as partes só são confirmadas juntas, no commit do flush
+            self.cursor.execute('BEGIN')
+            return self.__gravar_em_partes(lote)
+
+    def __gravar_em_partes(self, lote):
+        """
+        Grava o lote num SAVEPOINT; se ele for recusado, desfaz só o savepoint
+        e tenta cada metade, até isolar e descartar as leituras recusadas.
+        """
+        self.cursor.execute('SAVEPOINT lote')
+        try:
+            self.__gravar_lote(lote)
+            self.cursor.execute('RELEASE lote')
+            return len(lote)
+        except sqlite3.OperationalError:
+            raise
+        except sqlite3.Error as e:
+            self.cursor.execute('ROLLBACK TO lote')
+            self.cursor.execute('RELEASE lote')
+            # Códigos cadastrados no savepoint desfeito não existem mais
+            self._ids_codigos = {tipo: {} for tipo in SQL_CODIGOS}
+            if len(lote) == 1:
+                LEITURAS_REJEITADAS.incrementar()
+                logging.error("Leitura recusada pelo banco e descartada: %r (%s)", lote[0], e)
+                return 0
+            meio = len(lote) // 2
+            return self.__gravar_em_partes(lote[:meio]) + self.__gravar_em_partes(lote[meio:])
+
+    def __codificar_lote(self, lote):
+        """
+        Converte o lote para o formato de `leituras` (ids e instante). Devolve
+        (linhas, leituras válidas com a dataHora normalizada, leituras com
+        dataHora inválida).
+        """
+        maquinas, ordens = self._ids_codigos['maquina'], self._ids_codigos['ordem']
+        instantes = {}  # várias leituras (e máquinas) por segundo: converte cada dataHora uma vez
+        linhas, validas, invalidas = [], [], []
+        for leitura in lote:
+            codMaquina, ordemProducao, dataHora, distancia, folhas = leitura
+            convertido = instantes.get(dataHora)
+            if convertido is None:
+                convertido = instantes[dataHora] = instante_leitura(dataHora)
+            if convertido is None:
+                invalidas.append((codMaquina, ordemProducao, str(dataHora), distancia, folhas))
+                continue
+            instante, dataHora = convertido
+            id_maquina = maquinas.get(codMaquina) or self.id_codigo('maquina', codMaquina, cadastrar=True)
+            id_ordem = ordens.get(ordemProducao) or self.id_codigo('ordem', ordemProducao, cadastrar=True)
+            linhas.append((id_maquina, id_ordem, instante, distancia, folhas))
+            validas.append((codMaquina, ordemProducao, dataHora, folhas))
+        return linhas, validas, invalidas
+
+    def id_codigo(self, tipo, codigo, cadastrar=False):
+        """
+        Id de um código de máquina (`tipo` 'maquina') ou de ordem ('ordem'),
+        guardado em cache. Com `cadastrar`, insere o código se ele ainda não
+        existir (na transação de escrita corrente); sem, devolve None.
+        """
+        ids = self._ids_codigos[tipo]
+        if codigo in ids:
+            return ids[codigo]
+        sql = SQL_CODIGOS[tipo]
+        if cadastrar:
+            self.cursor.execute(sql['cadastrar'], (codigo,))
+            linha = self.cursor.execute(sql['buscar'], (codigo,)).fetchone()
+        else:
+            linha = next(iter(self.consultar(sql['buscar'], (codigo,))), None)
+        if linha is None:
+            return None
+        ids[codigo] = linha[0]
+        return linha[0]
+
+    def codigos(self):
+        """{'maquina': {id: código}, 'ordem': {id: código}}, para decodificar leituras."""
+        return {tipo: dict(self.consultar(sql['listar'])) for tipo, sql in SQL_CODIGOS.items()}
+
+    def __desfazer(self):
+        self.conexao.rollback()
+        # Códigos cadastrados na transação desfeita não existem mais
+        self._ids_codigos = {tipo: {} for tipo in SQL_CODIGOS}
+
+    def __acumular_resumos(self, validas):
+        # Agrega o lote em memória: um upsert por grupo, não por leitura
+        por_ordem, por_dia = {}, {}
+        for codMaquina, ordemProducao, dataHora, folhas in validas:
+            grupo = por_ordem.get((ordemProducao, codMaquina))
+            if grupo is None:
+                por_ordem[(ordemProducao, codMaquina)] = [dataHora, dataHora, folhas]
+            else:
+                grupo[0] = min(grupo[0], dataHora)
+                grupo[1] = max(grupo[1], dataHora)
+                grupo[2] = max(grupo[2], folhas)
+
+            grupo = por_dia.get((dataHora[:10], codMaquina, ordemProducao))
+            if grupo is None:
+                por_dia[(dataHora[:10], codMaquina, ordemProducao)] = [1, folhas]
+            else:
+                grupo[0] += 1
+                grupo[1] = max(grupo[1], folhas)
+
+        self.cursor.executemany(SQL_ACUMULAR_RESUMO_ORDEM, [chave + tuple(v) for chave, v in por_ordem.items()])
+        self.cursor.executemany(SQL_ACUMULAR_RESUMO_DIA, [chave + tuple(v) for chave, v in por_dia.items()])
+
+    def __recalcular_resumos(self, codMaquina, ordemProducao, dataHora):
+        # Máximos não podem ser "desfeitos" incrementalmente: recalcula só os grupos afetados
+        self.cursor.execute('DELETE FROM resumo_ordem WHERE ordemProducao = ? AND codMaquina = ?',
+                            (ordemProducao, codMaquina))
+        self.cursor.execute('INSERT INTO resumo_ordem ' + sql_agregado(SQL_AGREGAR_RESUMO_ORDEM, FILTRO_GRUPO_ORDEM),
+                            (ordemProducao, codMaquina))
+
+        data = str(dataHora)[:10]
+        self.cursor.execute('DELETE FROM resumo_dia WHERE data = ? AND codMaquina = ? AND ordemProducao = ?',
+                            (data, codMaquina, ordemProducao))
+        self.cursor.execute('INSERT INTO resumo_dia ' + sql_agregado(SQL_AGREGAR_RESUMO_DIA, FILTRO_GRUPO_DIA),
+                            (ordemProducao, codMaquina, data, data))
+
+    def reconstruir_resumos(self):
+        """
+        Recalcula as tabelas de resumo a partir das leituras brutas e devolve,
+        por tabela, quantas linhas divergiam do resumo mantido incrementalmente.
+        """
+        divergencias = {}
+        with self.transacao():
+            for tabela, sql_resumo in RESUMOS.items():
+                self.cursor.execute('DROP TABLE IF EXISTS temp.recalculo')
+                self.cursor.execute('CREATE TEMP TABLE recalculo AS ' + sql_agregado(sql_resumo))
+                faltando = self.cursor.execute(
+                    f'SELECT COUNT(*) FROM (SELECT * FROM temp.recalculo EXCEPT SELECT * FROM {tabela})').fetchone()[0]
+                sobrando = self.cursor.execute(
+                    f'SELECT COUNT(*) FROM (SELECT * FROM {tabela} EXCEPT SELECT * FROM temp.recalculo)').fetchone()[0]
+                divergencias[tabela] = faltando + sobrando
+
+                self.cursor.execute(f'DELETE FROM {tabela}')
+                self.cursor.execute(f'INSERT INTO {tabela} SELECT * FROM temp.recalculo')
+                self.cursor.execute('DROP TABLE temp.recalculo')
+        print(f"Resumos reconstruídos. Divergências encontradas: {divergencias}")
+        return divergencias
+
+    def _commit(self):
+        # Dentro de transacao() o commit fica para o fim do bloco
+        if self._nivel_transacao == 0:
+            self.conexao.commit()
+
+    @contextmanager
+    def transacao(self):
+        """
+        Escopo transacional: tudo o que for gravado dentro do bloco é
+        confirmado com um único commit na saída, ou desfeito em caso de erro.
+        """
+        self.flush()
+        self._nivel_transacao += 1
+        try:
+            yield self
+            self.flush()
+        except Exception:
+            self._nivel_transacao -= 1
+            self._buffer = []
+            self._inicio_buffer = None
+            if self._nivel_transacao == 0:
+                self.__desfazer()
+            raise
+        else:
+            self._nivel_transacao -= 1
+            if self._nivel_transacao == 0:
+                self.conexao.commit()
 
     def buscar_leituras(self):
         try:
-            self.cursor.execute('SELECT * FROM leituras')
-            return self.cursor.fetchall()
+            return self.consultar(SQL_LEITURAS)
         except sqlite3.Error as e:
             print(f"Erro ao buscar leituras: {e}")
             return []
 
     def buscar_por_maquina(self, codMaquina):
         try:
-            self.cursor.execute('SELECT * FROM leituras WHERE codMaquina = ?', (codMaquina,))
-            return self.cursor.fetchall()
+            where, parametros = self._filtros_leituras(codMaquina=codMaquina)
+            return self.consultar(SQL_LEITURAS + where, parametros)
         except sqlite3.Error as e:
             print(f"Erro ao buscar por máquina: {e}")
             return []
 
     def buscar_por_ordem(self, ordemProducao):
         try:
-            self.cursor.execute('SELECT * FROM leituras WHERE ordemProducao = ?', (ordemProducao,))
-            return self.cursor.fetchall()
+            where, parametros = self._filtros_leituras(ordemProducao=ordemProducao)
+            return self.consultar(SQL_LEITURAS + where, parametros)
         except sqlite3.Error as e:
             print(f"Erro ao buscar por ordem: {e}")
             return []
 
-    def buscar_por_data_range(self, data_inicio, data_fim):
+    def _filtros_leituras(self, codMaquina=None, ordemProducao=None, data_inicio=None, data_fim=None):
+        """
+        Monta a cláusula WHERE (e seus parâmetros) para os filtros informados.
+        Máquina e ordem viram ids (um código desconhecido não casa com nenhuma
+        leitura) e os limites de data viram instantes, calculados uma vez no
+        SQL, para que a busca use os índices (id, instante).
+        """
+        filtros, parametros = [], []
+        if ordemProducao is not None:
+            filtros.append('l.id_ordem = ?')
+            parametros.append(self.id_codigo('ordem', ordemProducao))
+        if codMaquina is not None:
+            filtros.append('l.id_maquina = ?')
+            parametros.append(self.id_codigo('maquina', codMaquina))
+        if data_inicio is not None:
+            filtros.append("l.instante >= CAST(strftime('%s', ?) AS INTEGER)")
+            parametros.append(str(data_inicio))
+        if data_fim is not None:
+            filtros.append("l.instante <= CAST(strftime('%s', ?) AS INTEGER)")
+            parametros.append(str(data_fim))
+        where = (' WHERE ' + ' AND '.join(filtros)) if filtros else ''
+        return where, parametros
+
+    def buscar_por_data_range(self, data_inicio, data_fim, codMaquina=None, ordemProducao=None):
+        """Leituras entre data_inicio e data_fim (inclusive), opcionalmente por máquina/ordem."""
         try:
-            self.cursor.execute('''
-                SELECT * FROM leituras
-                WHERE datetime(dataHora) BETWEEN datetime(?) AND datetime(?)
-            ''', (data_inicio, data_fim))
-            return self.cursor.fetchall()
+            where, parametros = self._filtros_leituras(codMaquina, ordemProducao, data_inicio, data_fim)
+            return self.consultar(SQL_LEITURAS + where, parametros)
         except sqlite3.Error as e:
             print(f"Erro ao buscar por período: {e}")
             return []
 
+    def iterar_leituras(self, codMaquina=None, ordemProducao=None, data_inicio=None, data_fim=None,
+                        tamanho_bloco=TAMANHO_BLOCO_LEITURA, ordenar=False, id_apos=None, codificado=False):
+        """
+        Gera as leituras em blocos (listas de tuplas) de até `tamanho_bloco`
+        linhas via fetchmany, sem materializar a tabela inteira. Os filtros
+        são aplicados no SQL; com `ordenar`, vêm em ordem de dataHora/id.
+        Com `id_apos`, só as leituras de id maior, em ordem de id (exportações
+        incrementais). Com `codificado`, as tuplas trazem os ids de máquina e
+        ordem e o instante inteiro no lugar dos códigos e da dataHora em texto
+        (decodificar com `codigos()`).
+        """
+        where, parametros = self._filtros_leituras(codMaquina, ordemProducao, data_inicio, data_fim)
+        if id_apos is not None:
+            where += (' AND ' if where else ' WHERE ') + 'l.id > ?'
+            parametros.append(id_apos)
+        if ordenar:
+            where += ' ORDER BY l.instante, l.id'
+        elif id_apos is not None:
+            where += ' ORDER BY l.id'
+        self.flush()
+        with self.conexao_leitura() as conexao:
+            cursor = conexao.execute((SQL_LEITURAS_CODIFICADAS if codificado else SQL_LEITURAS) + where, parametros)
+            try:
+                while True:
+                    bloco = cursor.fetchmany(tamanho_bloco)
+                    if not bloco:
+                        break
+                    yield bloco
+            finally:
+                cursor.close()
+
+    def __grupo_da_leitura(self, id):
+        linha = self.cursor.execute(SQL_LEITURAS + ' WHERE l.id = ?', (id,)).fetchone()
+        return linha[1:4] if linha else None
+
     def atualizar_leitura(self, id, distancia, folhas):
+        self.flush()
         try:
+            grupo = self.__grupo_da_leitura(id)
             self.cursor.execute('''
                 UPDATE leituras
                 SET distancia = ?, folhas = ?
                 WHERE id = ?
             ''', (distancia, folhas, id))
-            self.conexao.commit()
+            if grupo:
+                self.__recalcular_resumos(*grupo)
+            self._commit()
             print(f"Leitura atualizada (ID={id}) com novos dados.")
         except sqlite3.Error as e:
             print(f"Erro ao atualizar leitura: {e}")
 
     def deletar_leitura(self, id):
+        self.flush()
         try:
+            grupo = self.__grupo_da_leitura(id)
             self.cursor.execute('DELETE FROM leituras WHERE id = ?', (id,))
-            self.conexao.commit()
+            if grupo:
+                self.__recalcular_resumos(*grupo)
+            self._commit()
             print(f"Leitura deletada (ID={id}).")
         except sqlite3.Error as e:
             print(f"Erro ao deletar leitura: {e}")
 
+    def atualizar_folhas(self, codMaquina, ordemProducao, folhas_por_id):
+        """
+        Regrava a coluna folhas de uma máquina/ordem a partir de pares
+        (folhas, id) e recalcula os resumos desse grupo (todos os dias).
+        """
+        self.flush()
+        try:
+            with self.transacao():
+                self.cursor.executemany('UPDATE leituras SET folhas = ? WHERE id = ?', folhas_por_id)
+                self.cursor.execute('DELETE FROM resumo_ordem WHERE ordemProducao = ? AND codMaquina = ?',
+                                    (ordemProducao, codMaquina))
+                self.cursor.execute('INSERT INTO resumo_ordem ' + sql_agregado(SQL_AGREGAR_RESUMO_ORDEM, FILTRO_GRUPO_ORDEM),
+                                    (ordemProducao, codMaquina))
+                self.cursor.execute('DELETE FROM resumo_dia WHERE ordemProducao = ? AND codMaquina = ?',
+                                    (ordemProducao, codMaquina))
+                self.cursor.execute('INSERT INTO resumo_dia ' + sql_agregado(SQL_AGREGAR_RESUMO_DIA, FILTRO_GRUPO_ORDEM),
+                                    (ordemProducao, codMaquina))
+            print(f"Folhas regravadas: {codMaquina} | OP={ordemProducao}")
+        except sqlite3.Error as e:
+            print(f"Erro ao atualizar folhas: {e}")
+
+    def maior_id_leitura(self):
+        return self.consultar('SELECT MAX(id) FROM leituras')[0][0] or 0
+
+    def buscar_trechos_compactados(self, codMaquina, ordemProducao):
+        """(distancia_min, distancia_max, folhas) dos trechos compactados de uma máquina/ordem, em ordem de início."""
+        try:
+            return self.consultar('''
+                SELECT distancia_min, distancia_max, folhas FROM leituras_compactadas
+                WHERE codMaquina = ? AND ordemProducao = ?
+                ORDER BY inicio, id
+            ''', (codMaquina, ordemProducao))
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar trechos compactados: {e}")
+            return []
+
+    def iterar_leituras_compactaveis(self, ultimo_id, data_fim, tamanho_bloco=TAMANHO_BLOCO_LEITURA):
+        """
+        Gera em blocos as leituras brutas que compactar_leituras removeria
+        (id <= `ultimo_id`, até `data_fim`), agrupadas por máquina/ordem e em
+        ordem de dataHora dentro de cada grupo.
+        """
+        self.flush()
+        with self.conexao_leitura() as conexao:
+            cursor = conexao.execute(
+                SQL_LEITURAS + FILTRO_COMPACTAVEIS + ' ORDER BY l.id_maquina, l.id_ordem, l.instante, l.id',
+                (ultimo_id, str(data_fim))
+            )
+            try:
+                while True:
+                    bloco = cursor.fetchmany(tamanho_bloco)
+                    if not bloco:
+                        break
+                    yield bloco
+            finally:
+                cursor.close()
+
+    def compactar_leituras(self, trechos, ultimo_id, data_fim, tamanho_bloco=TAMANHO_BLOCO_LEITURA):
+        """
+        Substitui, numa única transação, as leituras brutas até `data_fim`
+        (com id <= `ultimo_id`) pelos `trechos`, no formato de
+        leituras_compactadas. `trechos` pode ser um gerador: é consumido em
+        blocos de `tamanho_bloco`, sem materializar a janela inteira. Os resumos
+        não mudam, pois as agregações somam leituras brutas e trechos. Retorna
+        (leituras brutas removidas, trechos gravados).
+        """
+        self.flush()
+        trechos = iter(trechos)
+        try:
+            with self.transacao():
+                gravados = 0
+                for bloco in iter(lambda: list(islice(trechos, tamanho_bloco)), []):
+                    self.cursor.executemany(SQL_INSERIR_COMPACTADA, bloco)
+                    gravados += len(bloco)
+                removidas = self.cursor.execute(
+                    'DELETE FROM leituras' + FILTRO_COMPACTAVEIS, (ultimo_id, str(data_fim))
+                ).rowcount if gravados else 0
+            if gravados:
+                print(f"Leituras compactadas: {removidas} leituras brutas em {gravados} trechos.")
+            return removidas, gravados
+        except sqlite3.Error as e:
+            print(f"Erro ao compactar leituras: {e}")
+            return 0, 0
+
+    def registrar_producao(self, semana, setor, recurso, tecido, turno, quantidade):
+        """Grava (ou substitui) a quantidade realizada de um recurso numa semana."""
+        try:
+            self.cursor.execute('''
+                INSERT INTO producao_realizada (semana, setor, recurso, tecido, turno, quantidade)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (semana, setor, recurso, tecido, turno) DO UPDATE SET quantidade = excluded.quantidade
+            ''', (semana, setor, recurso, tecido, turno, quantidade))
+            self._commit()
+            print(f"Produção registrada: S{semana} | {setor} | {recurso} | {tecido} | {turno} = {quantidade}")
+        except sqlite3.Error as e:
+            print(f"Erro ao registrar produção: {e}")
+
+    def buscar_producao_realizada(self, ate_semana=None):
+        try:
+            if ate_semana is None:
+                return self.consultar('SELECT * FROM producao_realizada ORDER BY semana')
+            return self.consultar('SELECT * FROM producao_realizada WHERE semana <= ? ORDER BY semana', (ate_semana,))
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar produção realizada: {e}")
+            return []
+
     def fechar(self):
         try:
+            self.flush()
+            while not self._pool.empty():
+                self._pool.get_nowait().close()
             self.conexao.close()
             print("Conexão com banco encerrada.")
         except sqlite3.Error as e:
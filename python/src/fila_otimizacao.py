@@ -0,0 +1,224 @@
+"""
+Fila de jobs do otimizador de produção.
+
+Cada otimização roda em um processo separado, fora da thread que atende o
+Dash: o callback recebe um id de job na hora e consulta o andamento depois.
+A fila limita quantos solves rodam ao mesmo tempo, aplica um tempo máximo por
+job, permite cancelar e reaproveita jobs idênticos que ainda estão rodando.
+Cada submissão recebe um id próprio; submissões idênticas apontam para o mesmo
+job, que só é interrompido quando todas forem canceladas.
+"""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+import metricas
+from cache_otimizacao import chave_cenario
+
+NUM_WORKERS = 2             # solves simultâneos
+TIMEOUT_JOB = 300           # segundos até um job ser interrompido
+INTERVALO_VERIFICACAO = 0.2 # segundos entre verificações de resultado/cancelamento
+MAX_JOBS_CONCLUIDOS = 100   # jobs finalizados mantidos para consulta
+
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+CANCELADO = 'cancelado'
+EXPIRADO = 'expirado'
+ESTADOS_FINAIS = (CONCLUIDO, ERRO, CANCELADO, EXPIRADO)
+
+
+def _processo_otimizacao(conexao, funcao, argumentos):
+    """Corpo do processo filho: resolve e devolve o resultado pela conexão."""
+    if hasattr(os, 'setsid'):
+        # Grupo de processos próprio, para que o cancelamento leve junto o CBC
+        os.setsid()
+    try:
+        conexao.send(('ok', funcao(*argumentos)))
+    except Exception as e:
+        conexao.send(('erro', repr(e)))
+    finally:
+        conexao.close()
+
+
+def _encerrar_processo(processo):
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(processo.pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            processo.terminate()
+    else:
+        processo.terminate()
+    processo.join(timeout=5)
+
+
+class FilaOtimizacao:
+    def __init__(self, funcao, num_workers=NUM_WORKERS, timeout=TIMEOUT_JOB, cache=None, ao_concluir=None):
+        """
+        `funcao(*argumentos)` é executada no processo filho e deve ser
+        importável (nível de módulo). Resultados de sucesso vão para `cache`,
+        se informado, e para `ao_concluir(resultado)`, chamada no processo
+        principal (resultados vindos do cache não passam por ela).
+        """
+        self.funcao = funcao
+        self.num_workers = num_workers
+        self.timeout = timeout
+        self.cache = cache
+        self.ao_concluir = ao_concluir
+        self._contexto = multiprocessing.get_context('spawn')
+        self._vagas = threading.Semaphore(num_workers)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._pedidos = {}          # id de cada submissão -> {'job', 'cancelado'}
+        self._em_andamento = {}     # chave do cenário -> id do job
+        for estado in (PENDENTE, EXECUTANDO):
+            metricas.medidor('enfesto_jobs_otimizacao', "Jobs de otimização na fila ou em execução",
+                             funcao=lambda estado=estado: self.contar(estado), estado=estado)
+
+    # --- API ---
+    def submeter(self, *argumentos, chave=None):
+        """
+        Enfileira um cenário e devolve o id desta submissão. Um job idêntico em
+        andamento é reaproveitado: o id novo aponta para ele.
+        """
+        chave = chave or chave_cenario(*argumentos)
+
+        with self._lock:
+            job_id = str(next(self._ids))
+            if chave in self._em_andamento:
+                job = self._jobs[self._em_andamento[chave]]
+                job['submissoes'] += 1
+                self._pedidos[job_id] = {'job': job, 'cancelado': False}
+                return job_id
+            job = {
+                'id': job_id, 'chave': chave, 'estado': PENDENTE, 'criado': time.monotonic(),
+                'inicio': None, 'fim': None, 'resultado': None, 'erro': None,
+                'cancelar': threading.Event(), 'submissoes': 1,
+            }
+            self._jobs[job_id] = job
+            self._pedidos[job_id] = {'job': job, 'cancelado': False}
+
+        resultado = self.cache.obter(chave) if self.cache else None
+        if resultado is not None:
+            self._finalizar(job, CONCLUIDO, resultado=resultado)
+            return job_id
+
+        with self._lock:
+            self._em_andamento[chave] = job_id
+        threading.Thread(target=self._executar, args=(job, argumentos), daemon=True,
+                         name=f"job-otimizacao-{job_id}").start()
+        return job_id
+
+    def status(self, job_id):
+        """Estado do job: id, estado, tempo decorrido (s), resultado e erro."""
+        with self._lock:
+            pedido = self._pedidos.get(job_id)
+            if pedido is None:
+                return None
+            job = pedido['job']
+            referencia = job['fim'] or time.monotonic()
+            return {
+                'id': job_id,
+                'estado': CANCELADO if pedido['cancelado'] else job['estado'],
+                'decorrido_s': referencia - (job['inicio'] or job['criado']),
+                'resultado': job['resultado'],
+                'erro': job['erro'],
+            }
+
+    def contar(self, estado):
+        """Quantos jobs estão no `estado` informado."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job['estado'] == estado)
+
+    def cancelar(self, job_id):
+        """
+        Cancela a submissão `job_id`. O job só é interrompido quando nenhuma
+        outra submissão idêntica o aguarda; se ainda não começou, é finalizado
+        na hora, sem esperar uma vaga.
+        """
+        with self._lock:
+            pedido = self._pedidos.get(job_id)
+            if pedido is None or pedido['cancelado'] or pedido['job']['estado'] in ESTADOS_FINAIS:
+                return False
+            pedido['cancelado'] = True
+            job = pedido['job']
+            job['submissoes'] -= 1
+            if job['submissoes'] > 0:
+                return True
+            job['cancelar'].set()
+            # Submissões novas do mesmo cenário não se juntam a um job cancelado
+            if self._em_andamento.get(job['chave']) == job['id']:
+                del self._em_andamento[job['chave']]
+            pendente = job['estado'] == PENDENTE
+        if pendente:
+            self._finalizar(job, CANCELADO)
+        return True
+
+    # --- Execução ---
+    def _executar(self, job, argumentos):
+        with self._vagas:
+            with self._lock:
+                if job['cancelar'].is_set():
+                    return      # cancelado antes de começar: já finalizado por cancelar()
+                job['estado'] = EXECUTANDO
+                job['inicio'] = time.monotonic()
+
+            receptor, emissor = self._contexto.Pipe(duplex=False)
+            processo = self._contexto.Process(target=_processo_otimizacao,
+                                              args=(emissor, self.funcao, argumentos), daemon=True)
+            processo.start()
+            emissor.close()
+
+            try:
+                while True:
+                    if receptor.poll(INTERVALO_VERIFICACAO):
+                        try:
+                            situacao, valor = receptor.recv()
+                        except EOFError:
+                            situacao, valor = 'erro', f"processo encerrado (código {processo.exitcode})"
+                        processo.join()
+                        if situacao == 'ok':
+                            if self.cache and valor[0] != 'Not Solved':
+                                self.cache.guardar(job['chave'], valor)
+                            if self.ao_concluir:
+                                self.ao_concluir(valor)
+                            self._finalizar(job, CONCLUIDO, resultado=valor)
+                        else:
+                            self._finalizar(job, ERRO, erro=valor)
+                        return
+                    if job['cancelar'].is_set():
+                        _encerrar_processo(processo)
+                        self._finalizar(job, CANCELADO)
+                        return
+                    if self.timeout and time.monotonic() - job['inicio'] > self.timeout:
+                        _encerrar_processo(processo)
+                        self._finalizar(job, EXPIRADO, erro=f"tempo limite de {self.timeout}s excedido")
+                        return
+            finally:
+                receptor.close()
+
+    def _finalizar(self, job, estado, resultado=None, erro=None):
+        with self._lock:
+            job['estado'] = estado
+            job['resultado'] = resultado
+            job['erro'] = erro
+            job['fim'] = time.monotonic()
+            if self._em_andamento.get(job['chave']) == job['id']:
+                del self._em_andamento[job['chave']]
+            self._podar()
+        if estado != CONCLUIDO:
+            logging.warning(f"Job de otimização {job['id']} terminou como '{estado}' {erro or ''}")
+
+    def _podar(self):
+        finalizados = [j for j in self._jobs.values() if j['estado'] in ESTADOS_FINAIS]
+        for job in sorted(finalizados, key=lambda j: j['fim'])[:max(len(finalizados) - MAX_JOBS_CONCLUIDOS, 0)]:
+            del self._jobs[job['id']]
+        if len(self._pedidos) > len(self._jobs):
+            self._pedidos = {i: p for i, p in self._pedidos.items() if p['job']['id'] in self._jobs}
@@ -1,6 +1,5 @@
 import logging
 from db_manager import DatabaseManager
-import analise_dados as ad
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 
@@ -9,52 +8,72 @@ def exibir_menu():
     print("1 - Exibir análise: folhas por ordem de produção")
     print("2 - Exibir análise: produtividade por máquina")
     print("3 - Exibir análise: folhas por dia")
-    print("4 - Exportar CSV/JSON")
+    print("4 - Exportar CSV/NDJSON")
     print("5 - Visualizar gráfico: folhas por ordem")
     print("6 - Visualizar gráfico: produtividade por máquina")
     print("7 - Visualizar gráfico: folhas por dia")
+    print("8 - Reconstruir tabelas de resumo")
+    print("9 - Atualizar arquivo Parquet (incremental)")
     print("0 - Sair")
 
 def main():
-    db = DatabaseManager()
-    df = ad.carregar_dados(db)
+    db = DatabaseManager(otimizado=True)
 
-    if df.empty:
+    # Só confere se há leituras, brutas ou já compactadas pela retenção: os
+    # relatórios consultam o banco e a exportação lê em streaming
+    if not db.consultar('SELECT EXISTS(SELECT 1 FROM leituras) OR EXISTS(SELECT 1 FROM leituras_compactadas)')[0][0]:
         logging.warning("Nenhum dado encontrado no banco.")
+        db.fechar()
         return
 
     while True:
         exibir_menu()
         opcao = input("Escolha uma opção: ")
+        # analise_dados (pandas) e arquivo_leituras (pyarrow) só são importados
+        # pelas opções que usam: o menu abre sem pagar essas importações
+        if opcao in ('1', '2', '3', '4', '5', '6', '7'):
+            import analise_dados as ad
 
         if opcao == '1':
-            resultado = ad.folhas_por_ordem(df)
+            resultado = ad.folhas_por_ordem(db)
             print(resultado.to_string(index=False))
 
         elif opcao == '2':
-            resultado = ad.produtividade_por_maquina(df)
+            resultado = ad.produtividade_por_maquina(db)
             print(resultado.to_string(index=False))
 
         elif opcao == '3':
-            resultado = ad.folhas_por_dia(df)
+            resultado = ad.folhas_por_dia(db)
             print(resultado.to_string(index=False))
 
         elif opcao == '4':
-            ad.exportar_para_csv(df, "leituras.csv")
-            ad.exportar_para_json(df, "leituras.json")
+            ad.exportar_leituras_streaming(db, "leituras.csv", formato='csv')
+            ad.exportar_leituras_streaming(db, "leituras.ndjson", formato='ndjson')
 
         elif opcao == '5':
-            resumo = ad.folhas_por_ordem(df)
+            resumo = ad.folhas_por_ordem(db)
             ad.plot_folhas_por_ordem_plotly(resumo)
 
         elif opcao == '6':
-            resumo = ad.produtividade_por_maquina(df)
+            resumo = ad.produtividade_por_maquina(db)
             ad.plot_produtividade_maquina_plotly(resumo)
 
         elif opcao == '7':
-            resumo = ad.folhas_por_dia(df)
+            resumo = ad.folhas_por_dia(db)
             ad.plot_folhas_por_dia_plotly(resumo)
 
+        elif opcao == '8':
+            divergencias = db.reconstruir_resumos()
+            print(f"Linhas divergentes corrigidas por tabela: {divergencias}")
+
+        elif opcao == '9':
+            try:
+                import arquivo_leituras
+                novas = arquivo_leituras.exportar_incremental(db)
+                print(f"{novas} leitura(s) nova(s) acrescentada(s) em {arquivo_leituras.PASTA_ARQUIVO}")
+            except ImportError as e:
+                logging.error(e)
+
         elif opcao == '0':
             print("Encerrando...")
             break
@@ -0,0 +1,239 @@
+"""
+Métricas de execução: contadores, histogramas de latência e medidores.
+
+Os pontos quentes (leitura serial, gravação dos lotes, relatórios do
+analise_dados e construção/resolução do PuLP) registram aqui em vez de
+imprimir a cada linha. Cada métrica é criada uma vez (no carregamento do
+módulo ou no construtor de quem a usa) e atualizada por lote ou por chamada,
+com custo de uma soma sob lock.
+
+As métricas do processo podem ser lidas de duas formas:
+- texto no formato do Prometheus, servido em http://127.0.0.1:<porta>/metrics
+  por `iniciar_servidor_metricas` (ou pela rota /metrics do dashboard);
+- uma linha de log periódica com `registrar_periodicamente`.
+
+Só usa a biblioteca padrão. As métricas ficam no processo que as registrou:
+jobs executados em processos filhos informam seus tempos ao processo principal
+pelo resultado (ver FilaOtimizacao).
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+PORTA_METRICAS = 8052
+INTERVALO_LOG_METRICAS = 60     # segundos entre as linhas de log periódicas
+# Limites dos baldes dos histogramas (segundos): de 0,5 ms a 1 min
+LIMITES_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TIPO_CONTEUDO = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _formatar_rotulos(rotulos, extra=None):
+    pares = list(rotulos) + ([extra] if extra else [])
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nome}="{valor}"' for nome, valor in pares) + '}'
+
+
+class Contador:
+    tipo = 'counter'
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self.valor = 0
+        self._lock = threading.Lock()
+
+    def incrementar(self, quantidade=1):
+        with self._lock:
+            self.valor += quantidade
+
+    def linhas_prometheus(self):
+        return [f"{self.nome}{_formatar_rotulos(self.rotulos)} {self.valor}"]
+
+    def resumo(self):
+        return str(self.valor)
+
+
+class Medidor:
+    """Valor instantâneo. Com `funcao`, o valor é lido dela só na hora da coleta."""
+    tipo = 'gauge'
+
+    def __init__(self, nome, ajuda, rotulos=(), funcao=None):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self.funcao = funcao
+        self.valor = 0
+
+    def definir(self, valor):
+        self.valor = valor
+
+    def ler(self):
+        if self.funcao is None:
+            return self.valor
+        try:
+            return self.funcao()
+        except Exception:
+            return float('nan')
+
+    def linhas_prometheus(self):
+        return [f"{self.nome}{_formatar_rotulos(self.rotulos)} {self.ler()}"]
+
+    def resumo(self):
+        return str(self.ler())
+
+
+class Histograma:
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, rotulos=(), limites=LIMITES_LATENCIA):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self.limites = tuple(limites)
+        self.baldes = [0] * (len(self.limites) + 1)    # o último é o +Inf
+        self.soma = 0.0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def observar(self, valor):
+        indice = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            self.baldes[indice] += 1
+            self.soma += valor
+            self.total += 1
+
+    @contextmanager
+    def cronometrar(self):
+        """Observa o tempo (s) gasto dentro do bloco `with`."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio)
+
+    def linhas_prometheus(self):
+        with self._lock:
+            baldes, soma, total = list(self.baldes), self.soma, self.total
+        linhas, acumulado = [], 0
+        for limite, contagem in zip(self.limites + ('+Inf',), baldes):
+            acumulado += contagem
+            linhas.append(f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, ('le', limite))} {acumulado}")
+        rotulos = _formatar_rotulos(self.rotulos)
+        linhas.append(f"{self.nome}_sum{rotulos} {soma}")
+        linhas.append(f"{self.nome}_count{rotulos} {total}")
+        return linhas
+
+    def resumo(self):
+        media = self.soma / self.total if self.total else 0.0
+        return f"{self.total}x{media * 1000:.1f}ms"
+
+
+class RegistroMetricas:
+    """Métricas do processo, indexadas por nome e rótulos (a mesma chave devolve a mesma métrica)."""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _obter(self, classe, nome, ajuda, rotulos, **opcoes):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            metrica = self._metricas.get(chave)
+            if metrica is None:
+                metrica = self._metricas[chave] = classe(nome, ajuda, chave[1], **opcoes)
+            elif not isinstance(metrica, classe):
+                raise ValueError(f"Métrica '{nome}' já registrada como {metrica.tipo}")
+            return metrica
+
+    def contador(self, nome, ajuda, **rotulos) -> Contador:
+        return self._obter(Contador, nome, ajuda, rotulos)
+
+    def medidor(self, nome, ajuda, funcao=None, **rotulos) -> Medidor:
+        medidor = self._obter(Medidor, nome, ajuda, rotulos)
+        if funcao is not None:
+            medidor.funcao = funcao
+        return medidor
+
+    def histograma(self, nome, ajuda, limites=LIMITES_LATENCIA, **rotulos) -> Histograma:
+        return self._obter(Histograma, nome, ajuda, rotulos, limites=limites)
+
+    def texto_prometheus(self):
+        """Todas as métricas no formato de exposição em texto do Prometheus."""
+        with self._lock:
+            metricas = sorted(self._metricas.values(), key=lambda m: (m.nome, m.rotulos))
+        linhas, anterior = [], None
+        for metrica in metricas:
+            if metrica.nome != anterior:
+                linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+                linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+                anterior = metrica.nome
+            linhas.extend(metrica.linhas_prometheus())
+        return '\n'.join(linhas) + '\n'
+
+    def linha_resumo(self):
+        """Uma linha com o valor de cada métrica (histogramas: observações x média)."""
+        with self._lock:
+            metricas = sorted(self._metricas.values(), key=lambda m: (m.nome, m.rotulos))
+        return ' | '.join(f"{m.nome}{_formatar_rotulos(m.rotulos)}={m.resumo()}" for m in metricas)
+
+
+# Registro padrão do processo
+METRICAS = RegistroMetricas()
+contador = METRICAS.contador
+medidor = METRICAS.medidor
+histograma = METRICAS.histograma
+
+
+def cronometrado(metrica: Histograma):
+    """Decorador: observa em `metrica` a duração de cada chamada da função."""
+    def decorador(funcao):
+        @wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with metrica.cronometrar():
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def iniciar_servidor_metricas(porta=PORTA_METRICAS, host='127.0.0.1', registro=METRICAS):
+    """Serve /metrics (texto do Prometheus) numa thread daemon. Devolve o servidor."""
+    # Importado aqui: quem só registra métricas não paga pelo http.server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Manipulador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            corpo = registro.texto_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', TIPO_CONTEUDO)
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, formato, *args):
+            pass    # sem uma linha de log por coleta
+
+    servidor = ThreadingHTTPServer((host, porta), Manipulador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True, name='servidor-metricas').start()
+    return servidor
+
+
+def registrar_periodicamente(intervalo=INTERVALO_LOG_METRICAS, registro=METRICAS):
+    """Escreve `registro.linha_resumo()` no log a cada `intervalo` segundos (thread daemon)."""
+    def laco():
+        while True:
+            time.sleep(intervalo)
+            logging.info(f" Métricas: {registro.linha_resumo()}")
+
+    thread = threading.Thread(target=laco, daemon=True, name='log-metricas')
+    thread.start()
+    return thread
@@ -9,14 +9,19 @@ horário normal e extra, respeitando restrições que podem ser ajustadas pelo u
 
 """
 
+import numpy as np
 import pandas as pd
-from pulp import LpProblem, LpMinimize, LpVariable, lpSum, LpStatus
 import logging
+import os
+import tempfile
+import time
+from collections import defaultdict
 from datetime import date, timedelta
-import dash
-import dash_bootstrap_components as dbc
-from dash import dcc, html, Input, Output, State, dash_table
-import plotly.express as px
+
+from cache_otimizacao import CacheOtimizacao, chave_cenario
+from resultado_plano import ResultadoPlano, COLUNAS_TABELA
+from fila_otimizacao import FilaOtimizacao, NUM_WORKERS, TIMEOUT_JOB, PENDENTE, EXECUTANDO, CONCLUIDO
+from metricas import METRICAS, TIPO_CONTEUDO, histograma
 
 # --- 1. CONFIGURAÇÃO INICIAL E DADOS PADRÃO ---
 
@@ -57,33 +62,53 @@ CAPACIDADE_COSTURA = {
 
 
 # --- 2. LÓGICA DE OTIMIZAÇÃO (CORE) ---
+# Mudanças no modelo ou no formato dos resultados: incrementar
+# cache_otimizacao.VERSAO_MODELO, para não servir planos antigos do cache.
 
-def executar_otimizacao_producao(demanda, capacidade_corte_input, capacidade_costura_input):
+def construir_modelo(demanda, capacidade_corte_input, capacidade_costura_input, semanas=None, entrega_tecidos_perc=None,
+                     semanas_fixas=()):
     """
-    Executa o modelo de otimização com base nos parâmetros fornecidos.
+    Monta o modelo de PL. Retorna (model, corte_vars, costura_vars).
+
+    As variáveis são agrupadas por (semana, tecido) na criação, e os totais
+    acumulados de corte/costura são variáveis auxiliares encadeadas semana a
+    semana: cada restrição tem tamanho proporcional aos recursos de uma semana,
+    e o modelo cresce linearmente com o horizonte.
+
+    Semanas em `semanas_fixas` já foram executadas: entram nos acumulados e na
+    demanda, mas sem restrições de capacidade, tecido e fluxo (o realizado é fato).
     """
-    logging.info("Iniciando o sistema de otimização de produção...")
+    from pulp import LpProblem, LpMinimize, LpVariable, lpSum
+
+    semanas = semanas or SEMANAS
+    entrega_tecidos_perc = entrega_tecidos_perc or ENTREGA_TECIDOS_PERC
 
     # Pré-processamento dos dados
     disponibilidade_tecido = {}
-    for tecido, percentuais in ENTREGA_TECIDOS_PERC.items():
-        disponibilidade_tecido[tecido] = [sum(percentuais[:i+1]) * demanda[tecido] for i in range(len(SEMANAS))]
+    for tecido, percentuais in entrega_tecidos_perc.items():
+        disponibilidade_tecido[tecido] = [sum(percentuais[:i+1]) * demanda[tecido] for i in range(len(semanas))]
 
     model = LpProblem("Otimizacao_Producao_Textil", LpMinimize)
 
     # Definição das variáveis de decisão
     corte_vars, costura_vars = {}, {}
+    corte_por_semana = defaultdict(list)      # (semana, tecido) -> variáveis de corte
+    costura_por_semana = defaultdict(list)    # (semana, tecido) -> variáveis de costura
     turnos = ['normal', 'extra']
     
-    for s in SEMANAS:
+    for s in semanas:
         for maq, dados in capacidade_corte_input.items():
             for tecido in dados['tipo_tecido']:
                 for turno in turnos:
-                    corte_vars[(s, maq, tecido, turno)] = LpVariable(f"Corte_S{s}_{maq}_{tecido}_{turno}", lowBound=0, cat='Integer')
+                    var = LpVariable(f"Corte_S{s}_{maq}_{tecido}_{turno}", lowBound=0, cat='Integer')
+                    corte_vars[(s, maq, tecido, turno)] = var
+                    corte_por_semana[(s, tecido)].append(var)
         for of, dados in capacidade_costura_input.items():
             for tecido in dados['tipo_tecido']:
                 for turno in turnos:
-                    costura_vars[(s, of, tecido, turno)] = LpVariable(f"Costura_S{s}_{of}_{tecido}_{turno}", lowBound=0, cat='Integer')
+                    var = LpVariable(f"Costura_S{s}_{of}_{tecido}_{turno}", lowBound=0, cat='Integer')
+                    costura_vars[(s, of, tecido, turno)] = var
+                    costura_por_semana[(s, tecido)].append(var)
 
     # Função Objetivo (Minimizar Custo Operacional Relativo)
     custo_corte = lpSum(
@@ -99,10 +124,12 @@ def executar_otimizacao_producao(demanda, capacidade_corte_input, capacidade_cos
     # Restrições
     # A) Atender à demanda
     for tecido, total in demanda.items():
-        model += lpSum(costura_vars[(s, of, t, turno)] for s, of, t, turno in costura_vars if t == tecido) >= total, f"Demanda_{tecido.replace(' ', '_')}"
+        model += lpSum(var for s in semanas for var in costura_por_semana[(s, tecido)]) >= total, f"Demanda_{tecido.replace(' ', '_')}"
+
+    semanas_abertas = [s for s in semanas if s not in semanas_fixas]
 
     # B) Capacidade de corte (SEMANAL)
-    for s in SEMANAS:
+    for s in semanas_abertas:
         for maq, dados in capacidade_corte_input.items():
             # A produção em horário NORMAL (Seg-Sex) é limitada pela capacidade normal (cp_min).
             producao_normal = lpSum(corte_vars.get((s, maq, t, 'normal'), 0) for t in dados['tipo_tecido'])
@@ -113,7 +140,7 @@ def executar_otimizacao_producao(demanda, capacidade_corte_input, capacidade_cos
             model += producao_extra <= (dados['cp_max'] - dados['cp_min']), f"CP_Extra_Corte_S{s}_{maq.replace(' ', '_')}"
 
     # C) Capacidade de costura (SEMANAL)
-    for s in SEMANAS:
+    for s in semanas_abertas:
         for of, dados in capacidade_costura_input.items():
             # A produção em horário NORMAL (Seg-Sex) é limitada pela capacidade normal (cp_min).
             producao_normal = lpSum(costura_vars.get((s, of, t, 'normal'), 0) for t in dados['tipo_tecido'])
@@ -123,45 +150,368 @@ def executar_otimizacao_producao(demanda, capacidade_corte_input, capacidade_cos
             producao_extra = lpSum(costura_vars.get((s, of, t, 'extra'), 0) for t in dados['tipo_tecido'])
             model += producao_extra <= (dados['cp_max'] - dados['cp_min']), f"CP_Extra_Costura_S{s}_{of.replace(' ', '_')}"
 
-    # D) Disponibilidade de matéria-prima
-    for s_idx, s in enumerate(SEMANAS):
-        for tecido in demanda.keys():
-            model += lpSum(corte_vars.get((semana, maq, t, turno), 0) for semana in range(1, s + 1) for maq in capacidade_corte_input for t in capacidade_corte_input[maq]['tipo_tecido'] if t == tecido for turno in turnos) <= disponibilidade_tecido[tecido][s_idx], f"Disponibilidade_Tecido_{tecido.replace(' ','_')}_S{s}"
+    # Totais acumulados até a semana s: acumulado[s] = acumulado[s-1] + produção da semana s
+    for tecido in demanda.keys():
+        nome = tecido.replace(' ', '_')
+        cortado_anterior, costurado_anterior = 0, 0
+        for s_idx, s in enumerate(semanas):
+            total_cortado = LpVariable(f"Acumulado_Corte_{nome}_S{s}", lowBound=0)
+            total_costurado = LpVariable(f"Acumulado_Costura_{nome}_S{s}", lowBound=0)
+            model += total_cortado == cortado_anterior + lpSum(corte_por_semana[(s, tecido)]), f"Acumulo_Corte_{nome}_S{s}"
+            model += total_costurado == costurado_anterior + lpSum(costura_por_semana[(s, tecido)]), f"Acumulo_Costura_{nome}_S{s}"
+            cortado_anterior, costurado_anterior = total_cortado, total_costurado
+            if s in semanas_fixas:
+                continue
+
+            # D) Disponibilidade de matéria-prima
+            model += total_cortado <= disponibilidade_tecido[tecido][s_idx], f"Disponibilidade_Tecido_{nome}_S{s}"
+
+            # E) Fluxo de produção (corte -> costura)
+            model += total_costurado <= total_cortado, f"Fluxo_Corte_Costura_{nome}_S{s}"
+
+    return model, corte_vars, costura_vars
+
+
+# Tempos do PuLP por etapa (ver metricas.py)
+TEMPO_CONSTRUCAO = histograma('enfesto_pulp_segundos', "Construção e resolução do modelo de PL", etapa='construcao')
+TEMPO_RESOLUCAO = histograma('enfesto_pulp_segundos', "Construção e resolução do modelo de PL", etapa='resolucao')
 
-    # E) Fluxo de produção (corte -> costura)
-    for s in SEMANAS:
-        for tecido in demanda.keys():
-            total_cortado = lpSum(corte_vars.get((semana, maq, t, turno), 0) for semana in range(1, s + 1) for maq in capacidade_corte_input for t in capacidade_corte_input[maq]['tipo_tecido'] if t == tecido for turno in turnos)
-            total_costurado = lpSum(costura_vars.get((semana, of, t, turno), 0) for semana in range(1, s + 1) for of in capacidade_costura_input for t in capacidade_costura_input[of]['tipo_tecido'] if t == tecido for turno in turnos)
-            model += total_costurado <= total_cortado, f"Fluxo_Corte_Costura_{tecido.replace(' ', '_')}_S{s}"
 
-    # Resolução
-    model.solve()
+def registrar_tempos_solver(metricas):
+    """Alimenta os histogramas do PuLP com as métricas de uma otimização (construcao_s e tempo_s)."""
+    TEMPO_CONSTRUCAO.observar(metricas['construcao_s'])
+    TEMPO_RESOLUCAO.observar(metricas['tempo_s'])
+
+
+COLUNAS_RESULTADOS = ['Setor', 'Semana', 'Recurso', 'Tecido', 'Turno', 'Quantidade (Peças)']
+
+
+def extrair_resultados(model, corte_vars, costura_vars):
+    """
+    Converte a solução em (status, custo, DataFrame do plano). Os valores de
+    cada setor são lidos em um único vetor e só os índices das quantidades
+    positivas viram linhas.
+    """
+    from pulp import LpStatus
 
-    # Processamento dos resultados
     if LpStatus[model.status] == 'Optimal':
-        resultados = []
-        for (s, maq, tecido, turno), var in corte_vars.items():
-            if var.value() > 0:
-                resultados.append(['Corte', s, maq, tecido, turno, var.value()])
-        for (s, of, tecido, turno), var in costura_vars.items():
-            if var.value() > 0:
-                resultados.append(['Costura', s, of, tecido, turno, var.value()])
-        
-        df_resultados = pd.DataFrame(resultados, columns=['Setor', 'Semana', 'Recurso', 'Tecido', 'Turno', 'Quantidade (Peças)'])
+        registros, quantidades = [], []
+        for setor, variaveis in (('Corte', corte_vars), ('Costura', costura_vars)):
+            # varValue None (variável fora da solução) vira NaN e não passa no filtro
+            valores = np.array([var.varValue for var in variaveis.values()], dtype=np.float64)
+            positivas = np.flatnonzero(valores > 0)
+            chaves = list(variaveis)
+            registros.extend((setor, *chaves[i]) for i in positivas)
+            quantidades.append(valores[positivas])
+
+        df_resultados = pd.DataFrame.from_records(registros, columns=COLUNAS_RESULTADOS[:-1], nrows=len(registros))
+        df_resultados[COLUNAS_RESULTADOS[-1]] = np.concatenate(quantidades)
         return LpStatus[model.status], model.objective.value(), df_resultados
     else:
         return LpStatus[model.status], None, pd.DataFrame()
 
 
-# --- 3. CONSTRUÇÃO DO DASHBOARD INTERATIVO ---
+def executar_otimizacao_producao(demanda, capacidade_corte_input, capacidade_costura_input, semanas=None, entrega_tecidos_perc=None,
+                                 modo=None, **opcoes_modo):
+    """
+    Executa o modelo de otimização com base nos parâmetros fornecidos.
+    `modo` e `opcoes_modo` seguem otimizar_producao (padrão: MIP exato).
+    """
+    status, custo, df_resultados, _ = otimizar_producao(
+        demanda, capacidade_corte_input, capacidade_costura_input, modo or MODO_EXATO,
+        semanas=semanas, entrega_tecidos_perc=entrega_tecidos_perc, **opcoes_modo)
+    return status, custo, df_resultados
+
+
+def _ler_log_cbc(caminho):
+    """Extrai objetivo, limitante, gap, nós e iterações do log do CBC."""
+    campos = {
+        'Objective value:': 'objetivo',
+        'Lower bound:': 'limitante',
+        'Gap:': 'gap',
+        'Enumerated nodes:': 'nos',
+        'Total iterations:': 'iteracoes',
+    }
+    metricas = {}
+    try:
+        with open(caminho, encoding='utf-8', errors='replace') as arquivo:
+            for linha in arquivo:
+                for rotulo, chave in campos.items():
+                    if linha.startswith(rotulo):
+                        try:
+                            metricas[chave] = float(linha[len(rotulo):].split()[0])
+                        except (IndexError, ValueError):
+                            pass
+    except OSError:
+        pass
+    return metricas
+
+
+def resolver_modelo(model, warm_start=False, **opcoes_cbc):
+    """
+    Resolve com o CBC e devolve métricas da execução: tempo, gap, nós e
+    iterações (lidos do log do solver).
+    """
+    from pulp import LpStatus, PULP_CBC_CMD
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_log = os.path.join(pasta, 'cbc.log')
+        inicio = time.perf_counter()
+        model.solve(PULP_CBC_CMD(msg=False, warmStart=warm_start, logPath=caminho_log, **opcoes_cbc))
+        metricas = {'tempo_s': time.perf_counter() - inicio, 'status': LpStatus[model.status]}
+        metricas.update(_ler_log_cbc(caminho_log))
+
+    if 'gap' not in metricas and metricas['status'] == 'Optimal':
+        metricas['gap'] = 0.0
+    metricas['iteracoes'] = int(metricas.get('iteracoes', 0))
+    metricas['nos'] = int(metricas.get('nos', 0))
+    return metricas
+
+
+def _plano_para_dict(plano):
+    """Aceita o DataFrame de resultados ou um dict {(setor, semana, recurso, tecido, turno): qtd}."""
+    if plano is None:
+        return {}
+    if isinstance(plano, pd.DataFrame):
+        if plano.empty:
+            return {}
+        chaves = zip(plano['Setor'], plano['Semana'], plano['Recurso'], plano['Tecido'], plano['Turno'])
+        return dict(zip(chaves, plano['Quantidade (Peças)']))
+    return dict(plano)
+
+
+def carregar_realizado(db, semana_atual):
+    """Produção realizada (corte/costura) gravada no banco para as semanas anteriores a `semana_atual`."""
+    return {
+        (setor, semana, recurso, tecido, turno): quantidade
+        for semana, setor, recurso, tecido, turno, quantidade in db.buscar_producao_realizada(ate_semana=semana_atual - 1)
+    }
+
+
+def _quantidades_inteiras(realizado):
+    """
+    Arredonda as quantidades realizadas para peças inteiras: as variáveis do
+    modelo são inteiras, e fixar uma fração tornaria o re-planejamento
+    inviável. Quantidades negativas levantam ValueError.
+    """
+    inteiras = {}
+    for chave, quantidade in realizado.items():
+        if quantidade < 0:
+            raise ValueError(f"Quantidade realizada negativa para {chave}: {quantidade}")
+        inteiras[chave] = round(quantidade)
+        if inteiras[chave] != quantidade:
+            logging.warning(f"Quantidade realizada fracionária para {chave}: {quantidade} -> {inteiras[chave]} peças")
+    return inteiras
+
+
+def replanejar_producao(demanda, capacidade_corte_input, capacidade_costura_input, semana_atual, realizado=None,
+                        plano_anterior=None, semanas=None, entrega_tecidos_perc=None, **opcoes_cbc):
+    """
+    Horizonte rolante: re-otimiza só as semanas a partir de `semana_atual`.
+
+    As semanas anteriores são congeladas com as quantidades realizadas
+    (`realizado`, ver carregar_realizado; o que não constar é zero; frações
+    são arredondadas e negativos levantam ValueError) e o plano
+    anterior, se informado, é usado como solução inicial do CBC (warm start).
+    Retorna (status, custo, df_resultados, metricas), com tempo, gap e
+    iterações do re-planejamento em `metricas`.
+    """
+    semanas = semanas or SEMANAS
+    realizado = _quantidades_inteiras(_plano_para_dict(realizado))
+    anterior = _plano_para_dict(plano_anterior)
+    semanas_fixas = {s for s in semanas if s < semana_atual}
+
+    inicio = time.perf_counter()
+    model, corte_vars, costura_vars = construir_modelo(
+        demanda, capacidade_corte_input, capacidade_costura_input, semanas, entrega_tecidos_perc, semanas_fixas)
+    for setor, variaveis in (('Corte', corte_vars), ('Costura', costura_vars)):
+        for (s, recurso, tecido, turno), var in variaveis.items():
+            if s in semanas_fixas:
+                var.setInitialValue(realizado.get((setor, s, recurso, tecido, turno), 0))
+                var.fixValue()
+            elif anterior:
+                var.setInitialValue(anterior.get((setor, s, recurso, tecido, turno), 0))
+    tempo_construcao = time.perf_counter() - inicio
+
+    metricas = resolver_modelo(model, warm_start=bool(anterior), **opcoes_cbc)
+    metricas.update({'semana_atual': semana_atual, 'semanas_fixas': len(semanas_fixas),
+                     'warm_start': bool(anterior), 'construcao_s': tempo_construcao})
+    registrar_tempos_solver(metricas)
+    logging.info(
+        f"Re-planejamento a partir da semana {semana_atual}: {metricas['status']} em {metricas['tempo_s']:.3f}s "
+        f"(gap={metricas.get('gap')}, iterações={metricas['iteracoes']}, nós={metricas['nos']})"
+    )
+    status, custo, df_resultados = extrair_resultados(model, corte_vars, costura_vars)
+    return status, custo, df_resultados, metricas
+
+
+# --- Modos de resolução ---
+MODO_EXATO = 'exato'
+MODO_RELAXADO = 'relaxado'
+MODO_LIMITADO = 'limitado'
+MODOS_RESOLUCAO = {
+    MODO_EXATO: "MIP exato",
+    MODO_RELAXADO: "Relaxação LP + arredondamento",
+    MODO_LIMITADO: "MIP com limite de tempo/gap",
+}
+LIMITE_TEMPO_PADRAO = 10    # segundos (modo limitado)
+GAP_PADRAO = 0.01           # gap relativo aceito (modo limitado)
+TOLERANCIA_INTEIRO = 1e-6
+
+
+def _fixar(variaveis, valores):
+    """Fixa as variáveis nos valores dados e devolve os limites originais (ver _liberar)."""
+    limites = [(var, var.lowBound, var.upBound) for var in variaveis]
+    for var, valor in zip(variaveis, valores):
+        var.lowBound = var.upBound = valor
+    return limites
+
+
+def _liberar(limites):
+    for var, limite_inferior, limite_superior in limites:
+        var.lowBound, var.upBound = limite_inferior, limite_superior
+
+
+def _resolver_fixando(model, variaveis, valores, **opcoes_cbc):
+    limites = _fixar(variaveis, valores)
+    try:
+        return resolver_modelo(model, **opcoes_cbc)
+    finally:
+        _liberar(limites)
+
+
+def resolver_relaxado(model, corte_vars, costura_vars, **opcoes_cbc):
+    """
+    Resolve a relaxação linear e repara o arredondamento sem perder a viabilidade:
+    1. arredonda todas as quantidades e confere se o plano continua viável;
+    2. se não, fixa as que já eram inteiras e resolve como MIP só as fracionárias;
+    3. em último caso, resolve o MIP completo.
+    O objetivo da relaxação é o limitante inferior informado em `limitante`.
+    """
+    variaveis = list(corte_vars.values()) + list(costura_vars.values())
+    for var in variaveis:
+        var.cat = 'Continuous'
+    try:
+        metricas = resolver_modelo(model, **opcoes_cbc)
+    finally:
+        for var in variaveis:
+            var.cat = 'Integer'
+    if metricas['status'] != 'Optimal':
+        metricas['reparo'] = None
+        return metricas
+
+    tempo_total = metricas['tempo_s']
+    limitante = model.objective.value()
+    valores = [var.value() for var in variaveis]
+    arredondados = [round(valor) for valor in valores]
+    fracionarias = {i for i, (valor, inteiro) in enumerate(zip(valores, arredondados))
+                    if abs(valor - inteiro) > TOLERANCIA_INTEIRO}
+
+    if not fracionarias:
+        # A solução da relaxação já é inteira: só remove o ruído numérico
+        for var, inteiro in zip(variaveis, arredondados):
+            var.varValue = inteiro
+        reparo = 'nenhum'
+    else:
+        reparo = 'arredondamento'
+        metricas = _resolver_fixando(model, variaveis, arredondados, **opcoes_cbc)
+        tempo_total += metricas['tempo_s']
+        if metricas['status'] != 'Optimal':
+            reparo = 'mip_parcial'
+            inteiras = [i for i in range(len(variaveis)) if i not in fracionarias]
+            metricas = _resolver_fixando(model, [variaveis[i] for i in inteiras],
+                                         [arredondados[i] for i in inteiras], **opcoes_cbc)
+            tempo_total += metricas['tempo_s']
+        if metricas['status'] != 'Optimal':
+            reparo = 'mip_completo'
+            metricas = resolver_modelo(model, **opcoes_cbc)
+            tempo_total += metricas['tempo_s']
+
+    objetivo = model.objective.value() if metricas['status'] == 'Optimal' else None
+    metricas.update({
+        'tempo_s': tempo_total, 'objetivo': objetivo, 'limitante': limitante, 'reparo': reparo,
+        'gap': (objetivo - limitante) / abs(objetivo) if objetivo else None,
+        'fracionarias': len(fracionarias),
+    })
+    return metricas
+
+
+def otimizar_producao(demanda, capacidade_corte_input, capacidade_costura_input, modo=MODO_EXATO,
+                      limite_tempo=None, gap=None, threads=None, semanas=None, entrega_tecidos_perc=None):
+    """
+    Resolve o plano no modo escolhido (ver MODOS_RESOLUCAO):
+    - exato: MIP até a otimalidade;
+    - relaxado: relaxação LP com reparo do arredondamento (resolver_relaxado);
+    - limitado: MIP parando em `limite_tempo` segundos ou no `gap` relativo.
+    `threads` vale para todos os modos. Retorna (status, custo, df_resultados,
+    metricas), com modo, tempo total, objetivo e limitante em `metricas`.
+    """
+    if modo not in MODOS_RESOLUCAO:
+        raise ValueError(f"Modo de resolução desconhecido: {modo}")
+    logging.info(f"Iniciando o sistema de otimização de produção (modo {modo})...")
+
+    inicio = time.perf_counter()
+    model, corte_vars, costura_vars = construir_modelo(
+        demanda, capacidade_corte_input, capacidade_costura_input, semanas, entrega_tecidos_perc)
+    tempo_construcao = time.perf_counter() - inicio
+
+    opcoes_cbc = {'threads': threads} if threads else {}
+    if modo == MODO_RELAXADO:
+        metricas = resolver_relaxado(model, corte_vars, costura_vars, **opcoes_cbc)
+    else:
+        if modo == MODO_LIMITADO:
+            opcoes_cbc['timeLimit'] = limite_tempo or LIMITE_TEMPO_PADRAO
+            opcoes_cbc['gapRel'] = GAP_PADRAO if gap is None else gap
+        metricas = resolver_modelo(model, **opcoes_cbc)
+        if metricas['status'] == 'Optimal':
+            metricas['objetivo'] = model.objective.value()
+            metricas.setdefault('limitante', metricas['objetivo'])
+
+    metricas.update({'modo': modo, 'construcao_s': tempo_construcao,
+                     'tempo_total_s': tempo_construcao + metricas['tempo_s']})
+    registrar_tempos_solver(metricas)
+    logging.info(f"Modelo construído em {tempo_construcao:.3f}s e resolvido em {metricas['tempo_s']:.3f}s "
+                 f"({metricas['status']}, limitante={metricas.get('limitante')}).")
+    status, custo, df_resultados = extrair_resultados(model, corte_vars, costura_vars)
+    return status, custo, df_resultados, metricas
+
+
+# Resultados de cenários já resolvidos (LRU em memória + disco)
+CACHE_RESULTADOS = CacheOtimizacao()
+
+
+def chave_padrao(demanda, capacidade_corte_input, capacidade_costura_input, *opcoes):
+    """Chave de cache de um cenário com as semanas e entregas padrão (e opções do solver, se houver)."""
+    return chave_cenario(demanda, capacidade_corte_input, capacidade_costura_input, ENTREGA_TECIDOS_PERC, SEMANAS,
+                         *opcoes)
 
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-app.title = "Otimizador de Produção Têxtil"
+
+def _registrar_job(resultado):
+    registrar_tempos_solver(resultado[3])
+
+
+# Otimizações do dashboard rodam em processos separados (ver fila_otimizacao);
+# os tempos de cada solve voltam no resultado e alimentam as métricas daqui
+FILA_OTIMIZACAO = FilaOtimizacao(otimizar_producao, num_workers=NUM_WORKERS, timeout=TIMEOUT_JOB,
+                                 cache=CACHE_RESULTADOS, ao_concluir=_registrar_job)
+INTERVALO_CONSULTA_MS = 1000    # frequência com que a tela consulta o job
+
+# Planos exibidos ficam no servidor; a tabela busca só a página visível
+PLANOS_EXIBIDOS = CacheOtimizacao(tamanho_max=32, tamanho_max_disco=0)
+TAMANHO_PAGINA = 15
+
+
+# --- 3. CONSTRUÇÃO DO DASHBOARD INTERATIVO ---
+# dash, dbc e plotly são importados só pelas funções do dashboard: quem usa
+# apenas o otimizador (executar_otimizacao_producao, a varredura e os processos
+# da fila) importa este módulo sem carregá-los. O app é montado por criar_app.
 
 # -- Componentes da UI --
 def create_capacidade_card(title, data, table_id):
     """Cria um card com uma tabela de dados para edição de capacidade."""
+    import dash_bootstrap_components as dbc
+    from dash import html, dash_table
+
     display_data = []
     for recurso, valores in data.items():
         row = {
@@ -192,75 +542,31 @@ def create_capacidade_card(title, data, table_id):
         ])
     ], className="mb-4")
 
-# -- Layout do App --
-app.layout = dbc.Container([
-    # Título
-    dbc.Row(dbc.Col(html.H1("Dashboard de Otimização de Produção (PPCP)", className="text-center my-4"), width=12)),
-    
-    # Seção de Inputs
-    dbc.Row([
-        # Coluna de Demanda e Botão
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader(html.H5("Parâmetros de Produção")),
-                dbc.CardBody([
-                    dbc.Label("Demanda de Tecido Plano (peças):"),
-                    dbc.Input(id='demanda-plano', type='number', value=DEMANDA_VENDAS['Tecido Plano']),
-                    dbc.Label("Demanda de Malharia (peças):", className="mt-3"),
-                    dbc.Input(id='demanda-malharia', type='number', value=DEMANDA_VENDAS['Malharia']),
-                    html.Div(
-                        dbc.Button("Otimizar Produção", id='run-optimization-btn', color="primary", size="lg", className="w-100"),
-                        className="d-grid gap-2 mt-4"
-                    )
-                ])
-            ], className="mb-4")
-        ], md=4),
-        
-        # Coluna das tabelas de capacidade
-        dbc.Col([
-            create_capacidade_card("Capacidade Semanal de Corte", CAPACIDADE_CORTE, 'table-corte'),
-            create_capacidade_card("Capacidade Semanal de Costura", CAPACIDADE_COSTURA, 'table-costura')
-        ], md=8)
-    ]),
-
-    # Seção de Resultados
-    dbc.Row(dbc.Col(html.Hr(), width=12)),
-    dbc.Row(dbc.Col(html.H2("Resultados da Otimização", className="text-center my-4"), width=12)),
-    
-    dbc.Row([
-        dbc.Col(
-            dcc.Loading(
-                id="loading-results",
-                type="circle",
-                children=[
-                    html.Div(id='optimization-summary'),
-                    dcc.Graph(id='production-plan-graph'),
-                    html.Div(id='production-plan-table')
-                ]
-            ), 
-        width=12)
-    ])
-
-], fluid=True)
-
+def tabela_plano():
+    """Tabela de resultados com paginação, ordenação e filtro feitos no servidor (ver paginar_plano)."""
+    from dash import dash_table
+
+    return dash_table.DataTable(
+        id='tabela-plano',
+        columns=[{"name": i, "id": i} for i in COLUNAS_TABELA],
+        data=[],
+        page_action="custom",
+        page_current=0,
+        page_size=TAMANHO_PAGINA,
+        sort_action="custom",
+        sort_mode="multi",
+        sort_by=[],
+        filter_action="custom",
+        filter_query="",
+        style_table={'overflowX': 'auto'},
+        style_cell={'textAlign': 'left', 'minWidth': '100px', 'width': '150px', 'maxWidth': '300px'},
+        style_header={'fontWeight': 'bold'}
+    )
 
 # --- 4. CALLBACKS PARA INTERATIVIDADE ---
 
-@app.callback(
-    [Output('optimization-summary', 'children'),
-     Output('production-plan-graph', 'figure'),
-     Output('production-plan-table', 'children')],
-    [Input('run-optimization-btn', 'n_clicks')],
-    [State('demanda-plano', 'value'),
-     State('demanda-malharia', 'value'),
-     State('table-corte', 'data'),
-     State('table-costura', 'data')]
-)
-def update_optimization_results(n_clicks, demanda_plano, demanda_malharia, data_corte, data_costura):
-    if n_clicks is None:
-        return "", {}, ""
-
-    # Formatar inputs para a função de otimização
+def montar_entradas(demanda_plano, demanda_malharia, data_corte, data_costura):
+    """Converte os valores da tela nas entradas de executar_otimizacao_producao."""
     demanda_input = {'Tecido Plano': demanda_plano, 'Malharia': demanda_malharia}
     
     capacidade_corte_input = {
@@ -278,58 +584,37 @@ def update_optimization_results(n_clicks, demanda_plano, demanda_malharia, data_
                          'fator_custo_extra': CAPACIDADE_COSTURA[row['Recurso']]['fator_custo_extra']}
         for row in data_costura
     }
+    return demanda_input, capacidade_corte_input, capacidade_costura_input
+
+
+def renderizar_resultados(status, custo, df_resultados, texto_extra=""):
+    """Sumário, gráfico e ResultadoPlano (None se não houver plano) de um resultado do otimizador."""
+    import dash_bootstrap_components as dbc
+    import plotly.express as px
+    from dash import html
 
-    # Executar otimização
-    status, custo, df_resultados = executar_otimizacao_producao(demanda_input, capacidade_corte_input, capacidade_costura_input)
-    
     if status == 'Optimal':
         # 1. Sumário
         summary = dbc.Alert(
             [
-                html.H4("Otimização Concluída com Sucesso!", className="alert-heading")
+                html.H4("Otimização Concluída com Sucesso!", className="alert-heading"),
+                html.P(texto_extra, className="mb-0 small")
             ],
             color="success"
         )
         
-        # 2. Pós-processamento da Tabela de Resultados
-        df_tabela_final = pd.DataFrame()
-        if not df_resultados.empty:
-            def get_cost_factor(row):
-                recurso_data = (CAPACIDADE_CORTE if row['Setor'] == 'Corte' else CAPACIDADE_COSTURA).get(row['Recurso'])
-                return recurso_data['fator_custo_normal'] if row['Turno'] == 'normal' else recurso_data['fator_custo_extra']
-
-            df_resultados['fator_custo'] = df_resultados.apply(get_cost_factor, axis=1)
-            df_resultados['custo_pontos'] = df_resultados['Quantidade (Peças)'] * df_resultados['fator_custo']
-
-            agg_df = df_resultados.groupby(['Setor', 'Semana', 'Recurso', 'Tecido']).agg(
-                quantidade_total=('Quantidade (Peças)', 'sum'),
-                custo_total_pontos=('custo_pontos', 'sum')
-            ).reset_index()
-            
-            agg_df['Fator Hora Médio (%)'] = (agg_df['custo_total_pontos'] / agg_df['quantidade_total']).round(2)
-            
-            df_tabela_final = agg_df.rename(columns={'quantidade_total': 'Quantidade (Peças)'})
-            df_tabela_final = df_tabela_final[['Setor', 'Semana', 'Recurso', 'Tecido', 'Quantidade (Peças)', 'Fator Hora Médio (%)']]
+        # 2. Pós-processamento: custos por join, calculados uma vez para gráfico e tabela
+        resultado = ResultadoPlano(df_resultados, CAPACIDADE_CORTE, CAPACIDADE_COSTURA)
 
-        # 3. Gráfico (usa os dados originais, pois o px.bar agrega automaticamente)
-        fig = px.bar(df_resultados, x="Semana", y="Quantidade (Peças)", color="Recurso",
+        # 3. Gráfico (série já agregada por setor, semana e recurso)
+        fig = px.bar(resultado.serie_grafico, x="Semana", y="Quantidade (Peças)", color="Recurso",
                      facet_row="Setor", title="Plano de Produção Otimizado por Semana e Recurso",
                      labels={'Quantidade (Peças)': 'Quantidade Produzida (Peças)'},
                      category_orders={"Setor": ["Corte", "Costura"]})
         fig.update_layout(height=600)
 
-        # 4. Tabela (usa o novo dataframe agregado)
-        table = dash_table.DataTable(
-            columns=[{"name": i, "id": i} for i in df_tabela_final.columns],
-            data=df_tabela_final.to_dict('records'),
-            sort_action="native",
-            page_size=15,
-            style_table={'overflowX': 'auto'},
-            style_cell={'textAlign': 'left', 'minWidth': '100px', 'width': '150px', 'maxWidth': '300px'},
-            style_header={'fontWeight': 'bold'}
-        )
-        
-        return summary, fig, table
+        # 4. A tabela é servida por páginas a partir do ResultadoPlano (ver paginar_plano)
+        return summary, fig, resultado
     else:
         # Mensagem de erro
         summary = dbc.Alert(
@@ -339,10 +624,213 @@ def update_optimization_results(n_clicks, demanda_plano, demanda_malharia, data_
             ],
             color="danger"
         )
-        return summary, {}, ""
+        return summary, {}, None
+
 
+# --- 5. FÁBRICA DO APP ---
 
-# --- 5. EXECUÇÃO DO SERVIDOR WEB ---
+def criar_app():
+    """
+    Monta o app Dash do dashboard: layout e callbacks. Nada disso roda na
+    importação do módulo.
+
+    Os jobs (FILA_OTIMIZACAO) e os planos exibidos (PLANOS_EXIBIDOS) ficam na
+    memória do processo: o app deve rodar com um único worker (o servidor do
+    próprio Dash, ou gunicorn com `-w 1`). Com vários workers, a consulta de um
+    job ou a paginação de um plano que cai em outro worker não o encontra.
+    """
+    import dash
+    import dash_bootstrap_components as dbc
+    from dash import dcc, html, Input, Output, State
+
+    app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+    app.title = "Otimizador de Produção Têxtil"
+
+    # Métricas do processo do dashboard (fila e tempos do PuLP) no formato do Prometheus
+    @app.server.route('/metrics')
+    def expor_metricas():
+        return METRICAS.texto_prometheus(), 200, {'Content-Type': TIPO_CONTEUDO}
+
+    # -- Layout do App --
+    app.layout = dbc.Container([
+        # Título
+        dbc.Row(dbc.Col(html.H1("Dashboard de Otimização de Produção (PPCP)", className="text-center my-4"), width=12)),
+    
+        # Seção de Inputs
+        dbc.Row([
+            # Coluna de Demanda e Botão
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader(html.H5("Parâmetros de Produção")),
+                    dbc.CardBody([
+                        dbc.Label("Demanda de Tecido Plano (peças):"),
+                        dbc.Input(id='demanda-plano', type='number', value=DEMANDA_VENDAS['Tecido Plano']),
+                        dbc.Label("Demanda de Malharia (peças):", className="mt-3"),
+                        dbc.Input(id='demanda-malharia', type='number', value=DEMANDA_VENDAS['Malharia']),
+                        dbc.Label("Modo de resolução:", className="mt-3"),
+                        dbc.Select(id='modo-resolucao', value=MODO_EXATO,
+                                   options=[{'label': rotulo, 'value': modo} for modo, rotulo in MODOS_RESOLUCAO.items()]),
+                        dbc.Row([
+                            dbc.Col([dbc.Label("Limite (s):", className="small"),
+                                     dbc.Input(id='limite-tempo', type='number', min=1, value=LIMITE_TEMPO_PADRAO)]),
+                            dbc.Col([dbc.Label("Gap (%):", className="small"),
+                                     dbc.Input(id='gap-relativo', type='number', min=0, step=0.1, value=GAP_PADRAO * 100)]),
+                            dbc.Col([dbc.Label("Threads:", className="small"),
+                                     dbc.Input(id='threads-solver', type='number', min=1, step=1, value=1)]),
+                        ], className="mt-2"),
+                        html.Div(
+                            [dbc.Button("Otimizar Produção", id='run-optimization-btn', color="primary", size="lg", className="w-100"),
+                             dbc.Button("Cancelar", id='cancel-optimization-btn', color="secondary", outline=True, className="w-100")],
+                            className="d-grid gap-2 mt-4"
+                        )
+                    ])
+                ], className="mb-4")
+            ], md=4),
+        
+            # Coluna das tabelas de capacidade
+            dbc.Col([
+                create_capacidade_card("Capacidade Semanal de Corte", CAPACIDADE_CORTE, 'table-corte'),
+                create_capacidade_card("Capacidade Semanal de Costura", CAPACIDADE_COSTURA, 'table-costura')
+            ], md=8)
+        ]),
+
+        # Seção de Resultados
+        dbc.Row(dbc.Col(html.Hr(), width=12)),
+        dbc.Row(dbc.Col(html.H2("Resultados da Otimização", className="text-center my-4"), width=12)),
+        dbc.Row(dbc.Col(html.Div(id='job-status'), width=12)),
+        dcc.Store(id='job-otimizacao'),
+        dcc.Store(id='plano-exibido'),
+        dcc.Interval(id='intervalo-job', interval=INTERVALO_CONSULTA_MS, disabled=True),
+    
+        dbc.Row([
+            dbc.Col(
+                dcc.Loading(
+                    id="loading-results",
+                    type="circle",
+                    children=[
+                        html.Div(id='optimization-summary'),
+                        dcc.Graph(id='production-plan-graph'),
+                        html.Div(tabela_plano(), id='production-plan-table')
+                    ]
+                ), 
+            width=12)
+        ])
+
+    ], fluid=True)
+
+    # -- Callbacks --
+    @app.callback(
+        [Output('job-otimizacao', 'data'),
+         Output('intervalo-job', 'disabled'),
+         Output('job-status', 'children')],
+        [Input('run-optimization-btn', 'n_clicks')],
+        [State('demanda-plano', 'value'),
+         State('demanda-malharia', 'value'),
+         State('table-corte', 'data'),
+         State('table-costura', 'data'),
+         State('modo-resolucao', 'value'),
+         State('limite-tempo', 'value'),
+         State('gap-relativo', 'value'),
+         State('threads-solver', 'value')],
+        prevent_initial_call=True
+    )
+    def submeter_otimizacao(n_clicks, demanda_plano, demanda_malharia, data_corte, data_costura,
+                            modo, limite_tempo, gap_percentual, threads):
+        """Enfileira o cenário e devolve na hora o id do job; o resultado chega pelo intervalo."""
+        entradas = montar_entradas(demanda_plano, demanda_malharia, data_corte, data_costura)
+        # Só o modo limitado usa limite de tempo e gap; fora dele não entram na chave do cache.
+        # As threads também só mudam o plano quando o solve é interrompido (modo limitado).
+        limitado = modo == MODO_LIMITADO
+        threads = int(threads) if threads else None
+        opcoes = (modo,
+                  limite_tempo if limitado else None,
+                  gap_percentual / 100 if limitado and gap_percentual is not None else None)
+        chave = chave_padrao(*entradas, *opcoes, threads if limitado else None)
+        job_id = FILA_OTIMIZACAO.submeter(*entradas, *opcoes, threads, chave=chave)
+        return job_id, False, dbc.Alert(f"Otimização {job_id} enviada...", color="info")
+
+
+    @app.callback(
+        [Output('optimization-summary', 'children'),
+         Output('production-plan-graph', 'figure'),
+         Output('plano-exibido', 'data'),
+         Output('intervalo-job', 'disabled', allow_duplicate=True),
+         Output('job-status', 'children', allow_duplicate=True)],
+        [Input('intervalo-job', 'n_intervals')],
+        [State('job-otimizacao', 'data')],
+        prevent_initial_call=True
+    )
+    def acompanhar_otimizacao(n_intervals, job_id):
+        job = FILA_OTIMIZACAO.status(job_id) if job_id else None
+        if job is None:
+            return dash.no_update, dash.no_update, dash.no_update, True, ""
+
+        if job['estado'] in (PENDENTE, EXECUTANDO):
+            texto = "na fila" if job['estado'] == PENDENTE else "em execução"
+            progresso = dbc.Alert(f"Otimização {job_id} {texto} há {job['decorrido_s']:.0f}s...", color="info")
+            return dash.no_update, dash.no_update, dash.no_update, False, progresso
+
+        if job['estado'] != CONCLUIDO:
+            summary = dbc.Alert(
+                [
+                    html.H4("Otimização Interrompida", className="alert-heading"),
+                    html.P(f"Job {job_id}: {job['estado']}. {job['erro'] or ''}", className="mb-0")
+                ],
+                color="warning"
+            )
+            return summary, {}, None, True, ""
+
+        status, custo, df_resultados, metricas = job['resultado']
+        stats_cache = CACHE_RESULTADOS.estatisticas()
+        limitante = metricas.get('limitante')
+        texto_solver = f"Modo: {MODOS_RESOLUCAO[metricas['modo']]}"
+        if metricas.get('reparo'):
+            texto_solver += f" (reparo: {metricas['reparo']})"
+        if limitante is not None:
+            texto_solver += f" | Limitante: {limitante:,.0f}"
+        texto_cache = (f"{texto_solver} | Tempo do solver: {metricas['tempo_total_s']:.2f}s | "
+                       f"Tempo total: {job['decorrido_s']:.1f}s | "
+                       f"Cache: {stats_cache['acertos_memoria'] + stats_cache['acertos_disco']} acerto(s), "
+                       f"{stats_cache['falhas']} falha(s) ({stats_cache['taxa_acerto']:.0%} de acerto)")
+        summary, fig, resultado = renderizar_resultados(status, custo, df_resultados, texto_cache)
+        if resultado is None:
+            return summary, fig, None, True, ""
+        PLANOS_EXIBIDOS.guardar(job_id, resultado)
+        return summary, fig, job_id, True, ""
+
+
+    @app.callback(
+        [Output('tabela-plano', 'data'),
+         Output('tabela-plano', 'page_count')],
+        [Input('plano-exibido', 'data'),
+         Input('tabela-plano', 'page_current'),
+         Input('tabela-plano', 'page_size'),
+         Input('tabela-plano', 'sort_by'),
+         Input('tabela-plano', 'filter_query')]
+    )
+    def paginar_plano(job_id, pagina, tamanho, ordenacao, filtro):
+        """Envia ao navegador só a página visível da tabela do plano exibido."""
+        resultado = PLANOS_EXIBIDOS.obter(job_id) if job_id else None
+        if resultado is None:
+            return [], 1
+        return resultado.pagina(pagina, tamanho, ordenacao, filtro)
+
+
+    @app.callback(
+        Output('job-status', 'children', allow_duplicate=True),
+        [Input('cancel-optimization-btn', 'n_clicks')],
+        [State('job-otimizacao', 'data')],
+        prevent_initial_call=True
+    )
+    def cancelar_otimizacao(n_clicks, job_id):
+        if job_id and FILA_OTIMIZACAO.cancelar(job_id):
+            return dbc.Alert(f"Cancelando a otimização {job_id}...", color="warning")
+        return dash.no_update
+
+    return app
+
+
+# --- 6. EXECUÇÃO DO SERVIDOR WEB ---
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    criar_app().run(debug=True)
@@ -0,0 +1,185 @@
+"""
+Monitor de produção ao vivo.
+
+O caminho de ingestão (monitorar_sensor.processar_linha e o coletor) chama
+`MonitorProducao.registrar` a cada leitura; o monitor mantém, por máquina e
+ordem, contadores correntes e um buffer circular de baldes por minuto (folhas
+e leituras). A página Dash lê só esse estado em memória: cada atualização
+custa O(máquinas), independente do tamanho do histórico em `leituras`, e a
+memória é limitada a ORDENS_POR_MAQUINA x MINUTOS_BUFFER baldes por máquina.
+
+Os tempos são os de chegada das leituras (relógio do coletor), para que
+"folhas/hora" reflita a produção atual.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+MINUTOS_BUFFER = 60         # baldes de um minuto guardados por máquina/ordem
+ORDENS_POR_MAQUINA = 4      # ordens recentes mantidas por máquina
+JANELA_MINUTOS = 15         # janela do cálculo de folhas/hora
+SEM_SINAL_S = 30            # sem leituras há mais que isso: "sem sinal"
+PARADA_MINUTOS = 5          # sem folhas há mais que isso: "parada"
+INTERVALO_ATUALIZACAO_MS = 3000
+PORTA_MONITOR = 8051
+
+COLUNAS_MONITOR = ['codMaquina', 'ordemProducao', 'situacao', 'folhas', 'folhas_hora', 'leituras',
+                   'distancia', 'ultima_leitura_s']
+
+
+class _Grupo:
+    """Contadores e baldes por minuto de uma máquina/ordem."""
+
+    __slots__ = ('folhas', 'leituras', 'distancia', 'ultima', 'ultima_folha', 'baldes')
+
+    def __init__(self, minutos_buffer):
+        self.folhas = None          # último total informado pela detecção
+        self.leituras = 0
+        self.distancia = None
+        self.ultima = None
+        self.ultima_folha = None
+        self.baldes = deque(maxlen=minutos_buffer)   # [minuto, folhas, leituras]
+
+
+class MonitorProducao:
+    def __init__(self, minutos_buffer=MINUTOS_BUFFER, ordens_por_maquina=ORDENS_POR_MAQUINA):
+        self.minutos_buffer = minutos_buffer
+        self.ordens_por_maquina = ordens_por_maquina
+        self._maquinas = {}         # codMaquina -> OrderedDict(ordemProducao -> _Grupo)
+        self._lock = threading.Lock()
+
+    def registrar(self, codMaquina, ordemProducao, distancia, folhas, agora=None):
+        """Contabiliza uma leitura já processada pela detecção de folhas. O(1)."""
+        agora = time.time() if agora is None else agora
+        minuto = int(agora // 60)
+        with self._lock:
+            ordens = self._maquinas.setdefault(codMaquina, OrderedDict())
+            grupo = ordens.get(ordemProducao)
+            if grupo is None:
+                grupo = ordens[ordemProducao] = _Grupo(self.minutos_buffer)
+                if len(ordens) > self.ordens_por_maquina:
+                    ordens.popitem(last=False)
+            else:
+                ordens.move_to_end(ordemProducao)
+
+            # Só aumentos contam: um total menor indica contagem reiniciada
+            novas = folhas - grupo.folhas if grupo.folhas is not None and folhas > grupo.folhas else 0
+            grupo.folhas = folhas
+            grupo.leituras += 1
+            grupo.distancia = distancia
+            grupo.ultima = agora
+            if novas:
+                grupo.ultima_folha = agora
+
+            if grupo.baldes and grupo.baldes[-1][0] == minuto:
+                balde = grupo.baldes[-1]
+                balde[1] += novas
+                balde[2] += 1
+            else:
+                grupo.baldes.append([minuto, novas, 1])
+
+    def instantaneo(self, agora=None, janela_minutos=JANELA_MINUTOS):
+        """Uma linha por máquina/ordem com situação, totais e folhas/hora na janela."""
+        agora = time.time() if agora is None else agora
+        inicio_janela = int(agora // 60) - janela_minutos + 1
+        linhas = []
+        with self._lock:
+            for codMaquina, ordens in self._maquinas.items():
+                for ordemProducao, grupo in ordens.items():
+                    folhas_janela = sum(b[1] for b in grupo.baldes if b[0] >= inicio_janela)
+                    # Janela efetiva: não conta minutos anteriores à primeira leitura do grupo
+                    primeiro_minuto = max(grupo.baldes[0][0], inicio_janela) if grupo.baldes else inicio_janela
+                    horas = max(agora - primeiro_minuto * 60, 60) / 3600
+                    linhas.append({
+                        'codMaquina': codMaquina,
+                        'ordemProducao': ordemProducao,
+                        'situacao': self._situacao(grupo, agora),
+                        'folhas': grupo.folhas,
+                        'folhas_hora': round(folhas_janela / horas, 1),
+                        'leituras': grupo.leituras,
+                        'distancia': grupo.distancia,
+                        'ultima_leitura_s': round(agora - grupo.ultima, 1),
+                    })
+        return linhas
+
+    def serie_minutos(self, agora=None):
+        """Folhas por minuto de cada máquina/ordem no buffer: (máquina, ordem, minuto local, folhas)."""
+        agora = time.time() if agora is None else agora
+        inicio = int(agora // 60) - self.minutos_buffer + 1
+        with self._lock:
+            return [(codMaquina, ordemProducao, datetime.fromtimestamp(minuto * 60), folhas)
+                    for codMaquina, ordens in self._maquinas.items()
+                    for ordemProducao, grupo in ordens.items()
+                    for minuto, folhas, _ in grupo.baldes if minuto >= inicio]
+
+    @staticmethod
+    def _situacao(grupo, agora):
+        if agora - grupo.ultima > SEM_SINAL_S:
+            return 'sem sinal'
+        if grupo.ultima_folha is None or agora - grupo.ultima_folha > PARADA_MINUTOS * 60:
+            return 'parada'
+        return 'produzindo'
+
+
+def criar_app_monitor(monitor: MonitorProducao, intervalo_ms=INTERVALO_ATUALIZACAO_MS):
+    """Página Dash que mostra o instantâneo do monitor, atualizada a cada `intervalo_ms`."""
+    # Importados aqui: o caminho de ingestão não precisa do Dash se a página não for aberta
+    import dash
+    import dash_bootstrap_components as dbc
+    import pandas as pd
+    import plotly.express as px
+    from dash import dcc, html, Input, Output, dash_table
+
+    app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], title="Monitor de Produção")
+    app.layout = dbc.Container([
+        dbc.Row(dbc.Col(html.H1("Monitor de Produção (ao vivo)", className="text-center my-4"), width=12)),
+        dcc.Interval(id='intervalo-monitor', interval=intervalo_ms),
+        dbc.Row(dbc.Col(html.Div(id='monitor-atualizado', className="text-muted small"), width=12)),
+        dbc.Row(dbc.Col(dash_table.DataTable(
+            id='tabela-monitor',
+            columns=[{'name': c, 'id': c} for c in COLUNAS_MONITOR],
+            style_cell={'textAlign': 'left'},
+            style_data_conditional=[
+                {'if': {'filter_query': '{situacao} = "sem sinal"'}, 'backgroundColor': '#f8d7da'},
+                {'if': {'filter_query': '{situacao} = "parada"'}, 'backgroundColor': '#fff3cd'},
+            ],
+        ), width=12)),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='grafico-folhas-hora'), md=5),
+            dbc.Col(dcc.Graph(id='grafico-folhas-minuto'), md=7),
+        ], className="mt-4"),
+    ], fluid=True)
+
+    @app.callback(
+        Output('tabela-monitor', 'data'),
+        Output('grafico-folhas-hora', 'figure'),
+        Output('grafico-folhas-minuto', 'figure'),
+        Output('monitor-atualizado', 'children'),
+        Input('intervalo-monitor', 'n_intervals'),
+    )
+    def atualizar_monitor(_):
+        agora = time.time()
+        linhas = monitor.instantaneo(agora)
+        df = pd.DataFrame(linhas, columns=COLUNAS_MONITOR)
+        fig_hora = px.bar(df, x='codMaquina', y='folhas_hora', color='ordemProducao', barmode='group',
+                          title=f"Folhas/hora (últimos {JANELA_MINUTOS} min)")
+        serie = pd.DataFrame(monitor.serie_minutos(agora), columns=['codMaquina', 'ordemProducao', 'minuto', 'folhas'])
+        fig_minuto = px.line(serie, x='minuto', y='folhas', color='codMaquina', line_group='ordemProducao',
+                             markers=True, title="Folhas por minuto")
+        return linhas, fig_hora, fig_minuto, f"Atualizado às {time.strftime('%H:%M:%S', time.localtime(agora))}"
+
+    return app
+
+
+def iniciar_monitor(monitor: MonitorProducao, porta=PORTA_MONITOR, host='127.0.0.1'):
+    """Serve a página do monitor numa thread daemon do próprio processo de coleta."""
+    app = criar_app_monitor(monitor)
+    # Sem uma linha de log por atualização da página no console da coleta
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    thread = threading.Thread(target=app.run, kwargs={'host': host, 'port': porta, 'debug': False},
+                              daemon=True, name='monitor-producao')
+    thread.start()
+    return thread
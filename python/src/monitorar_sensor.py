@@ -1,22 +1,34 @@
+import argparse
 import serial
 import time
 import logging
 from datetime import datetime
+import metricas
 from db_manager import DatabaseManager
+from monitor_producao import MonitorProducao, iniciar_monitor
 
 # Configurações
 PORTA_SERIAL = 'rfc2217://localhost:4000'
 COD_MAQUINA = 'maq002'
 ORDEM_PRODUCAO = 'OP00221'
-INTERVALO_SEGUNDOS = 0.2
+TIMEOUT_LEITURA = 1         # segundos de espera quando não há dados na porta
+TAMANHO_MAX_LINHA = 256     # bytes; linhas maiores (ruído, sem '\n') são descartadas
+INTERVALO_ESTATISTICAS = 10 # segundos entre os registros de estatísticas de leitura
 LIMITE_SUPERIOR = 300   # cm
 LIMITE_INFERIOR = 10    # cm
+PORTA_MONITOR = None    # página do monitor ao vivo (--monitor PORTA; requer dash)
+PORTA_METRICAS = None   # /metrics no formato do Prometheus (--metricas PORTA); as métricas são registradas sempre
+INTERVALO_METRICAS = metricas.INTERVALO_LOG_METRICAS   # segundos entre as linhas de métricas no log
+
+def novo_estado():
+    """Estado inicial da detecção de folhas (um por máquina)."""
+    return {
+        "ultima_posicao": "inicio",
+        "folhas": 0
+    }
 
 # Estado da leitura
-estado = {
-    "ultima_posicao": "inicio",
-    "folhas": 0
-}
+estado = novo_estado()
 
 # Logger configurado
 logging.basicConfig(
@@ -25,58 +37,194 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]
 )
 
-def detectar_folha(distancia, estado):
-    if estado["ultima_posicao"] == "inicio" and distancia >= LIMITE_SUPERIOR:
+def detectar_folha(distancia, estado, limite_superior=LIMITE_SUPERIOR, limite_inferior=LIMITE_INFERIOR):
+    if estado["ultima_posicao"] == "inicio" and distancia >= limite_superior:
         estado["ultima_posicao"] = "subindo"
-    elif estado["ultima_posicao"] == "subindo" and distancia <= LIMITE_INFERIOR:
+    elif estado["ultima_posicao"] == "subindo" and distancia <= limite_inferior:
         estado["ultima_posicao"] = "descendo"
         estado["folhas"] += 1
         logging.info(f" Nova folha registrada! Total: {estado['folhas']}")
-    elif estado["ultima_posicao"] == "descendo" and distancia >= LIMITE_SUPERIOR:
+    elif estado["ultima_posicao"] == "descendo" and distancia >= limite_superior:
         estado["ultima_posicao"] = "subindo"
     return estado["folhas"]
 
-def processar_linha(linha, estado, db):
+def interpretar_linha(linha):
+    """
+    Converte uma linha 'YYYY-MM-DD HH:MM:SS,distancia' do ESP32 em
+    (dataHora, distancia). Retorna None se a linha não for uma leitura e
+    levanta ValueError se estiver malformada.
+    """
+    if ',' not in linha:
+        return None
+    dataHora_str, distancia_str = linha.split(',')
+    dataHora = datetime.strptime(dataHora_str.strip(), "%Y-%m-%d %H:%M:%S")
+    distancia = float(distancia_str.strip())
+    return dataHora.strftime("%Y-%m-%d %H:%M:%S"), distancia
+
+class EstatisticasLeitura:
+    """Contadores da leitura serial: vazão, profundidade do buffer e perdas."""
+
+    def __init__(self, nome='sensor', intervalo_log=INTERVALO_ESTATISTICAS):
+        self.nome = nome
+        self.intervalo_log = intervalo_log
+        self.linhas = 0
+        self.bytes = 0
+        self.malformadas = 0
+        self.descartadas = 0
+        self.buffer_atual = 0
+        self.buffer_max = 0
+        self._inicio = self._ultimo_log = time.monotonic()
+        self._linhas_ultimo_log = 0
+
+        # Métricas do processo (ver metricas.py), uma série por máquina
+        self.linhas_lidas = metricas.contador('enfesto_linhas_lidas_total', "Linhas lidas da porta serial",
+                                              maquina=nome)
+        self.tempo_leitura = metricas.histograma('enfesto_leitura_serial_segundos',
+                                                 "Duração de cada read() da porta serial, incluindo a espera por dados",
+                                                 maquina=nome)
+        self.profundidade_buffer = metricas.medidor('enfesto_buffer_serial_bytes',
+                                                    "Bytes pendentes na porta serial na última leitura", maquina=nome)
+
+    def registrar_buffer(self, profundidade):
+        self.buffer_atual = profundidade
+        self.buffer_max = max(self.buffer_max, profundidade)
+        self.profundidade_buffer.definir(profundidade)
+
+    def linhas_por_segundo(self):
+        decorrido = time.monotonic() - self._inicio
+        return self.linhas / decorrido if decorrido > 0 else 0.0
+
+    def talvez_registrar(self):
+        agora = time.monotonic()
+        if agora - self._ultimo_log < self.intervalo_log:
+            return
+        taxa = (self.linhas - self._linhas_ultimo_log) / (agora - self._ultimo_log)
+        logging.info(
+            f" [{self.nome}] {taxa:.1f} linhas/s | buffer={self.buffer_atual} B (máx {self.buffer_max} B)"
+            f" | malformadas={self.malformadas} | descartadas={self.descartadas}"
+        )
+        self._ultimo_log = agora
+        self._linhas_ultimo_log = self.linhas
+
+
+class LeitorLinhas:
+    """
+    Lê a porta serial guiado pela disponibilidade de dados: consome tudo o que
+    estiver em `in_waiting` de uma vez e separa em linhas; sem dados, bloqueia
+    no read() até o timeout da porta. Não há espera fixa entre leituras.
+    """
+
+    def __init__(self, ser, estatisticas=None, tamanho_max_linha=TAMANHO_MAX_LINHA):
+        self.ser = ser
+        self.estatisticas = estatisticas or EstatisticasLeitura()
+        self.tamanho_max_linha = tamanho_max_linha
+        self._resto = b''
+
+    def ler_linhas(self):
+        """Devolve as linhas completas recebidas (pode ser uma lista vazia)."""
+        pendente = self.ser.in_waiting
+        self.estatisticas.registrar_buffer(pendente)
+        inicio = time.perf_counter()
+        bloco = self.ser.read(pendente or 1)
+        self.estatisticas.tempo_leitura.observar(time.perf_counter() - inicio)
+        if not bloco:
+            return []
+        self.estatisticas.bytes += len(bloco)
+
+        *completas, self._resto = (self._resto + bloco).split(b'\n')
+        if len(self._resto) > self.tamanho_max_linha:
+            self.estatisticas.descartadas += 1
+            self._resto = b''
+
+        linhas = []
+        for bruta in completas:
+            try:
+                linha = bruta.decode('utf-8').strip()
+            except UnicodeDecodeError:
+                self.estatisticas.descartadas += 1
+                continue
+            if linha:
+                linhas.append(linha)
+        self.estatisticas.linhas += len(linhas)
+        self.estatisticas.linhas_lidas.incrementar(len(linhas))
+        return linhas
+
+
+def processar_linha(linha, estado, db, codMaquina=COD_MAQUINA, ordemProducao=ORDEM_PRODUCAO, monitor=None):
+    """
+    Interpreta, conta folhas e grava uma linha (e a contabiliza no `monitor`,
+    se houver). Retorna False se a linha estava malformada.
+    """
     try:
-        if ',' in linha:
-            dataHora_str, distancia_str = linha.split(',')
-            dataHora = datetime.strptime(dataHora_str.strip(), "%Y-%m-%d %H:%M:%S")
-            distancia = float(distancia_str.strip())
+        leitura = interpretar_linha(linha)
+        if leitura:
+            dataHora, distancia = leitura
 
             folhas = detectar_folha(distancia, estado)
+            if monitor is not None:
+                monitor.registrar(codMaquina, ordemProducao, distancia, folhas)
 
-            logging.info(f"[{dataHora}]  {distancia:.1f} cm | OP={ORDEM_PRODUCAO} | folhas={folhas}")
+            # Uma linha por leitura: só é formatada com o log em DEBUG
+            logging.debug("[%s]  %.1f cm | OP=%s | folhas=%s", dataHora, distancia, ordemProducao, folhas)
 
             db.inserir_leitura(
-                codMaquina=COD_MAQUINA,
-                ordemProducao=ORDEM_PRODUCAO,
-                dataHora=dataHora.strftime("%Y-%m-%d %H:%M:%S"),
+                codMaquina=codMaquina,
+                ordemProducao=ordemProducao,
+                dataHora=dataHora,
                 distancia=distancia,
                 folhas=folhas
             )
+        return True
     except Exception as e:
         logging.warning(f" Erro ao processar linha '{linha.strip()}': {e}")
+        return False
 
-def monitorar_sensor():
+def monitorar_sensor(porta_monitor=PORTA_MONITOR, porta_metricas=PORTA_METRICAS, intervalo_metricas=INTERVALO_METRICAS):
     logging.info(" Iniciando monitoramento do sensor...")
 
     try:
-        with serial.serial_for_url(PORTA_SERIAL, baudrate=115200, timeout=1) as ser, \
-             DatabaseManager("../database/enfesto.db") as db:
+        with serial.serial_for_url(PORTA_SERIAL, baudrate=115200, timeout=TIMEOUT_LEITURA) as ser, \
+             DatabaseManager("../database/enfesto.db", otimizado=True) as db:
 
             logging.info(" Conectado ao sensor via RFC2217")
             logging.info(" Monitorando sensor...\n")
 
+            # Sem o monitor, a coleta não carrega o Dash nem ocupa porta
+            monitor = None
+            if porta_monitor:
+                monitor = MonitorProducao()
+                iniciar_monitor(monitor, porta_monitor)
+                logging.info(f" Monitor ao vivo em http://127.0.0.1:{porta_monitor}")
+            if porta_metricas:
+                metricas.iniciar_servidor_metricas(porta_metricas)
+                logging.info(f" Métricas em http://127.0.0.1:{porta_metricas}/metrics")
+            if intervalo_metricas:
+                metricas.registrar_periodicamente(intervalo_metricas)
+
+            leitor = LeitorLinhas(ser, EstatisticasLeitura(COD_MAQUINA))
             while True:
-                linha = ser.readline().decode('utf-8').strip()
-                if linha:
-                    processar_linha(linha, estado, db)
-                time.sleep(INTERVALO_SEGUNDOS)
+                for linha in leitor.ler_linhas():
+                    if not processar_linha(linha, estado, db, monitor=monitor):
+                        leitor.estatisticas.malformadas += 1
+                # Sem linhas novas, o buffer só seria gravado na próxima leitura
+                db.flush_se_vencido()
+                leitor.estatisticas.talvez_registrar()
 
     except KeyboardInterrupt:
         logging.info("\n Monitoramento encerrado pelo usuário.")
     except Exception as e:
         logging.exception("Erro inesperado durante execução:")
 
+def main():
+    parser = argparse.ArgumentParser(description="Leitura do sensor de uma mesa de enfesto, gravada no banco.")
+    parser.add_argument('--monitor', type=int, metavar='PORTA', default=PORTA_MONITOR,
+                        help="serve o monitor de produção ao vivo nesta porta")
+    parser.add_argument('--metricas', type=int, metavar='PORTA', default=PORTA_METRICAS,
+                        help="serve as métricas (formato Prometheus) em /metrics nesta porta")
+    parser.add_argument('--log-metricas', type=float, metavar='SEGUNDOS', default=INTERVALO_METRICAS,
+                        help="escreve uma linha com as métricas no log a cada SEGUNDOS (0 desativa)")
+    args = parser.parse_args()
+    monitorar_sensor(args.monitor, args.metricas, args.log_metricas)
+
 if __name__ == '__main__':
-    monitorar_sensor()
+    main()
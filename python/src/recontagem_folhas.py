@@ -0,0 +1,128 @@
+"""
+Recontagem vetorizada de folhas sobre o histórico de distâncias.
+
+Reproduz com NumPy a máquina de estados de `monitorar_sensor.detectar_folha`
+(histerese entre LIMITE_SUPERIOR e LIMITE_INFERIOR) para uma série inteira de
+distâncias, ou para uma sequência de blocos, e permite recalcular a coluna
+`folhas` de uma máquina/ordem já gravada em `leituras`, por exemplo após
+mudar os limites.
+"""
+
+import logging
+
+import numpy as np
+
+from db_manager import DatabaseManager
+from monitorar_sensor import LIMITE_SUPERIOR, LIMITE_INFERIOR, novo_estado
+
+# Codificação dos eventos: acima do limite superior "arma" a contagem, abaixo
+# do inferior conta uma folha se estiver armada. Entre os limites nada muda.
+ARMADO = 1
+DESARMADO = -1
+
+
+def contar_folhas(distancias, estado=None, limite_superior=LIMITE_SUPERIOR, limite_inferior=LIMITE_INFERIOR):
+    """
+    Retorna o total acumulado de folhas após cada amostra de `distancias`,
+    idêntico a chamar detectar_folha amostra a amostra. Se `estado` for
+    informado, a contagem parte dele e ele é atualizado ao final (para
+    processar uma série em blocos).
+    """
+    if estado is None:
+        estado = novo_estado()
+    distancias = np.asarray(distancias, dtype=np.float64)
+
+    eventos = np.zeros(len(distancias) + 1, dtype=np.int8)
+    eventos[0] = ARMADO if estado["ultima_posicao"] == "subindo" else 0
+    eventos[1:][distancias >= limite_superior] = ARMADO
+    eventos[1:][distancias <= limite_inferior] = DESARMADO
+
+    # Propaga o último evento: situação (armado/desarmado) antes de cada amostra
+    posicoes = np.where(eventos != 0, np.arange(len(eventos)), 0)
+    situacao = eventos[np.maximum.accumulate(posicoes)]
+
+    novas_folhas = (eventos[1:] == DESARMADO) & (situacao[:-1] == ARMADO)
+    folhas = estado["folhas"] + np.cumsum(novas_folhas, dtype=np.int64)
+
+    if situacao[-1] == ARMADO:
+        estado["ultima_posicao"] = "subindo"
+    elif novas_folhas.any():
+        estado["ultima_posicao"] = "descendo"
+    if len(folhas):
+        estado["folhas"] = int(folhas[-1])
+    return folhas
+
+
+def contar_folhas_em_blocos(blocos, estado=None, limite_superior=LIMITE_SUPERIOR, limite_inferior=LIMITE_INFERIOR):
+    """Versão em streaming: gera o acumulado de folhas de cada bloco de distâncias."""
+    if estado is None:
+        estado = novo_estado()
+    for distancias in blocos:
+        yield contar_folhas(distancias, estado, limite_superior, limite_inferior)
+
+
+def estado_apos_trechos(trechos, limite_superior=LIMITE_SUPERIOR, limite_inferior=LIMITE_INFERIOR):
+    """
+    Estado da detecção ao fim dos trechos compactados de uma máquina/ordem
+    (tuplas distancia_min, distancia_max, folhas, em ordem de início), para
+    continuar a contagem nas leituras brutas seguintes. As folhas partem do
+    maior valor gravado nos trechos; a contagem fica armada se o último trecho
+    que cruzou um limite passou só do superior. Retorna (estado, exato):
+    `exato` é False quando esse trecho cruzou os dois limites (modo "minuto")
+    e não dá para saber qual veio por último.
+    """
+    estado = novo_estado()
+    if not trechos:
+        return estado, True
+    estado["folhas"] = max(folhas for _, _, folhas in trechos)
+    for distancia_min, distancia_max, _ in reversed(trechos):
+        acima = distancia_max >= limite_superior
+        abaixo = distancia_min <= limite_inferior
+        if acima and abaixo:
+            return estado, False
+        if acima:
+            estado["ultima_posicao"] = "subindo"
+            break
+        if abaixo:
+            estado["ultima_posicao"] = "descendo" if estado["folhas"] else "inicio"
+            break
+    return estado, True
+
+
+def recontar_folhas(db: DatabaseManager, codMaquina, ordemProducao, limite_superior=LIMITE_SUPERIOR,
+                    limite_inferior=LIMITE_INFERIOR, gravar=False, tamanho_bloco=500000):
+    """
+    Recalcula as folhas de uma máquina/ordem a partir das distâncias gravadas,
+    em ordem de dataHora. Retorna (total_anterior, total_recontado); com
+    `gravar`, atualiza a coluna folhas e os resumos.
+
+    Leituras já compactadas pela retenção não têm mais as distâncias: a
+    contagem das leituras brutas continua do estado ao fim dos trechos
+    compactados (ver estado_apos_trechos). Se esse estado não puder ser
+    determinado, `gravar` é recusado com ValueError.
+    """
+    estado, exato = estado_apos_trechos(db.buscar_trechos_compactados(codMaquina, ordemProducao),
+                                        limite_superior, limite_inferior)
+    if not exato:
+        if gravar:
+            raise ValueError(f"Recontagem de {codMaquina}/{ordemProducao} não pode ser gravada: o último trecho "
+                             f"compactado cruza os dois limites e o estado da detecção é desconhecido.")
+        logging.warning(f" Recontagem {codMaquina} | OP={ordemProducao}: estado após os trechos compactados "
+                        f"desconhecido; contagem aproximada.")
+    total_anterior = estado["folhas"]
+    alteracoes = []
+    for bloco in db.iterar_leituras(codMaquina, ordemProducao, tamanho_bloco=tamanho_bloco, ordenar=True,
+                                     codificado=True):
+        ids, distancias, folhas_gravadas = zip(*((l[0], l[4], l[5]) for l in bloco))
+        folhas = contar_folhas(distancias, estado, limite_superior, limite_inferior)
+        total_anterior = max(total_anterior, max(folhas_gravadas))
+
+        if gravar:
+            mudou = folhas != np.asarray(folhas_gravadas)
+            alteracoes.extend(zip(folhas[mudou].tolist(), np.asarray(ids)[mudou].tolist()))
+
+    if gravar and alteracoes:
+        db.atualizar_folhas(codMaquina, ordemProducao, alteracoes)
+
+    logging.info(f" Recontagem {codMaquina} | OP={ordemProducao}: {total_anterior} -> {estado['folhas']} folhas")
+    return total_anterior, estado["folhas"]
@@ -0,0 +1,133 @@
+"""
+Pós-processamento colunar do plano de produção.
+
+O fator de custo de cada linha do plano vem de um join com uma tabela
+(Setor, Recurso, Turno) -> fator, montada uma vez a partir das capacidades, em
+vez de uma consulta ao dicionário por linha. O resultado fica em um
+ResultadoPlano, consumido tanto pelo gráfico quanto pela tabela do dashboard.
+
+O ResultadoPlano fica no servidor: o navegador recebe só a página visível da
+tabela (paginação, ordenação e filtro "custom" da DataTable) e a série já
+agregada do gráfico.
+"""
+
+import math
+import re
+
+import pandas as pd
+
+COLUNA_QUANTIDADE = 'Quantidade (Peças)'
+COLUNAS_GRAFICO = ['Setor', 'Semana', 'Recurso']
+COLUNAS_TABELA = ['Setor', 'Semana', 'Recurso', 'Tecido', COLUNA_QUANTIDADE, 'Fator Hora Médio (%)']
+
+
+# Expressões do filter_query da DataTable, ex.: {Semana} >= 3 && {Recurso} contains "Oficina"
+PADRAO_FILTRO = re.compile(
+    r'^\{(?P<coluna>[^}]+)\}\s*(?P<operador>[is]?(?:>=|<=|!=|=|<|>|eq|ne|lt|le|gt|ge|contains|datestartswith))\s*(?P<valor>.*)$'
+)
+OPERADORES = {'>=': 'ge', '<=': 'le', '!=': 'ne', '=': 'eq', '<': 'lt', '>': 'gt'}
+
+
+def _valor_filtro(texto):
+    texto = texto.strip()
+    if len(texto) >= 2 and texto[0] == texto[-1] and texto[0] in '"\'`':
+        return texto[1:-1]
+    try:
+        return float(texto)
+    except ValueError:
+        return texto
+
+
+def filtrar(df, filtro):
+    """Aplica o filter_query da DataTable; partes que não forem reconhecidas são ignoradas."""
+    if not filtro:
+        return df
+    mascara = pd.Series(True, index=df.index)
+    for parte in filtro.split(' && '):
+        encontrado = PADRAO_FILTRO.match(parte.strip())
+        if not encontrado or encontrado['coluna'] not in df.columns:
+            continue
+        coluna = df[encontrado['coluna']]
+        operador = encontrado['operador']
+        sensivel = not operador.startswith('i')
+        operador = OPERADORES.get(operador.lstrip('is'), operador.lstrip('is'))
+        valor = _valor_filtro(encontrado['valor'])
+
+        if operador == 'contains':
+            mascara &= coluna.astype(str).str.contains(str(valor), case=sensivel, regex=False)
+        elif operador == 'datestartswith':
+            mascara &= coluna.astype(str).str.startswith(str(valor))
+        else:
+            try:
+                mascara &= getattr(coluna, operador)(valor)
+            except TypeError:
+                # Número comparado com texto (ou o contrário): nenhuma linha atende
+                mascara &= False
+    return df[mascara]
+
+
+def ordenar(df, ordenacao):
+    """Aplica o sort_by da DataTable: lista de {'column_id', 'direction'}."""
+    ordenacao = [o for o in (ordenacao or []) if o['column_id'] in df.columns]
+    if not ordenacao:
+        return df
+    return df.sort_values([o['column_id'] for o in ordenacao],
+                          ascending=[o['direction'] == 'asc' for o in ordenacao], kind='mergesort')
+
+
+def tabela_custos(capacidade_corte_input, capacidade_costura_input):
+    """Uma linha por (Setor, Recurso, Turno) com o fator de custo correspondente."""
+    linhas = []
+    for setor, capacidades in (('Corte', capacidade_corte_input), ('Costura', capacidade_costura_input)):
+        for recurso, dados in capacidades.items():
+            linhas.append((setor, recurso, 'normal', dados['fator_custo_normal']))
+            linhas.append((setor, recurso, 'extra', dados['fator_custo_extra']))
+    return pd.DataFrame(linhas, columns=['Setor', 'Recurso', 'Turno', 'fator_custo'])
+
+
+def anexar_custos(df_resultados, custos):
+    """Acrescenta fator_custo e custo_pontos ao plano (join por Setor, Recurso e Turno)."""
+    detalhe = df_resultados.merge(custos, on=['Setor', 'Recurso', 'Turno'], how='left', sort=False)
+    detalhe['custo_pontos'] = detalhe[COLUNA_QUANTIDADE] * detalhe['fator_custo']
+    return detalhe
+
+
+class ResultadoPlano:
+    """
+    Plano resolvido em formato colunar:
+    - `detalhe`: uma linha por (setor, semana, recurso, tecido, turno), com custos;
+    - `tabela`: agregado por (setor, semana, recurso, tecido), com o fator hora médio;
+    - `serie_grafico`: quantidade por (setor, semana, recurso), o que o gráfico desenha.
+    Calculado uma vez por solução e compartilhado pelo gráfico e pela tabela.
+    """
+
+    def __init__(self, df_resultados, capacidade_corte_input, capacidade_costura_input):
+        self.detalhe = anexar_custos(df_resultados, tabela_custos(capacidade_corte_input, capacidade_costura_input))
+        self.tabela = self._agregar(self.detalhe)
+        self.serie_grafico = self.detalhe.groupby(COLUNAS_GRAFICO, sort=False)[COLUNA_QUANTIDADE].sum().reset_index()
+
+    @staticmethod
+    def _agregar(detalhe):
+        if detalhe.empty:
+            return pd.DataFrame(columns=COLUNAS_TABELA)
+        agregado = detalhe.groupby(['Setor', 'Semana', 'Recurso', 'Tecido'], sort=True).agg(
+            quantidade_total=(COLUNA_QUANTIDADE, 'sum'),
+            custo_total_pontos=('custo_pontos', 'sum')
+        ).reset_index()
+        agregado['Fator Hora Médio (%)'] = (agregado['custo_total_pontos'] / agregado['quantidade_total']).round(2)
+        return agregado.rename(columns={'quantidade_total': COLUNA_QUANTIDADE})[COLUNAS_TABELA]
+
+    @property
+    def vazio(self):
+        return self.detalhe.empty
+
+    def registros(self):
+        """Linhas da tabela agregada no formato da DataTable."""
+        return self.tabela.to_dict('records')
+
+    def pagina(self, pagina, tamanho, ordenacao=None, filtro=None):
+        """Uma página da tabela filtrada e ordenada; retorna (registros, total de páginas)."""
+        tabela = ordenar(filtrar(self.tabela, filtro), ordenacao)
+        total_paginas = max(math.ceil(len(tabela) / tamanho), 1)
+        pagina = min(max(pagina or 0, 0), total_paginas - 1)
+        return tabela.iloc[pagina * tamanho:(pagina + 1) * tamanho].to_dict('records'), total_paginas
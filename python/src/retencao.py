@@ -0,0 +1,141 @@
+"""
+Retenção das leituras antigas.
+
+Leituras brutas com mais de N dias são trocadas por trechos em
+`leituras_compactadas`, cada um resumindo leituras consecutivas da mesma
+máquina/ordem e do mesmo dia:
+
+- modo "mudancas": um trecho por mudança de `folhas` ou da faixa de distância
+  (abaixo do limite inferior, entre os limites, acima do superior), isto é,
+  só onde a detecção de folhas poderia ter mudado de estado;
+- modo "minuto": um trecho por minuto.
+
+Cada trecho guarda início, fim, quantidade de leituras, distância mínima e
+máxima e o maior valor de folhas, o suficiente para que os resumos (e os
+relatórios que os leem) continuem com os mesmos totais. A compactação roda uma
+vez ou em intervalos fixos, em paralelo ao coletor (WAL).
+
+Uso:
+    python retencao.py --dias 30 --modo mudancas --intervalo-horas 24
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+
+from db_manager import DatabaseManager
+from monitorar_sensor import LIMITE_SUPERIOR, LIMITE_INFERIOR
+
+DIAS_RETENCAO = 30          # leituras brutas mais novas que isso não são tocadas
+MODO_MUDANCAS = 'mudancas'
+MODO_MINUTO = 'minuto'
+MODOS = (MODO_MUDANCAS, MODO_MINUTO)
+INTERVALO_HORAS = 24        # entre compactações no modo agendado
+
+
+def faixa_distancia(distancia, limite_superior=LIMITE_SUPERIOR, limite_inferior=LIMITE_INFERIOR):
+    """0 abaixo do limite inferior, 2 acima do superior, 1 entre os dois."""
+    if distancia <= limite_inferior:
+        return 0
+    if distancia >= limite_superior:
+        return 2
+    return 1
+
+
+def segmentar(blocos, modo=MODO_MUDANCAS):
+    """
+    Agrupa leituras (tuplas da tabela leituras, por máquina/ordem e em ordem
+    de dataHora) em trechos no formato de leituras_compactadas. Um trecho
+    nunca atravessa a virada do dia, para que resumo_dia continue exato.
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo de retenção desconhecido: {modo!r} (use {', '.join(MODOS)})")
+
+    trecho = None
+    for bloco in blocos:
+        for _, codMaquina, ordemProducao, dataHora, distancia, folhas in bloco:
+            if modo == MODO_MINUTO:
+                quebra = dataHora[:16]
+            else:
+                quebra = (dataHora[:10], folhas, faixa_distancia(distancia))
+
+            if trecho is not None and trecho['grupo'] == (codMaquina, ordemProducao, quebra):
+                trecho['fim'] = dataHora
+                trecho['leituras'] += 1
+                trecho['distancia_min'] = min(trecho['distancia_min'], distancia)
+                trecho['distancia_max'] = max(trecho['distancia_max'], distancia)
+                trecho['folhas'] = max(trecho['folhas'], folhas)
+                continue
+
+            if trecho is not None:
+                yield _linha_trecho(trecho)
+            trecho = {
+                'grupo': (codMaquina, ordemProducao, quebra),
+                'codMaquina': codMaquina, 'ordemProducao': ordemProducao,
+                'inicio': dataHora, 'fim': dataHora, 'leituras': 1,
+                'distancia_min': distancia, 'distancia_max': distancia, 'folhas': folhas,
+            }
+    if trecho is not None:
+        yield _linha_trecho(trecho)
+
+
+def _linha_trecho(trecho):
+    return (trecho['codMaquina'], trecho['ordemProducao'], trecho['inicio'], trecho['fim'],
+            trecho['leituras'], trecho['distancia_min'], trecho['distancia_max'], trecho['folhas'])
+
+
+def compactar(db: DatabaseManager, dias=DIAS_RETENCAO, modo=MODO_MUDANCAS, agora=None):
+    """
+    Compacta as leituras brutas com mais de `dias` dias. Retorna
+    (leituras removidas, trechos gravados).
+    """
+    corte = (agora or datetime.now()) - timedelta(days=dias)
+    corte = corte.strftime('%Y-%m-%d %H:%M:%S')
+    inicio = time.perf_counter()
+
+    ultimo_id = db.maior_id_leitura()
+    # Os trechos são gerados e gravados em blocos: a memória não cresce com a janela
+    trechos = segmentar(db.iterar_leituras_compactaveis(ultimo_id, corte), modo)
+    removidas, gravados = db.compactar_leituras(trechos, ultimo_id, corte)
+    if not gravados:
+        logging.info(f"Retenção: nenhuma leitura anterior a {corte} para compactar.")
+        return 0, 0
+
+    logging.info(f"Retenção ({modo}): {removidas} leitura(s) anteriores a {corte} viraram "
+                 f"{gravados} trecho(s) em {time.perf_counter() - inicio:.2f}s.")
+    return removidas, gravados
+
+
+def executar_agendado(db: DatabaseManager, dias=DIAS_RETENCAO, modo=MODO_MUDANCAS,
+                      intervalo_horas=INTERVALO_HORAS):
+    """Compacta agora e depois a cada `intervalo_horas`, até ser interrompido."""
+    while True:
+        compactar(db, dias, modo)
+        time.sleep(intervalo_horas * 3600)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='../database/enfesto.db', help="banco SQLite")
+    parser.add_argument('--dias', type=float, default=DIAS_RETENCAO, help="idade mínima (dias) das leituras compactadas")
+    parser.add_argument('--modo', choices=MODOS, default=MODO_MUDANCAS, help="um trecho por mudança ou por minuto")
+    parser.add_argument('--intervalo-horas', type=float, default=INTERVALO_HORAS, help="intervalo entre compactações")
+    parser.add_argument('--uma-vez', action='store_true', help="compacta uma vez e encerra")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    db = DatabaseManager(args.db)
+    try:
+        if args.uma_vez:
+            compactar(db, args.dias, args.modo)
+        else:
+            executar_agendado(db, args.dias, args.modo, args.intervalo_horas)
+    except KeyboardInterrupt:
+        logging.info("Retenção encerrada pelo usuário.")
+    finally:
+        db.fechar()
+
+
+if __name__ == '__main__':
+    main()
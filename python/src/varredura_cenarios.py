@@ -0,0 +1,203 @@
+"""
+Varredura de cenários do otimizador de produção.
+
+Resolve em paralelo (um processo por núcleo) uma lista ou grade de variações
+da demanda e da capacidade em torno do cenário base do ml_model, e consolida
+tudo em um único DataFrame: status, custo e carga de cada recurso por cenário.
+
+Uso:
+    python varredura_cenarios.py --demanda 0.9 1.0 1.1 --capacidade 0.8 1.0 \\
+        --sem-recurso "Dieter Marquart ME" --saida ../output/varredura.csv
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from ml_model import (construir_modelo, resolver_modelo, extrair_resultados, DEMANDA_VENDAS,
+                      CAPACIDADE_CORTE, CAPACIDADE_COSTURA, SEMANAS)
+
+COLUNAS_VARREDURA = ['cenario', 'status', 'custo', 'tempo_s', 'Setor', 'Recurso',
+                     'quantidade', 'quantidade_extra', 'capacidade', 'carga']
+
+
+def gerar_grade(fatores_demanda=(1.0,), fatores_capacidade=(1.0,), recursos_removidos=(None,)):
+    """
+    Produto cartesiano das variações. Cada fator de demanda é um número
+    (aplicado a todos os tecidos) ou um dict {tecido: fator}; os de capacidade
+    multiplicam cp_min e cp_max de todos os recursos; cada item de
+    `recursos_removidos` é None, um recurso ou uma lista de recursos fora do plano.
+    """
+    cenarios = []
+    for demanda, capacidade, removidos in itertools.product(fatores_demanda, fatores_capacidade, recursos_removidos):
+        if isinstance(removidos, str):
+            removidos = [removidos]
+        cenarios.append({
+            'fator_demanda': demanda,
+            'fator_capacidade': capacidade,
+            'sem_recurso': list(removidos or []),
+        })
+    return cenarios
+
+
+def nome_cenario(cenario):
+    if 'nome' in cenario:
+        return cenario['nome']
+    demanda = cenario.get('fator_demanda', 1.0)
+    if isinstance(demanda, dict):
+        demanda = ','.join(f"{t}={f:g}" for t, f in sorted(demanda.items()))
+    else:
+        demanda = f"{demanda:g}"
+    nome = f"demanda={demanda} capacidade={cenario.get('fator_capacidade', 1.0):g}"
+    if cenario.get('sem_recurso'):
+        nome += f" sem={'+'.join(cenario['sem_recurso'])}"
+    return nome
+
+
+def aplicar_cenario(cenario, demanda, capacidade_corte_input, capacidade_costura_input):
+    """Devolve cópias da demanda e das capacidades com as variações do cenário."""
+    fator_demanda = cenario.get('fator_demanda', 1.0)
+    if not isinstance(fator_demanda, dict):
+        fator_demanda = {tecido: fator_demanda for tecido in demanda}
+    demanda = {tecido: round(total * fator_demanda.get(tecido, 1.0)) for tecido, total in demanda.items()}
+
+    fator = cenario.get('fator_capacidade', 1.0)
+    removidos = set(cenario.get('sem_recurso') or [])
+
+    def ajustar(capacidades):
+        return {
+            recurso: {**dados, 'cp_min': round(dados['cp_min'] * fator), 'cp_max': round(dados['cp_max'] * fator)}
+            for recurso, dados in capacidades.items() if recurso not in removidos
+        }
+
+    return demanda, ajustar(capacidade_corte_input), ajustar(capacidade_costura_input)
+
+
+def _carga_por_recurso(df_resultados, capacidades, num_semanas):
+    """Produção total, produção extra e carga (produção / capacidade máxima do horizonte) de cada recurso."""
+    linhas = []
+    for setor, capacidade_setor in capacidades.items():
+        for recurso, dados in capacidade_setor.items():
+            linhas.append({'Setor': setor, 'Recurso': recurso, 'capacidade': dados['cp_max'] * num_semanas})
+    carga = pd.DataFrame(linhas, columns=['Setor', 'Recurso', 'capacidade'])
+
+    if df_resultados is None:
+        carga['quantidade'] = float('nan')
+        carga['quantidade_extra'] = float('nan')
+    else:
+        producao = df_resultados.assign(
+            extra=df_resultados['Quantidade (Peças)'].where(df_resultados['Turno'] == 'extra', 0)
+        ).groupby(['Setor', 'Recurso']).agg(quantidade=('Quantidade (Peças)', 'sum'), quantidade_extra=('extra', 'sum'))
+        carga = carga.merge(producao.reset_index(), on=['Setor', 'Recurso'], how='left')
+        carga[['quantidade', 'quantidade_extra']] = carga[['quantidade', 'quantidade_extra']].fillna(0)
+
+    carga['carga'] = carga['quantidade'] / carga['capacidade'].where(carga['capacidade'] > 0)
+    return carga
+
+
+def resolver_cenario(cenario, demanda=None, capacidade_corte_input=None, capacidade_costura_input=None,
+                     semanas=None, entrega_tecidos_perc=None, opcoes_cbc=None):
+    """Resolve um cenário e devolve suas linhas do DataFrame consolidado."""
+    semanas = semanas or SEMANAS
+    demanda, corte, costura = aplicar_cenario(
+        cenario, demanda or DEMANDA_VENDAS, capacidade_corte_input or CAPACIDADE_CORTE,
+        capacidade_costura_input or CAPACIDADE_COSTURA)
+
+    model, corte_vars, costura_vars = construir_modelo(demanda, corte, costura, semanas, entrega_tecidos_perc)
+    # Uma thread do CBC por processo: o paralelismo vem dos cenários
+    metricas = resolver_modelo(model, **{'threads': 1, **(opcoes_cbc or {})})
+    status, custo, df_resultados = extrair_resultados(model, corte_vars, costura_vars)
+
+    carga = _carga_por_recurso(df_resultados if status == 'Optimal' else None,
+                               {'Corte': corte, 'Costura': costura}, len(semanas))
+    carga.insert(0, 'cenario', nome_cenario(cenario))
+    carga.insert(1, 'status', status)
+    carga.insert(2, 'custo', float('nan') if custo is None else float(custo))
+    carga.insert(3, 'tempo_s', metricas['tempo_s'])
+    return carga[COLUNAS_VARREDURA]
+
+
+def _resolver_tarefa(argumentos):
+    cenario, kwargs = argumentos
+    return resolver_cenario(cenario, **kwargs)
+
+
+def varrer_cenarios(cenarios, demanda=None, capacidade_corte_input=None, capacidade_costura_input=None,
+                    semanas=None, entrega_tecidos_perc=None, num_processos=None, opcoes_cbc=None):
+    """
+    Resolve todos os cenários em paralelo e devolve um único DataFrame com uma
+    linha por (cenário, recurso). `num_processos=1` resolve no próprio processo.
+    """
+    kwargs = {
+        'demanda': demanda, 'capacidade_corte_input': capacidade_corte_input,
+        'capacidade_costura_input': capacidade_costura_input, 'semanas': semanas,
+        'entrega_tecidos_perc': entrega_tecidos_perc, 'opcoes_cbc': opcoes_cbc,
+    }
+    tarefas = [(cenario, kwargs) for cenario in cenarios]
+    num_processos = min(num_processos or os.cpu_count() or 1, max(len(tarefas), 1))
+
+    inicio = time.perf_counter()
+    if num_processos == 1:
+        partes = [_resolver_tarefa(tarefa) for tarefa in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=num_processos) as executor:
+            # map preserva a ordem dos cenários
+            partes = list(executor.map(_resolver_tarefa, tarefas, chunksize=max(len(tarefas) // (num_processos * 4), 1)))
+    logging.info(f"{len(tarefas)} cenário(s) resolvido(s) em {time.perf_counter() - inicio:.2f}s "
+                 f"com {num_processos} processo(s).")
+
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_VARREDURA)
+    return pd.concat(partes, ignore_index=True)
+
+
+def salvar_varredura(df, caminho):
+    """Grava em Parquet (se houver pyarrow/fastparquet) ou CSV, conforme a extensão."""
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    if caminho.endswith('.parquet'):
+        try:
+            df.to_parquet(caminho, index=False)
+            return caminho
+        except ImportError:
+            caminho = caminho[:-len('.parquet')] + '.csv'
+            logging.warning(f"Parquet indisponível (instale pyarrow); gravando em CSV: {caminho}")
+    df.to_csv(caminho, index=False, sep=';', encoding='utf-8')
+    return caminho
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--demanda', type=float, nargs='+', default=[1.0], help="fatores aplicados à demanda")
+    parser.add_argument('--capacidade', type=float, nargs='+', default=[1.0], help="fatores aplicados às capacidades")
+    parser.add_argument('--sem-recurso', nargs='+', default=[], help="recursos retirados, um cenário para cada")
+    parser.add_argument('--cenarios', help="arquivo JSON com uma lista de cenários (substitui a grade)")
+    parser.add_argument('--processos', type=int, default=None, help="processos paralelos (padrão: núcleos)")
+    parser.add_argument('--saida', default='../output/varredura.csv', help="arquivo .csv ou .parquet")
+    args = parser.parse_args()
+
+    if args.cenarios:
+        with open(args.cenarios, encoding='utf-8') as arquivo:
+            cenarios = json.load(arquivo)
+    else:
+        cenarios = gerar_grade(args.demanda, args.capacidade, [None] + args.sem_recurso)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    df = varrer_cenarios(cenarios, num_processos=args.processos)
+    caminho = salvar_varredura(df, args.saida)
+
+    resumo = df.groupby('cenario', sort=False).agg(status=('status', 'first'), custo=('custo', 'first'),
+                                                    carga_maxima=('carga', 'max'))
+    print(resumo.to_string())
+    print(f"\n{len(cenarios)} cenário(s) gravado(s) em {caminho}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+# Os módulos de src/ são importados pelo nome, como nos scripts e benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from db_manager import DatabaseManager  # noqa: E402
+from monitorar_sensor import novo_estado  # noqa: E402
+from recontagem_folhas import contar_folhas  # noqa: E402
+
+INICIO = datetime(2025, 9, 1, 7, 0, 0)
+
+
+def gerar_leituras(maquinas=2, ordens=2, dias=2, leituras_por_dia=600):
+    """Vai e vem do carro (uma folha a cada 20 leituras), um segundo por leitura e ordens que atravessam dias."""
+    leituras = []
+    por_ordem = dias * leituras_por_dia // ordens
+    for maquina in range(maquinas):
+        estados = {}
+        for indice in range(dias * leituras_por_dia):
+            dia, segundo = divmod(indice, leituras_por_dia)
+            ordem = f"OP{maquina + 1}{indice // por_ordem + 1}"
+            distancia = 320.0 if (indice + 7 * maquina) % 20 < 10 else 5.0
+            folhas = int(contar_folhas([distancia], estados.setdefault(ordem, novo_estado()))[0])
+            dataHora = (INICIO + timedelta(days=dia, seconds=segundo)).strftime('%Y-%m-%d %H:%M:%S')
+            leituras.append((f"maq{maquina + 1:03d}", ordem, dataHora, distancia, folhas))
+    return leituras
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Banco com as leituras de gerar_leituras() já gravadas."""
+    with DatabaseManager(str(tmp_path / 'enfesto.db')) as db:
+        db.inserir_leituras(gerar_leituras())
+        db.flush()
+        yield db
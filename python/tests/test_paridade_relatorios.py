@@ -0,0 +1,58 @@
+"""
+Paridade dos relatórios de analise_dados: a agregação no SQLite (tabelas de
+resumo, ou FONTE_LEITURAS quando elas não podem ser lidas) tem de dar o mesmo
+resultado que o caminho pandas, inclusive depois da compactação das leituras
+antigas pela retenção.
+"""
+
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+import analise_dados as ad
+import retencao
+from conftest import INICIO
+
+RELATORIOS = [ad.folhas_por_ordem, ad.produtividade_por_maquina, ad.folhas_por_dia]
+
+
+def _normalizar(df: pd.DataFrame) -> pd.DataFrame:
+    # Categóricas (caminho pandas) e object (caminho SQL) representam os mesmos valores
+    df = df.astype({c: 'object' for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    return df.reset_index(drop=True)
+
+
+def assert_relatorios_iguais(esperados, dados):
+    for relatorio in RELATORIOS:
+        pd.testing.assert_frame_equal(_normalizar(relatorio(dados)), esperados[relatorio.__name__],
+                                      check_dtype=False, obj=relatorio.__name__)
+
+
+@pytest.fixture
+def via_pandas(db):
+    df = ad.carregar_dados(db)
+    return {relatorio.__name__: _normalizar(relatorio(df.copy())) for relatorio in RELATORIOS}
+
+
+def test_resumos_iguais_ao_pandas(db, via_pandas):
+    assert_relatorios_iguais(via_pandas, db)
+
+
+def test_sem_resumos_agrega_as_leituras(db, via_pandas):
+    db.conexao.execute('DROP TABLE resumo_ordem')
+    db.conexao.execute('DROP TABLE resumo_dia')
+    assert_relatorios_iguais(via_pandas, db)
+
+
+@pytest.mark.parametrize('modo', retencao.MODOS)
+def test_compactacao_preserva_relatorios(db, via_pandas, modo):
+    # Compacta o primeiro dia inteiro e metade do segundo
+    removidas, trechos = retencao.compactar(db, dias=0, modo=modo, agora=INICIO + timedelta(days=1, seconds=300))
+    assert removidas > 0 and 0 < trechos < removidas
+
+    assert_relatorios_iguais(via_pandas, db)
+    # Sem os resumos, a agregação de FONTE_LEITURAS soma leituras brutas e trechos
+    db.conexao.execute('DROP TABLE resumo_ordem')
+    db.conexao.execute('DROP TABLE resumo_dia')
+    assert_relatorios_iguais(via_pandas, db)
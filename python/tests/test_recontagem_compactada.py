@@ -0,0 +1,43 @@
+"""
+Recontagem de folhas depois da retenção: a contagem das leituras brutas que
+sobraram continua do estado ao fim dos trechos compactados, e os resumos não
+perdem folhas ao gravar a recontagem.
+"""
+
+from datetime import timedelta
+
+import pytest
+
+import retencao
+from conftest import INICIO
+from recontagem_folhas import recontar_folhas
+
+# Corta a segunda ordem de cada máquina no meio (e a máquina 2 no meio de um ciclo)
+CORTE = INICIO + timedelta(days=1, seconds=290)
+
+
+def _resumos(db):
+    return (db.consultar('SELECT * FROM resumo_ordem ORDER BY 1, 2'),
+            db.consultar('SELECT * FROM resumo_dia ORDER BY 1, 2, 3'))
+
+
+def test_recontagem_apos_compactacao_mantem_totais(db):
+    antes = _resumos(db)
+    retencao.compactar(db, dias=0, modo=retencao.MODO_MUDANCAS, agora=CORTE)
+
+    for codMaquina, ordemProducao in (('maq001', 'OP12'), ('maq002', 'OP22')):
+        total_anterior, total_recontado = recontar_folhas(db, codMaquina, ordemProducao, gravar=True)
+        assert total_recontado == total_anterior > 0
+
+    assert _resumos(db) == antes
+    assert db.reconstruir_resumos() == {'resumo_ordem': 0, 'resumo_dia': 0}
+
+
+def test_recontagem_sem_estado_conhecido_nao_grava(db):
+    # No modo "minuto" um trecho cruza os dois limites: o estado no corte é desconhecido
+    retencao.compactar(db, dias=0, modo=retencao.MODO_MINUTO, agora=CORTE)
+    antes = _resumos(db)
+
+    with pytest.raises(ValueError):
+        recontar_folhas(db, 'maq002', 'OP22', gravar=True)
+    assert _resumos(db) == antes